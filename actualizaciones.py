@@ -0,0 +1,166 @@
+"""Planificador de actualizaciones de la página.
+
+En lugar de llamar a `page.update()` cada vez que cambia algo, la interfaz
+marca los controles modificados y el planificador los envía juntos en un solo
+`page.update(*controles)` por tick. Las transiciones de la barra de HP también
+avanzan con ese mismo tick, así que animar no añade envíos extra.
+
+Flet ejecuta los manejadores síncronos en hilos del executor, así que `marcar`
+y `animar_a` se pueden llamar desde cualquier hilo: los pendientes se protegen
+con un lock y el bucle se despierta con `call_soon_threadsafe`.
+"""
+import asyncio
+import threading
+import time
+
+TODA_LA_PAGINA = object()
+
+
+class Transicion:
+    def __init__(self, control, atributo, inicio, destino, duracion, ahora):
+        self.control = control
+        self.atributo = atributo
+        self.inicio = inicio
+        self.destino = destino
+        self.duracion = duracion
+        self.comienzo = ahora
+
+    def avanzar(self, ahora):
+        """Aplica el valor del instante `ahora`; devuelve True al terminar."""
+        progreso = (ahora - self.comienzo) / self.duracion if self.duracion > 0 else 1.0
+        if progreso >= 1.0:
+            setattr(self.control, self.atributo, self.destino)
+            return True
+        # Desaceleración cuadrática: rápido al principio, suave al final
+        t = 1 - (1 - progreso) ** 2
+        setattr(self.control, self.atributo, self.inicio + (self.destino - self.inicio) * t)
+        return False
+
+
+class PlanificadorActualizaciones:
+    def __init__(self, page, intervalo=1 / 30, animar=True, reloj=time.monotonic):
+        self.page = page
+        self.intervalo = intervalo
+        self.animar = animar
+        self.reloj = reloj
+        # dict en lugar de set para enviar en el orden en que se marcaron
+        self._sucios = {}
+        self._transiciones = {}
+        self._lock = threading.Lock()
+        self._pendiente = None
+        self._loop = None
+        self._tarea = None
+
+        self.envios = 0
+        self.controles_enviados = 0
+        self.envios_turno = 0
+        # Totales de los turnos ya cerrados (con algún envío), para la media
+        self.turnos_cerrados = 0
+        self.envios_turnos_cerrados = 0
+
+    def iniciar(self):
+        """Arranca el bucle de ticks en el event loop de Flet, si lo hay."""
+        if self._tarea is None and hasattr(self.page, "run_task"):
+            self._tarea = self.page.run_task(self._bucle)
+
+    def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+        self._pendiente = None
+
+    def marcar(self, *controles):
+        with self._lock:
+            for control in controles:
+                self._sucios[id(control)] = control
+        self._despertar()
+
+    def marcar_pagina(self):
+        """Pide un `page.update()` completo (p. ej. al añadir controles nuevos)."""
+        self.marcar(TODA_LA_PAGINA)
+
+    def animar_a(self, control, atributo, destino, duracion=0.5):
+        """Lleva `control.atributo` hasta `destino` a lo largo de varios ticks."""
+        actual = getattr(control, atributo)
+        if not self.animar or actual is None or duracion <= 0:
+            with self._lock:
+                self._transiciones.pop(id(control), None)
+            if actual != destino:
+                setattr(control, atributo, destino)
+                self.marcar(control)
+            return
+        with self._lock:
+            if actual == destino and id(control) not in self._transiciones:
+                return
+            self._transiciones[id(control)] = Transicion(
+                control, atributo, actual, destino, duracion, self.reloj()
+            )
+        self._despertar()
+
+    def tick(self):
+        """Avanza las transiciones y envía todo lo pendiente en un solo update."""
+        if self._transiciones:
+            ahora = self.reloj()
+            with self._lock:
+                for clave, transicion in list(self._transiciones.items()):
+                    if transicion.avanzar(ahora):
+                        del self._transiciones[clave]
+                    self._sucios[id(transicion.control)] = transicion.control
+        return self.vaciar()
+
+    def vaciar(self):
+        """Envía ya los controles marcados; devuelve cuántos se enviaron."""
+        # Se cambia el dict entero para no perder lo que se marque mientras se envía
+        with self._lock:
+            sucios, self._sucios = self._sucios, {}
+        if not sucios:
+            return 0
+        controles = list(sucios.values())
+        if TODA_LA_PAGINA in controles:
+            self.page.update()
+        else:
+            self.page.update(*controles)
+        self.envios += 1
+        self.envios_turno += 1
+        self.controles_enviados += len(controles)
+        return len(controles)
+
+    def terminar_transiciones(self):
+        """Salta al valor final de todas las transiciones en curso."""
+        with self._lock:
+            for transicion in self._transiciones.values():
+                setattr(transicion.control, transicion.atributo, transicion.destino)
+                self._sucios[id(transicion.control)] = transicion.control
+            self._transiciones.clear()
+
+    def nuevo_turno(self):
+        """Cierra el contador del turno anterior y empieza uno nuevo."""
+        if self.envios_turno:
+            self.turnos_cerrados += 1
+            self.envios_turnos_cerrados += self.envios_turno
+        self.envios_turno = 0
+
+    def estadisticas(self):
+        turnos = self.turnos_cerrados
+        return {
+            "envios": self.envios,
+            "controles_enviados": self.controles_enviados,
+            "envios_turno_actual": self.envios_turno,
+            "envios_por_turno": self.envios_turnos_cerrados / turnos if turnos else 0.0,
+        }
+
+    def _despertar(self):
+        # asyncio.Event no es seguro entre hilos: el set se hace en el propio loop
+        if self._pendiente is not None:
+            self._loop.call_soon_threadsafe(self._pendiente.set)
+
+    async def _bucle(self):
+        self._loop = asyncio.get_running_loop()
+        self._pendiente = asyncio.Event()
+        while True:
+            if not self._sucios and not self._transiciones:
+                self._pendiente.clear()
+                await self._pendiente.wait()
+            # Se espera un tick para juntar todo lo que se marque mientras tanto
+            await asyncio.sleep(self.intervalo)
+            self.tick()
@@ -0,0 +1,356 @@
+"""Optimizador de equilibrio: HP, poder de los ataques y multiplicadores de tipo.
+
+Busca valores con los que cada par de especies gane más o menos la mitad de
+sus batallas. Como en este juego mover primero es una gran ventaja, cada par
+se mide en los dos órdenes y se promedia: para (a, b) la probabilidad de que
+gane a es (P[a, b] + 1 - P[b, a]) / 2. Ambos lados atacan al azar, como en
+`montecarlo.matriz_victorias`, que es el evaluador.
+
+Espacio de búsqueda: HP de cada especie, poder de cada ataque y cada
+multiplicador no neutro de la tabla de tipos. Los HP y poderes son enteros y
+los multiplicadores se redondean a PASO_MULTIPLICADOR, así que hay un número
+finito de configuraciones y ninguna se evalúa dos veces. Los multiplicadores
+conservan su sentido (una ventaja sigue por encima de 1 y una resistencia por
+debajo).
+
+Método: estrategia evolutiva (mu + lambda) con mutaciones gaussianas
+relativas. Todas las configuraciones se simulan con la misma semilla
+(números aleatorios comunes), de modo que la diferencia entre dos candidatos
+no es ruido de muestreo; al final el mejor se valida con otra semilla y más
+batallas. La selección sigue el objetivo (error cuadrático), pero un
+candidato solo pasa a ser el mejor si su desviación máxima no es peor que la
+de la configuración inicial, así que el resultado nunca empeora esa medida.
+Cada generación se reparte entre procesos. Se para antes de tiempo cuando
+ningún par se aleja de 50 % más que la tolerancia, o tras `paciencia`
+generaciones sin mejora.
+
+Escribe un candidato de POKEMON_DATA (usable con POKEMON_CATALOGO), la tabla
+de tipos (usable con `tipos.cargar_tipos`) y un informe de texto.
+
+    python balance.py --generaciones 40 --batallas 2000 --procesos 4 --salida balance
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+from montecarlo import TablasEspecies, matriz_victorias
+from pokemon import POKEMON_DATA
+from tipos import TABLA_TIPOS, RegistroTipos
+
+HP = "hp"
+PODER = "poder"
+MULTIPLICADOR = "multiplicador"
+
+PASO_MULTIPLICADOR = 0.05
+
+
+class EspacioBalance:
+    """Parámetros ajustables de unas especies y una tabla de tipos.
+
+    Una configuración es una tupla de valores, en el orden de `parametros`.
+    """
+
+    def __init__(self, datos=None, tabla_tipos=None, limites_hp=(50, 200),
+                 limites_poder=(10, 120), limites_multiplicador=(0.5, 2.0)):
+        self.datos = datos or POKEMON_DATA
+        self.tabla_tipos = tabla_tipos or TABLA_TIPOS
+        self.nombres = list(self.datos)
+        # (clase, clave, mínimo, máximo)
+        self.parametros = []
+        inicial = []
+        for nombre in self.nombres:
+            self.parametros.append((HP, nombre, *limites_hp))
+            inicial.append(self.datos[nombre]["hp"])
+        for nombre in self.nombres:
+            for i, (_, _, poder) in enumerate(self.datos[nombre]["ataques"]):
+                self.parametros.append((PODER, (nombre, i), *limites_poder))
+                inicial.append(poder)
+        minimo, maximo = limites_multiplicador
+        for tipo_ataque, relaciones in self.tabla_tipos.items():
+            for tipo_defensor, multiplicador in relaciones.items():
+                if multiplicador > 1:
+                    limites = (max(minimo, 1 + PASO_MULTIPLICADOR), maximo)
+                elif multiplicador < 1:
+                    limites = (minimo, min(maximo, 1 - PASO_MULTIPLICADOR))
+                else:
+                    continue
+                self.parametros.append((MULTIPLICADOR, (tipo_ataque, tipo_defensor), *limites))
+                inicial.append(multiplicador)
+        self.inicial = self.redondear(inicial)
+
+    def redondear(self, valores):
+        resultado = []
+        for (clase, _, minimo, maximo), valor in zip(self.parametros, valores):
+            valor = min(max(valor, minimo), maximo)
+            if clase == MULTIPLICADOR:
+                valor = round(round(valor / PASO_MULTIPLICADOR) * PASO_MULTIPLICADOR, 2)
+            else:
+                valor = int(round(valor))
+            resultado.append(valor)
+        return tuple(resultado)
+
+    def mutar(self, valores, sigma, rng):
+        """Copia con algunos parámetros multiplicados por (1 + sigma * N(0, 1))."""
+        probabilidad = max(1 / len(valores), 0.2)
+        nuevos = list(valores)
+        while True:
+            cambiados = [i for i in range(len(nuevos)) if rng.random() < probabilidad]
+            if cambiados:
+                break
+        for i in cambiados:
+            nuevos[i] *= 1 + sigma * rng.gauss(0, 1)
+        return self.redondear(nuevos)
+
+    def aplicar(self, valores):
+        """(datos de especies, tabla de tipos) con los valores de la configuración."""
+        datos = copy.deepcopy(self.datos)
+        tabla = copy.deepcopy(self.tabla_tipos)
+        for (clase, clave, _, _), valor in zip(self.parametros, valores):
+            if clase == HP:
+                datos[clave]["hp"] = valor
+            elif clase == PODER:
+                nombre, i = clave
+                ataque_nombre, tipo, _ = datos[nombre]["ataques"][i]
+                datos[nombre]["ataques"][i] = (ataque_nombre, tipo, valor)
+            else:
+                tipo_ataque, tipo_defensor = clave
+                tabla[tipo_ataque][tipo_defensor] = valor
+        return datos, tabla
+
+    def describir(self, clase, clave):
+        if clase == HP:
+            return f"HP {clave}"
+        if clase == PODER:
+            nombre, i = clave
+            return f"{nombre}: {self.datos[nombre]['ataques'][i][0]}"
+        return f"{clave[0]} -> {clave[1]}"
+
+
+class Evaluacion:
+    def __init__(self, valores, probabilidades, objetivo, desviacion_maxima):
+        self.valores = valores
+        # Probabilidad de victoria del jugador (fila) contra el rival (columna)
+        self.probabilidades = probabilidades
+        self.objetivo = objetivo
+        self.desviacion_maxima = desviacion_maxima
+
+
+def equilibrio_pares(probabilidades):
+    """Probabilidad de que gane la especie a contra la b, promediando quién mueve primero.
+
+    Devuelve un arreglo con un valor por par a < b.
+    """
+    p = np.asarray(probabilidades)
+    a, b = np.triu_indices(p.shape[0], k=1)
+    return (p[a, b] + 1 - p[b, a]) / 2
+
+
+def evaluar(espacio, valores, batallas, semilla=0, peso_cambio=0.01, max_turnos=1000):
+    """Simula la configuración y la puntúa; cuanto menor el objetivo, mejor.
+
+    El objetivo es el error cuadrático medio de los pares respecto a 50 % más
+    `peso_cambio` por el cambio relativo medio al cuadrado respecto a los
+    valores iniciales, para no alejarse sin necesidad del diseño original.
+    """
+    datos, tabla = espacio.aplicar(valores)
+    tablas = TablasEspecies(espacio.nombres, datos, RegistroTipos(tabla))
+    matriz = matriz_victorias(batallas, semilla, max_turnos=max_turnos, tablas=tablas)
+    desviaciones = equilibrio_pares(matriz.probabilidad) - 0.5
+    cambio = np.asarray(valores, dtype=np.float64) / np.asarray(espacio.inicial) - 1
+    objetivo = float(np.mean(desviaciones ** 2) + peso_cambio * np.mean(cambio ** 2))
+    return Evaluacion(valores, matriz.probabilidad, objetivo,
+                      float(np.max(np.abs(desviaciones))) if desviaciones.size else 0.0)
+
+
+def _evaluar_trabajo(trabajo):
+    return evaluar(*trabajo)
+
+
+class ResultadoBalance:
+    def __init__(self, espacio, inicial, mejor, historial, motivo, evaluadas, aciertos, segundos):
+        self.espacio = espacio
+        self.inicial = inicial
+        self.mejor = mejor
+        # (generación, objetivo del mejor, desviación máxima del mejor, evaluadas hasta entonces)
+        self.historial = historial
+        self.motivo = motivo
+        self.evaluadas = evaluadas
+        self.aciertos_cache = aciertos
+        self.segundos = segundos
+        self.validacion = None
+
+
+def optimizar(espacio=None, generaciones=40, poblacion=24, padres=4, sigma=0.15, batallas=1000,
+              semilla=0, tolerancia=0.02, paciencia=8, procesos=1, peso_cambio=0.01,
+              al_generacion=None):
+    """Estrategia evolutiva (padres + poblacion); devuelve un `ResultadoBalance`.
+
+    `al_generacion(generacion, mejor)` se llama al terminar cada generación.
+    """
+    espacio = espacio or EspacioBalance()
+    if padres < 1 or poblacion < 1:
+        raise ValueError("Hacen falta al menos un padre y un hijo por generación")
+    rng = random.Random(semilla)
+    # Configuración -> Evaluacion; la semilla de simulación es la misma para todas
+    cache = {}
+    aciertos = 0
+    inicio = time.perf_counter()
+    pool = get_context().Pool(procesos) if procesos > 1 else None
+
+    def evaluar_lote(lote):
+        nonlocal aciertos
+        pendientes = []
+        for valores in lote:
+            if valores in cache or valores in pendientes:
+                aciertos += 1
+            else:
+                pendientes.append(valores)
+        trabajos = [(espacio, v, batallas, semilla, peso_cambio) for v in pendientes]
+        resultados = pool.map(_evaluar_trabajo, trabajos) if pool else map(_evaluar_trabajo,
+                                                                            trabajos)
+        for evaluacion in resultados:
+            cache[evaluacion.valores] = evaluacion
+        return [cache[v] for v in lote]
+
+    try:
+        inicial = evaluar_lote([espacio.inicial])[0]
+        seleccion = [inicial]
+        mejor = inicial
+        historial = [(0, mejor.objetivo, mejor.desviacion_maxima, len(cache))]
+        sin_mejora = 0
+        motivo = "generaciones agotadas"
+        for generacion in range(1, generaciones + 1):
+            if mejor.desviacion_maxima <= tolerancia:
+                motivo = "tolerancia alcanzada"
+                break
+            hijos = evaluar_lote([espacio.mutar(rng.choice(seleccion).valores, sigma, rng)
+                                  for _ in range(poblacion)])
+            candidatos = {e.valores: e for e in seleccion + hijos}
+            seleccion = sorted(candidatos.values(), key=lambda e: e.objetivo)[:padres]
+            # Un error cuadrático menor puede esconder un par más desequilibrado
+            aceptables = [e for e in candidatos.values()
+                          if e.desviacion_maxima <= inicial.desviacion_maxima]
+            candidato = min(aceptables, key=lambda e: (e.objetivo, e.desviacion_maxima),
+                            default=None)
+            if candidato is not None and candidato.objetivo < mejor.objetivo:
+                mejor = candidato
+                sin_mejora = 0
+            else:
+                sin_mejora += 1
+            historial.append((generacion, mejor.objetivo, mejor.desviacion_maxima, len(cache)))
+            if al_generacion is not None:
+                al_generacion(generacion, mejor)
+            if sin_mejora >= paciencia:
+                motivo = f"{paciencia} generaciones sin mejora"
+                break
+        else:
+            if mejor.desviacion_maxima <= tolerancia:
+                motivo = "tolerancia alcanzada"
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return ResultadoBalance(espacio, inicial, mejor, historial, motivo, len(cache), aciertos,
+                            time.perf_counter() - inicio)
+
+
+def validar(resultado, batallas, semilla):
+    """Vuelve a evaluar el inicial y el mejor con otra semilla; guarda y devuelve ambos."""
+    espacio = resultado.espacio
+    resultado.validacion = (evaluar(espacio, espacio.inicial, batallas, semilla),
+                            evaluar(espacio, resultado.mejor.valores, batallas, semilla))
+    return resultado.validacion
+
+
+def informe(resultado):
+    """Texto con la búsqueda, los pares antes y después y los parámetros que cambian."""
+    espacio = resultado.espacio
+    lineas = [
+        "Equilibrio de especies",
+        "",
+        f"Parada: {resultado.motivo} tras {resultado.historial[-1][0]} generaciones, "
+        f"{resultado.evaluadas} configuraciones simuladas "
+        f"({resultado.aciertos_cache} repetidas servidas por la caché), "
+        f"{resultado.segundos:.1f} s.",
+        f"Objetivo: {resultado.inicial.objetivo:.5f} -> {resultado.mejor.objetivo:.5f}",
+        f"Desviación máxima de un par: {resultado.inicial.desviacion_maxima:.1%} -> "
+        f"{resultado.mejor.desviacion_maxima:.1%}",
+    ]
+    if resultado.validacion is not None:
+        antes, despues = resultado.validacion
+        lineas.append(f"Validación con otra semilla: {antes.desviacion_maxima:.1%} -> "
+                      f"{despues.desviacion_maxima:.1%}")
+
+    lineas += ["", "Victorias por par (promediando quién mueve primero):"]
+    a, b = np.triu_indices(len(espacio.nombres), k=1)
+    antes = equilibrio_pares(resultado.inicial.probabilidades)
+    despues = equilibrio_pares(resultado.mejor.probabilidades)
+    for i, j, p_antes, p_despues in zip(a, b, antes, despues):
+        par = f"{espacio.nombres[i]} vs {espacio.nombres[j]}"
+        lineas.append(f"  {par:<28} {p_antes:6.1%} -> {p_despues:6.1%}")
+
+    lineas += ["", "Parámetros que cambian:"]
+    for (clase, clave, _, _), anterior, nuevo in zip(espacio.parametros, espacio.inicial,
+                                                      resultado.mejor.valores):
+        if anterior != nuevo:
+            lineas.append(f"  {espacio.describir(clase, clave):<34} {anterior:>6} -> {nuevo:>6}")
+
+    lineas += ["", "Progreso (generación, objetivo, desviación máxima, evaluadas):"]
+    for generacion, objetivo, desviacion, evaluadas in resultado.historial:
+        lineas.append(f"  {generacion:>4} {objetivo:10.5f} {desviacion:7.1%} {evaluadas:>6}")
+    return "\n".join(lineas) + "\n"
+
+
+def guardar(resultado, prefijo):
+    """Escribe <prefijo>_especies.json, <prefijo>_tipos.json y <prefijo>_informe.txt."""
+    datos, tabla = resultado.espacio.aplicar(resultado.mejor.valores)
+    rutas = [f"{prefijo}_especies.json", f"{prefijo}_tipos.json", f"{prefijo}_informe.txt"]
+    with open(rutas[0], "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    with open(rutas[1], "w", encoding="utf-8") as f:
+        json.dump(tabla, f, indent=2, ensure_ascii=False)
+    with open(rutas[2], "w", encoding="utf-8") as f:
+        f.write(informe(resultado))
+    return rutas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--generaciones", type=int, default=40)
+    parser.add_argument("--poblacion", type=int, default=24, help="hijos por generación")
+    parser.add_argument("--padres", type=int, default=4)
+    parser.add_argument("--sigma", type=float, default=0.15, help="tamaño relativo de las mutaciones")
+    parser.add_argument("--batallas", type=int, default=1000,
+                        help="batallas por par y orden en cada evaluación")
+    parser.add_argument("--tolerancia", type=float, default=0.02,
+                        help="desviación máxima de 50 %% a la que se para")
+    parser.add_argument("--paciencia", type=int, default=8)
+    parser.add_argument("--peso-cambio", type=float, default=0.01,
+                        help="penalización por alejarse de los valores actuales")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="balance", help="prefijo de los archivos generados")
+    args = parser.parse_args()
+
+    def progreso(generacion, mejor):
+        print(f"generación {generacion:>3}: objetivo {mejor.objetivo:.5f}, "
+              f"desviación máxima {mejor.desviacion_maxima:.1%}", flush=True)
+
+    resultado = optimizar(
+        generaciones=args.generaciones, poblacion=args.poblacion, padres=args.padres,
+        sigma=args.sigma, batallas=args.batallas, semilla=args.semilla,
+        tolerancia=args.tolerancia, paciencia=args.paciencia, procesos=args.procesos,
+        peso_cambio=args.peso_cambio, al_generacion=progreso,
+    )
+    validar(resultado, args.batallas * 4, args.semilla + 1)
+    for ruta in guardar(resultado, args.salida):
+        print(f"Escrito {ruta}")
+    print()
+    print(informe(resultado), end="")
@@ -0,0 +1,278 @@
+"""Catálogo de especies con carga diferida e índices.
+
+Un catálogo se comporta como el diccionario POKEMON_DATA (nombre -> datos),
+pero solo lee una especie cuando se pide y ofrece búsquedas por tipo y por
+prefijo de nombre. Hay dos implementaciones:
+
+- `CatalogoMemoria`: envuelve un diccionario ya cargado (POKEMON_DATA).
+- `CatalogoSQLite`: lee de un archivo SQLite; abrirlo no recorre el roster,
+  así que la primera pantalla se dibuja sin esperar a las ~1000 especies.
+
+Los catálogos en JSON (mismo formato que POKEMON_DATA) se importan una vez a
+un SQLite junto al archivo y se reimportan solo si el JSON cambia.
+"""
+import bisect
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+
+from tipos import SEPARADOR
+
+
+def _clave_prefijo(texto):
+    return texto.casefold()
+
+
+class CatalogoMemoria(Mapping):
+    def __init__(self, datos):
+        self.datos = datos
+        self._indice_tipos = None
+        self._indice_nombres = None
+        self._ids = None
+
+    def __getitem__(self, nombre):
+        return self.datos[nombre]
+
+    def __iter__(self):
+        return iter(self.datos)
+
+    def __len__(self):
+        return len(self.datos)
+
+    def __contains__(self, nombre):
+        return nombre in self.datos
+
+    def nombres(self, desde=0, cantidad=None):
+        nombres = list(self.datos)
+        return nombres[desde:None if cantidad is None else desde + cantidad]
+
+    def id_especie(self, nombre):
+        """Identificador numérico estable de la especie: su posición en el catálogo."""
+        return self._indice_ids()[1][nombre]
+
+    def especie_por_id(self, id_especie):
+        orden = self._indice_ids()[0]
+        if not 0 <= id_especie < len(orden):
+            raise KeyError(id_especie)
+        return orden[id_especie]
+
+    def _indice_ids(self):
+        if self._ids is None:
+            orden = list(self.datos)
+            self._ids = (orden, {n: i for i, n in enumerate(orden)})
+        return self._ids
+
+    def por_tipo(self, tipo):
+        if self._indice_tipos is None:
+            indice = {}
+            for nombre, data in self.datos.items():
+                for componente in data["tipo"].split(SEPARADOR):
+                    indice.setdefault(componente, []).append(nombre)
+            self._indice_tipos = indice
+        return list(self._indice_tipos.get(tipo, ()))
+
+    def por_prefijo(self, prefijo, limite=None):
+        if self._indice_nombres is None:
+            self._indice_nombres = sorted((_clave_prefijo(n), n) for n in self.datos)
+        clave = _clave_prefijo(prefijo)
+        inicio = bisect.bisect_left(self._indice_nombres, (clave, ""))
+        resultado = []
+        for clave_nombre, nombre in self._indice_nombres[inicio:]:
+            if not clave_nombre.startswith(clave) or len(resultado) == limite:
+                break
+            resultado.append(nombre)
+        return resultado
+
+    def tipos(self):
+        self.por_tipo("")
+        return sorted(self._indice_tipos)
+
+    def invalidar(self):
+        self._indice_tipos = None
+        self._indice_nombres = None
+        self._ids = None
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS especies (
+    orden INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    clave TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    hp INTEGER NOT NULL,
+    sprite_url TEXT NOT NULL,
+    ataques TEXT NOT NULL,
+    velocidad INTEGER
+);
+CREATE INDEX IF NOT EXISTS especies_clave ON especies(clave);
+CREATE TABLE IF NOT EXISTS tipos_especie (
+    tipo TEXT NOT NULL,
+    orden INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tipos_especie_tipo ON tipos_especie(tipo, orden);
+"""
+
+
+class CatalogoSQLite(Mapping):
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript(_ESQUEMA)
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(especies)")}
+        if "velocidad" not in columnas:
+            # Catálogo anterior a la velocidad: sus especies usan la de por defecto
+            self._conexion.execute("ALTER TABLE especies ADD COLUMN velocidad INTEGER")
+        # Los manejadores de Flet pueden llegar desde varios hilos
+        self._lock = threading.Lock()
+        self._cargadas = {}
+        self._total = None
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return self._conexion.execute(sql, parametros).fetchall()
+
+    def __getitem__(self, nombre):
+        data = self._cargadas.get(nombre)
+        if data is not None:
+            return data
+        filas = self._consultar(
+            "SELECT tipo, hp, sprite_url, ataques, velocidad FROM especies WHERE nombre = ?",
+            (nombre,))
+        if not filas:
+            raise KeyError(nombre)
+        tipo, hp, sprite_url, ataques, velocidad = filas[0]
+        data = {
+            "tipo": tipo,
+            "hp": hp,
+            "sprite_url": sprite_url,
+            "ataques": [tuple(a) for a in json.loads(ataques)],
+        }
+        if velocidad is not None:
+            data["velocidad"] = velocidad
+        self._cargadas[nombre] = data
+        return data
+
+    def __contains__(self, nombre):
+        if nombre in self._cargadas:
+            return True
+        return bool(self._consultar("SELECT 1 FROM especies WHERE nombre = ?", (nombre,)))
+
+    def __iter__(self):
+        return iter(self.nombres())
+
+    def __len__(self):
+        if self._total is None:
+            self._total = self._consultar("SELECT COUNT(*) FROM especies")[0][0]
+        return self._total
+
+    def nombres(self, desde=0, cantidad=None):
+        """Nombres en el orden del catálogo; con `cantidad`, solo esa página."""
+        filas = self._consultar(
+            "SELECT nombre FROM especies ORDER BY orden LIMIT ? OFFSET ?",
+            (-1 if cantidad is None else cantidad, desde))
+        return [nombre for (nombre,) in filas]
+
+    def id_especie(self, nombre):
+        """Identificador numérico estable de la especie: su columna `orden`."""
+        filas = self._consultar("SELECT orden FROM especies WHERE nombre = ?", (nombre,))
+        if not filas:
+            raise KeyError(nombre)
+        return filas[0][0]
+
+    def especie_por_id(self, id_especie):
+        filas = self._consultar("SELECT nombre FROM especies WHERE orden = ?", (id_especie,))
+        if not filas:
+            raise KeyError(id_especie)
+        return filas[0][0]
+
+    def por_tipo(self, tipo):
+        filas = self._consultar(
+            "SELECT e.nombre FROM tipos_especie t JOIN especies e ON e.orden = t.orden "
+            "WHERE t.tipo = ? ORDER BY t.orden", (tipo,))
+        return [nombre for (nombre,) in filas]
+
+    def por_prefijo(self, prefijo, limite=None):
+        clave = _clave_prefijo(prefijo)
+        # Rango [clave, clave + U+10FFFF) para que SQLite use el índice
+        filas = self._consultar(
+            "SELECT nombre FROM especies WHERE clave >= ? AND clave < ? "
+            "ORDER BY clave LIMIT ?",
+            (clave, clave + "\U0010ffff", -1 if limite is None else limite))
+        return [nombre for (nombre,) in filas]
+
+    def tipos(self):
+        return [tipo for (tipo,) in self._consultar(
+            "SELECT DISTINCT tipo FROM tipos_especie ORDER BY tipo")]
+
+    def invalidar(self):
+        self._cargadas.clear()
+        self._total = None
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+def guardar_sqlite(datos, ruta):
+    """Escribe un diccionario con el formato de POKEMON_DATA en un SQLite."""
+    temporal = ruta + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+    conexion = sqlite3.connect(temporal)
+    try:
+        conexion.executescript(_ESQUEMA)
+        for orden, (nombre, data) in enumerate(datos.items()):
+            conexion.execute(
+                "INSERT INTO especies VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (orden, nombre, _clave_prefijo(nombre), data["tipo"], data["hp"],
+                 data["sprite_url"], json.dumps([list(a) for a in data["ataques"]],
+                                                ensure_ascii=False),
+                 data.get("velocidad")))
+            conexion.executemany(
+                "INSERT INTO tipos_especie VALUES (?, ?)",
+                [(componente, orden) for componente in data["tipo"].split(SEPARADOR)])
+        conexion.commit()
+    finally:
+        conexion.close()
+    os.replace(temporal, ruta)
+
+
+def importar_json(ruta_json, ruta_sqlite=None):
+    """Convierte un catálogo JSON a SQLite si el SQLite falta o es más antiguo."""
+    ruta_sqlite = ruta_sqlite or os.path.splitext(ruta_json)[0] + ".sqlite"
+    if (not os.path.exists(ruta_sqlite)
+            or os.path.getmtime(ruta_sqlite) < os.path.getmtime(ruta_json)):
+        with open(ruta_json, encoding="utf-8") as f:
+            guardar_sqlite(json.load(f), ruta_sqlite)
+    return ruta_sqlite
+
+
+def cargar_catalogo(ruta=None, por_defecto=None):
+    """Abre el catálogo indicado, o envuelve `por_defecto` si no hay ruta."""
+    if not ruta:
+        return CatalogoMemoria(por_defecto or {})
+    if ruta.endswith(".json"):
+        ruta = importar_json(ruta)
+    return CatalogoSQLite(ruta)
+
+
+def generar_catalogo(n, semilla=0, ataques_por_especie=4):
+    """Roster sintético de `n` especies para pruebas de carga y benchmarks."""
+    import random
+    from tipos import TABLA_TIPOS
+
+    rng = random.Random(semilla)
+    tipos = sorted(TABLA_TIPOS)
+    datos = {}
+    for i in range(n):
+        tipo = rng.choice(tipos)
+        datos[f"Especie{i:04d}"] = {
+            "tipo": tipo,
+            "hp": rng.randint(80, 140),
+            "velocidad": rng.randint(20, 120),
+            "sprite_url": f"https://example.com/sprites/{i}.png",
+            "ataques": [(f"Ataque{i}-{k}", rng.choice(tipos), rng.randint(10, 40))
+                        for k in range(ataques_por_especie)],
+        }
+    return datos
@@ -0,0 +1,116 @@
+"""Representación compacta del estado de HP y medición de memoria.
+
+`EstadoEquipo` guarda el HP de un equipo (o de muchos Pokémon en un servidor)
+como estructura de arreglos: un `array` por campo en lugar de un objeto por
+Pokémon. Los datos fijos de cada especie (tipo, ataques, sprite) no se copian;
+se consultan en el catálogo a través del nombre.
+
+Ejecutar `python compacto.py` imprime los bytes por instancia de cada
+representación.
+"""
+import tracemalloc
+from array import array
+
+from pokemon import CATALOGO, crear_pokemon
+
+
+class EstadoEquipo:
+    __slots__ = ("nombres", "hp_max", "hp_actual")
+
+    def __init__(self, nombres):
+        for nombre in nombres:
+            if nombre not in CATALOGO:
+                raise ValueError(f"Pokémon desconocido: {nombre}")
+        self.nombres = list(nombres)
+        self.hp_max = array("i", (CATALOGO[n]["hp"] for n in self.nombres))
+        self.hp_actual = array("i", self.hp_max)
+
+    @classmethod
+    def desde_pokemon(cls, pokemon):
+        estado = cls([p.nombre for p in pokemon])
+        for i, p in enumerate(pokemon):
+            estado.hp_actual[i] = p.hp_actual
+        return estado
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def recibir_dano(self, indice, cantidad):
+        hp = self.hp_actual[indice] - cantidad
+        self.hp_actual[indice] = hp if hp > 0 else 0
+
+    def esta_debilitado(self, indice):
+        return self.hp_actual[indice] <= 0
+
+    def vivos(self):
+        return [i for i, hp in enumerate(self.hp_actual) if hp > 0]
+
+    def restaurar(self):
+        self.hp_actual[:] = self.hp_max
+
+    def crear_pokemon(self, indice):
+        """Materializa un Pokémon con el HP actual guardado en el equipo."""
+        pokemon = crear_pokemon(self.nombres[indice])
+        pokemon.hp_actual = self.hp_actual[indice]
+        return pokemon
+
+
+# Réplica de las clases originales (con __dict__ y ataques propios) para comparar
+class _AtaqueClasico:
+    def __init__(self, nombre, tipo, poder):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.poder = poder
+
+
+class _PokemonClasico:
+    def __init__(self, nombre, tipo, hp_max, sprite_url=""):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.hp_max = hp_max
+        self.hp_actual = hp_max
+        self.ataques = []
+        self.sprite_url = sprite_url
+
+
+def _crear_clasico(nombre):
+    data = CATALOGO[nombre]
+    pokemon = _PokemonClasico(nombre, data["tipo"], data["hp"], data["sprite_url"])
+    for nombre_ataque, tipo, poder in data["ataques"]:
+        pokemon.ataques.append(_AtaqueClasico(nombre_ataque, tipo, poder))
+    return pokemon
+
+
+def _bytes_por_instancia(fabrica, n):
+    tracemalloc.start()
+    try:
+        inicio, _ = tracemalloc.get_traced_memory()
+        objetos = fabrica(n)
+        fin, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objetos
+    return (fin - inicio) / n
+
+
+def medir_memoria(n=100_000):
+    """Bytes por Pokémon vivo con cada representación."""
+    nombres = list(CATALOGO)
+    especies = [nombres[i % len(nombres)] for i in range(n)]
+    # Calentar la caché de ataques para medir solo el coste por instancia
+    for nombre in nombres:
+        crear_pokemon(nombre)
+
+    return {
+        "clasico": _bytes_por_instancia(
+            lambda n: [_crear_clasico(e) for e in especies], n),
+        "slots": _bytes_por_instancia(
+            lambda n: [crear_pokemon(e) for e in especies], n),
+        "estado_equipo": _bytes_por_instancia(
+            lambda n: EstadoEquipo(especies), n),
+    }
+
+
+if __name__ == "__main__":
+    for nombre, valor in medir_memoria().items():
+        print(f"{nombre:>14}: {valor:8.1f} bytes/instancia")
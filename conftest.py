@@ -0,0 +1,66 @@
+"""Opciones y fixtures de pytest para los benchmarks de test_rendimiento.py."""
+import pytest
+
+import rendimiento
+
+# Filas de `rendimiento.comparar` de esta sesión, para el resumen final
+FILAS = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("rendimiento", "benchmarks comparados con la línea base")
+    grupo.addoption("--rendimiento", action="store_true",
+                    help="corre los benchmarks (lentos) y los compara con la línea base")
+    grupo.addoption("--guardar-base", action="store_true",
+                    help="con --rendimiento, guarda los resultados como línea base")
+    grupo.addoption("--umbral", type=float, default=0.25,
+                    help="empeoramiento relativo tolerado por las métricas sin "
+                         "tolerancia propia (0.25 = 25 %%)")
+    grupo.addoption("--corridas", type=int, default=3,
+                    help="corridas completas; se usa la mediana de cada métrica")
+    grupo.addoption("--ruta-base", default=rendimiento.RUTA_BASE)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "rendimiento: benchmark lento; solo corre con --rendimiento")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--rendimiento"):
+        return
+    saltar = pytest.mark.skip(reason="benchmark lento: usar --rendimiento")
+    for item in items:
+        if "rendimiento" in item.keywords:
+            item.add_marker(saltar)
+
+
+def pytest_generate_tests(metafunc):
+    # Una prueba por métrica de la línea base
+    if "metrica" in metafunc.fixturenames:
+        base = rendimiento.cargar_base(metafunc.config.getoption("--ruta-base"))
+        metafunc.parametrize("metrica", list(base))
+
+
+@pytest.fixture(scope="session")
+def medidas(pytestconfig):
+    """Métricas actuales; con --guardar-base pasan a ser la línea base."""
+    actuales = rendimiento.ejecutar(pytestconfig.getoption("--corridas"))
+    ruta = pytestconfig.getoption("--ruta-base")
+    if pytestconfig.getoption("--guardar-base"):
+        rendimiento.guardar_base(actuales, ruta)
+    pytestconfig.stash[FILAS] = rendimiento.comparar(actuales, rendimiento.cargar_base(ruta),
+                                                     pytestconfig.getoption("--umbral"))
+    return actuales
+
+
+@pytest.fixture(scope="session")
+def base(pytestconfig, medidas):
+    return rendimiento.cargar_base(pytestconfig.getoption("--ruta-base"))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    filas = config.stash.get(FILAS, None)
+    if filas:
+        terminalreporter.section("rendimiento")
+        for linea in rendimiento.formatear(filas):
+            terminalreporter.write_line(linea)
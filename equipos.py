@@ -0,0 +1,399 @@
+"""Combates por equipos (hasta 6 contra 6) con cambios y orden por velocidad.
+
+Cada turno los dos lados eligen una acción: atacar con su Pokémon activo o
+cambiarlo por otro miembro del equipo. `PlanificadorTurnos` las ejecuta en
+orden de prioridad (los cambios van antes que los ataques), a igual prioridad
+primero el más rápido, y los empates de velocidad se alternan de un turno al
+siguiente. Si el activo cae antes de actuar pierde su acción; al final del
+turno su lado saca a otro miembro. Gana quien debilita al equipo entero.
+
+Las batallas no necesitan un hilo cada una: `jugar_async` cede el bucle entre
+turnos, así que un solo event loop lleva miles a la vez
+(`jugar_concurrentes`).
+
+    python equipos.py --batallas 2000 --concurrentes 5000 --pausa 0.01
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Optional
+
+from motor import (EVENTO_ATAQUE, EVENTO_CAMBIO, EVENTO_DEBILITADO, EVENTO_FIN, JUGADOR, RIVAL,
+                   ResultadoBatalla, crear_rngs)
+from pokemon import CATALOGO, crear_pokemon, devolver_pokemon
+
+TAMANO_EQUIPO = 6
+
+# Acciones: tuplas (tipo, indice). El índice es el del ataque del Pokémon
+# activo al atacar y el del miembro del equipo que entra al cambiar
+ATACAR = 0
+CAMBIAR = 1
+
+# Como en los juegos, un cambio va antes que cualquier ataque
+PRIORIDADES = {ATACAR: 0, CAMBIAR: 6}
+
+
+class Equipo:
+    """De 1 a TAMANO_EQUIPO Pokémon, uno de ellos en combate."""
+
+    def __init__(self, miembros):
+        miembros = list(miembros)
+        if not 1 <= len(miembros) <= TAMANO_EQUIPO:
+            raise ValueError(f"Un equipo tiene de 1 a {TAMANO_EQUIPO} Pokémon, no {len(miembros)}")
+        self.miembros = miembros
+        self.indice_activo = 0
+
+    @property
+    def activo(self):
+        return self.miembros[self.indice_activo]
+
+    @property
+    def nombre(self):
+        return "/".join(p.nombre for p in self.miembros)
+
+    def disponibles(self):
+        """Índices de los miembros que pueden entrar en combate."""
+        return [i for i, p in enumerate(self.miembros)
+                if i != self.indice_activo and not p.esta_debilitado()]
+
+    def derrotado(self):
+        return all(p.esta_debilitado() for p in self.miembros)
+
+    def cambiar(self, indice):
+        if not (0 <= indice < len(self.miembros)) or indice == self.indice_activo \
+                or self.miembros[indice].esta_debilitado():
+            raise ValueError(f"No se puede cambiar al miembro {indice}")
+        self.indice_activo = indice
+
+
+def crear_equipo(nombres):
+    return Equipo(crear_pokemon(nombre) for nombre in nombres)
+
+
+def devolver_equipo(equipo):
+    """Devuelve al pool los Pokémon de un equipo que ya no se usa."""
+    for pokemon in equipo.miembros:
+        devolver_pokemon(pokemon)
+
+
+def equipo_aleatorio(rng, tamano=TAMANO_EQUIPO, nombres=None):
+    """Nombres de especie al azar (con repetición) para un equipo."""
+    return rng.choices(list(nombres or CATALOGO), k=tamano)
+
+
+# ===== Estrategias: estrategia(equipo_propio, equipo_rival, rng) -> acción =====
+
+def accion_aleatoria(propio, rival, rng):
+    """Ataque al azar; si el activo está debilitado, entra un miembro al azar."""
+    if propio.activo.esta_debilitado():
+        return (CAMBIAR, rng.choice(propio.disponibles()))
+    return (ATACAR, rng.randrange(len(propio.activo.ataques)))
+
+
+def con_cambios(estrategia, probabilidad):
+    """Envuelve `estrategia` para que cambie de Pokémon al azar con cierta probabilidad."""
+    def elegir(propio, rival, rng):
+        if not propio.activo.esta_debilitado() and rng.random() < probabilidad:
+            disponibles = propio.disponibles()
+            if disponibles:
+                return (CAMBIAR, rng.choice(disponibles))
+        return estrategia(propio, rival, rng)
+    return elegir
+
+
+def desde_estrategia_individual(estrategia):
+    """Adapta una estrategia 1v1 de motor (atacante, defensor, rng) -> Ataque.
+
+    Para reemplazar a un debilitado saca al primer miembro disponible.
+    """
+    def elegir(propio, rival, rng):
+        if propio.activo.esta_debilitado():
+            return (CAMBIAR, propio.disponibles()[0])
+        atacante = propio.activo
+        ataque = estrategia(atacante, rival.activo, rng)
+        return (ATACAR, atacante.ataques.index(ataque))
+    return elegir
+
+
+class PlanificadorTurnos:
+    """Cola de prioridad con las acciones pendientes de un turno.
+
+    Sale antes la de mayor prioridad; a igual prioridad, la de mayor
+    velocidad; a igual velocidad, la de menor `desempate`, y después la que
+    se programó antes. Se vacía al terminar cada turno y se reutiliza; admite
+    cualquier número de lados.
+    """
+
+    def __init__(self):
+        self._cola = []
+        self._secuencia = itertools.count()
+
+    def programar(self, lado, accion, velocidad, desempate=0, prioridad=None):
+        if prioridad is None:
+            prioridad = PRIORIDADES[accion[0]]
+        heapq.heappush(self._cola, (-prioridad, -velocidad, desempate, next(self._secuencia),
+                                    lado, accion))
+
+    def siguiente(self):
+        """(lado, acción) de la próxima acción a ejecutar."""
+        entrada = heapq.heappop(self._cola)
+        return entrada[4], entrada[5]
+
+    def vaciar(self):
+        self._cola.clear()
+
+    def __len__(self):
+        return len(self._cola)
+
+
+class BatallaEquipos:
+    def __init__(self, jugador, rival, rng_jugador=None, rng_rival=None,
+                 estrategia_jugador=accion_aleatoria,
+                 estrategia_rival=accion_aleatoria, registrar=True, al_evento=None):
+        if rng_jugador is None or rng_rival is None:
+            rng_j, rng_r = crear_rngs()
+            rng_jugador = rng_jugador or rng_j
+            rng_rival = rng_rival or rng_r
+
+        self.equipos = (jugador, rival)
+        self.rngs = (rng_jugador, rng_rival)
+        self.estrategias = (estrategia_jugador, estrategia_rival)
+        self.turnos = 0
+        # Lista de tuplas (lado, tipo_accion, indice, dano); None si no se registra
+        self.registro = [] if registrar else None
+        # al_evento(tipo, batalla, lado, indice, dano, multiplicador); en EVENTO_CAMBIO
+        # el índice es el del miembro que entra
+        self.al_evento = al_evento
+        self.planificador = PlanificadorTurnos()
+
+    @property
+    def jugador(self):
+        return self.equipos[JUGADOR]
+
+    @property
+    def rival(self):
+        return self.equipos[RIVAL]
+
+    def terminada(self):
+        return self.jugador.derrotado() or self.rival.derrotado()
+
+    def ganador(self) -> Optional[int]:
+        if self.rival.derrotado():
+            return JUGADOR
+        if self.jugador.derrotado():
+            return RIVAL
+        return None
+
+    def elegir(self, lado):
+        return self.estrategias[lado](self.equipos[lado], self.equipos[1 - lado], self.rngs[lado])
+
+    def _validar(self, lado, accion):
+        tipo, indice = accion
+        equipo = self.equipos[lado]
+        if tipo == ATACAR:
+            if not 0 <= indice < len(equipo.activo.ataques):
+                raise ValueError(f"{equipo.activo.nombre} no tiene el ataque {indice}")
+        elif tipo == CAMBIAR:
+            if indice not in equipo.disponibles():
+                raise ValueError(f"No se puede cambiar al miembro {indice}")
+        else:
+            raise ValueError(f"Acción desconocida: {accion!r}")
+
+    def jugar_turno(self, accion_jugador=None, accion_rival=None):
+        """Ordena y ejecuta las acciones de ambos lados.
+
+        La acción que no se indique la elige la estrategia de su lado.
+        Devuelve las acciones ejecutadas, en orden, como tuplas
+        (lado, acción, dano, efectividad).
+        """
+        acciones = (
+            self.elegir(JUGADOR) if accion_jugador is None else accion_jugador,
+            self.elegir(RIVAL) if accion_rival is None else accion_rival,
+        )
+        planificador = self.planificador
+        for lado, accion in enumerate(acciones):
+            self._validar(lado, accion)
+            # Los empates de velocidad se alternan: cada turno empieza un lado
+            planificador.programar(lado, accion, self.equipos[lado].activo.velocidad,
+                                   (lado + self.turnos) & 1)
+
+        hechas = []
+        while planificador:
+            lado, accion = planificador.siguiente()
+            if self.equipos[lado].activo.esta_debilitado():
+                # Cayó antes de poder actuar
+                continue
+            dano, efectividad = self._ejecutar(lado, accion)
+            hechas.append((lado, accion, dano, efectividad))
+        self.turnos += 1
+
+        # Los lados cuyo activo cayó sacan a otro miembro antes del turno siguiente
+        if not self.terminada():
+            for lado, equipo in enumerate(self.equipos):
+                if equipo.activo.esta_debilitado():
+                    accion = self.elegir(lado)
+                    if accion[0] != CAMBIAR:
+                        raise ValueError(f"Hay que reemplazar a {equipo.activo.nombre}, no {accion!r}")
+                    self._validar(lado, accion)
+                    self._ejecutar(lado, accion)
+        return hechas
+
+    def _ejecutar(self, lado, accion):
+        tipo, indice = accion
+        equipo = self.equipos[lado]
+        if tipo == CAMBIAR:
+            equipo.cambiar(indice)
+            dano, efectividad = 0, 1.0
+        else:
+            atacante = equipo.activo
+            defensor = self.equipos[1 - lado].activo
+            dano, efectividad = atacante.atacar(atacante.ataques[indice], defensor)
+
+        if self.registro is not None:
+            self.registro.append((lado, tipo, indice, dano))
+        if self.al_evento is not None:
+            self.al_evento(EVENTO_CAMBIO if tipo == CAMBIAR else EVENTO_ATAQUE,
+                           self, lado, indice, dano, efectividad)
+            if tipo == ATACAR and defensor.esta_debilitado():
+                self.al_evento(EVENTO_DEBILITADO, self, 1 - lado, indice, dano, efectividad)
+                if self.terminada():
+                    self.al_evento(EVENTO_FIN, self, lado, indice, dano, efectividad)
+        return dano, efectividad
+
+    def resultado(self):
+        return ResultadoBatalla(
+            (self.jugador.nombre, self.rival.nombre),
+            self.ganador(),
+            self.turnos,
+            self.registro,
+        )
+
+    def jugar(self, max_turnos=1000):
+        """Juega hasta que un equipo quede derrotado o se agoten los turnos."""
+        while not self.terminada() and self.turnos < max_turnos:
+            self.jugar_turno()
+        return self.resultado()
+
+    async def jugar_async(self, pausa=0.0, max_turnos=1000):
+        """Como `jugar`, pero cede el event loop tras cada turno."""
+        while not self.terminada() and self.turnos < max_turnos:
+            self.jugar_turno()
+            # Incluso sin pausa: ninguna batalla acapara el bucle
+            await asyncio.sleep(pausa)
+        return self.resultado()
+
+
+def simular_batalla_equipos(nombres_jugador, nombres_rival, semilla=None,
+                            estrategia_jugador=accion_aleatoria,
+                            estrategia_rival=accion_aleatoria,
+                            registrar=True, max_turnos=1000):
+    """Simula una batalla completa entre dos equipos de especies del catálogo."""
+    rng_jugador, rng_rival = crear_rngs(semilla)
+    batalla = BatallaEquipos(
+        crear_equipo(nombres_jugador),
+        crear_equipo(nombres_rival),
+        rng_jugador,
+        rng_rival,
+        estrategia_jugador,
+        estrategia_rival,
+        registrar,
+    )
+    resultado = batalla.jugar(max_turnos)
+    devolver_equipo(batalla.jugador)
+    devolver_equipo(batalla.rival)
+    return resultado
+
+
+def _batallas_aleatorias(n, semilla, probabilidad_cambio):
+    rng = random.Random(semilla)
+    estrategia = con_cambios(accion_aleatoria, probabilidad_cambio)
+    for _ in range(n):
+        jugador, rival = crear_rngs(rng.getrandbits(64))
+        yield BatallaEquipos(
+            crear_equipo(equipo_aleatorio(rng)),
+            crear_equipo(equipo_aleatorio(rng)),
+            jugador, rival, estrategia, estrategia, registrar=False,
+        )
+
+
+async def jugar_concurrentes(batallas, pausa=0.0, max_turnos=1000):
+    """Juega todas las batallas a la vez en el event loop actual."""
+    return await asyncio.gather(*(b.jugar_async(pausa, max_turnos) for b in batallas))
+
+
+# ===== Medidas de rendimiento =====
+
+def medir_planificador(n=100000, lados=2):
+    """Acciones por segundo que programa y saca el planificador, en turnos de `lados` acciones."""
+    planificador = PlanificadorTurnos()
+    rng = random.Random(0)
+    velocidades = [rng.randint(1, 150) for _ in range(1024)]
+    accion = (ATACAR, 0)
+    inicio = time.perf_counter()
+    for turno in range(n // lados):
+        for lado in range(lados):
+            planificador.programar(lado, accion, velocidades[(turno + lado) & 1023], lado)
+        while planificador:
+            planificador.siguiente()
+    return (n // lados * lados) / (time.perf_counter() - inicio)
+
+
+def medir_batallas_equipos(n=1000, semilla=0, probabilidad_cambio=0.1):
+    """(batallas por segundo, turnos por segundo) de 6v6 sin interfaz."""
+    batallas = list(_batallas_aleatorias(n, semilla, probabilidad_cambio))
+    inicio = time.perf_counter()
+    turnos = sum(b.jugar().turnos for b in batallas)
+    segundos = time.perf_counter() - inicio
+    return n / segundos, turnos / segundos
+
+
+def prueba_concurrencia(n_batallas=5000, pausa=0.01, semilla=0, probabilidad_cambio=0.1):
+    """Juega n batallas a la vez en un solo event loop, con una pausa entre turnos.
+
+    Devuelve un diccionario con los segundos reales, los que tardarían las
+    pausas en serie, turnos por segundo e hilos vivos durante la prueba.
+    """
+    batallas = list(_batallas_aleatorias(n_batallas, semilla, probabilidad_cambio))
+    hilos = []
+
+    async def principal():
+        tarea = asyncio.ensure_future(jugar_concurrentes(batallas, pausa))
+        await asyncio.sleep(0)
+        hilos.append(threading.active_count())
+        return await tarea
+
+    inicio = time.perf_counter()
+    resultados = asyncio.run(principal())
+    real = time.perf_counter() - inicio
+    turnos = sum(r.turnos for r in resultados)
+    return {
+        "batallas": n_batallas,
+        "segundos": real,
+        "segundos_en_serie": turnos * pausa,
+        "turnos_por_segundo": turnos / real,
+        "hilos": hilos[0],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batallas", type=int, default=2000,
+                        help="batallas 6v6 seguidas, sin pausas")
+    parser.add_argument("--concurrentes", type=int, default=5000,
+                        help="batallas a la vez en un solo event loop")
+    parser.add_argument("--pausa", type=float, default=0.01,
+                        help="segundos entre turnos en la prueba concurrente")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Planificador: {medir_planificador():,.0f} acciones/s")
+    por_segundo, turnos = medir_batallas_equipos(args.batallas, args.semilla)
+    print(f"6v6 en serie: {por_segundo:,.0f} batallas/s ({turnos:,.0f} turnos/s)")
+    carga = prueba_concurrencia(args.concurrentes, args.pausa, args.semilla)
+    print(f"{carga['batallas']} batallas a la vez: {carga['segundos']:.2f} s "
+          f"(en serie las pausas sumarían {carga['segundos_en_serie']:,.0f} s), "
+          f"{carga['turnos_por_segundo']:,.0f} turnos/s con {carga['hilos']} hilo(s)")
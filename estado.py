@@ -0,0 +1,257 @@
+"""Instantáneas del estado de una sesión para reanudarla en cualquier proceso.
+
+Una instantánea guarda lo mínimo para reconstruir la partida: ids de especie
+del catálogo, HP actual, turno y el estado de los generadores aleatorios. El
+estado de un Mersenne Twister ocupa 2,5 KB, así que los generadores de la
+sesión son `RngRegistrado`: se guardan como su semilla más la lista de
+extracciones hechas (un entero de 2 bytes por extracción), y al restaurar se
+repiten esas extracciones. Una batalla típica ocupa menos de 100 bytes, lo
+bastante poco para escribirla después de cada turno.
+
+Los almacenes guardan instantáneas por clave de sesión: `AlmacenMemoria` para
+un solo proceso y `AlmacenSQLite` para compartirlas entre procesos.
+
+    python estado.py
+"""
+import random
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+
+VERSION = 1
+_CABECERA = struct.Struct("<BBQIH")
+_BATALLA = struct.Struct("<IIHHBHQQ")
+_TEXTO = struct.Struct("<H")
+_EXTRACCIONES = struct.Struct("<I")
+
+
+class RngRegistrado(random.Random):
+    """Random que anota cada extracción para poder reconstruir su estado exacto.
+
+    Todos los métodos de `random.Random` acaban en `random()` o en
+    `getrandbits(k)`; se anota 0 para el primero y k para el segundo.
+    """
+
+    def __init__(self, semilla):
+        self.semilla_inicial = semilla
+        self.extracciones = array("H")
+        super().__init__(semilla)
+
+    def random(self):
+        self.extracciones.append(0)
+        return super().random()
+
+    def getrandbits(self, k):
+        if k > 0xFFFF:
+            raise ValueError("getrandbits admite como mucho 65535 bits aquí")
+        self.extracciones.append(k)
+        return super().getrandbits(k)
+
+    @classmethod
+    def reconstruir(cls, semilla, extracciones):
+        rng = cls(semilla)
+        for k in extracciones:
+            if k == 0:
+                rng.random()
+            else:
+                rng.getrandbits(k)
+        return rng
+
+
+def _empaquetar_rng(rng):
+    extracciones = array("H", rng.extracciones)
+    if sys.byteorder == "big":
+        extracciones.byteswap()
+    return _EXTRACCIONES.pack(len(extracciones)) + extracciones.tobytes()
+
+
+def _desempaquetar_rng(semilla, datos, desplazamiento):
+    (n,) = _EXTRACCIONES.unpack_from(datos, desplazamiento)
+    desplazamiento += _EXTRACCIONES.size
+    extracciones = array("H")
+    extracciones.frombytes(datos[desplazamiento:desplazamiento + 2 * n])
+    if sys.byteorder == "big":
+        extracciones.byteswap()
+    return RngRegistrado.reconstruir(semilla, extracciones), desplazamiento + 2 * n
+
+
+def serializar_sesion(sesion):
+    """Bytes con el estado de la sesión y, si la hay, de su batalla en curso."""
+    from pokemon import CATALOGO
+
+    batalla = sesion.flujo.batalla if sesion.flujo is not None else None
+    nombre = (sesion.nombre_jugador or "").encode("utf-8")
+    partes = [
+        _CABECERA.pack(VERSION, batalla is not None, sesion.rng.semilla_inicial,
+                       sesion.turnos, len(nombre)),
+        nombre,
+        _empaquetar_rng(sesion.rng),
+    ]
+    if batalla is not None:
+        jugador, rival = batalla.pokemon
+        rng_jugador, rng_rival = batalla.rngs
+        partes.append(_BATALLA.pack(
+            CATALOGO.id_especie(jugador.nombre), CATALOGO.id_especie(rival.nombre),
+            jugador.hp_actual, rival.hp_actual, batalla.turno, batalla.turnos,
+            rng_jugador.semilla_inicial, rng_rival.semilla_inicial,
+        ))
+        partes.append(_empaquetar_rng(rng_jugador))
+        partes.append(_empaquetar_rng(rng_rival))
+    return b"".join(partes)
+
+
+def restaurar_sesion(datos, sesion):
+    """Carga en `sesion` el estado guardado con `serializar_sesion`.
+
+    Devuelve la `motor.Batalla` en curso reconstruida, o None si no había; la
+    interfaz decide cómo reanudarla (ver `PokemonBatallaApp.reanudar_batalla`).
+    """
+    from motor import Batalla
+    from pokemon import CATALOGO, crear_pokemon
+
+    version, hay_batalla, semilla, turnos, largo = _CABECERA.unpack_from(datos)
+    if version != VERSION:
+        raise ValueError(f"Versión de instantánea no soportada: {version}")
+    desplazamiento = _CABECERA.size
+    sesion.nombre_jugador = datos[desplazamiento:desplazamiento + largo].decode("utf-8") or None
+    desplazamiento += largo
+    sesion.rng, desplazamiento = _desempaquetar_rng(semilla, datos, desplazamiento)
+    sesion.turnos = turnos
+    if not hay_batalla:
+        return None
+
+    (id_jugador, id_rival, hp_jugador, hp_rival, turno, turnos_batalla,
+     semilla_jugador, semilla_rival) = _BATALLA.unpack_from(datos, desplazamiento)
+    desplazamiento += _BATALLA.size
+    rng_jugador, desplazamiento = _desempaquetar_rng(semilla_jugador, datos, desplazamiento)
+    rng_rival, desplazamiento = _desempaquetar_rng(semilla_rival, datos, desplazamiento)
+
+    sesion.liberar()
+    sesion.jugador_pokemon = crear_pokemon(CATALOGO.especie_por_id(id_jugador))
+    sesion.rival_pokemon = crear_pokemon(CATALOGO.especie_por_id(id_rival))
+    sesion.jugador_pokemon.hp_actual = hp_jugador
+    sesion.rival_pokemon.hp_actual = hp_rival
+    batalla = Batalla(sesion.jugador_pokemon, sesion.rival_pokemon,
+                      rng_jugador, rng_rival, registrar=False)
+    batalla.turno = turno
+    batalla.turnos = turnos_batalla
+    return batalla
+
+
+class AlmacenMemoria:
+    def __init__(self):
+        self._datos = {}
+
+    def guardar(self, clave, datos):
+        self._datos[clave] = bytes(datos)
+
+    def cargar(self, clave):
+        return self._datos.get(clave)
+
+    def borrar(self, clave):
+        self._datos.pop(clave, None)
+
+
+class AlmacenSQLite:
+    """Almacén compartible entre procesos; usa WAL para que escribir no bloquee lecturas."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        # Tras un corte se puede perder el último turno, pero no se corrompe nada
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS estados ("
+            "clave TEXT PRIMARY KEY, datos BLOB NOT NULL, actualizado REAL NOT NULL)")
+        self._lock = threading.Lock()
+
+    def guardar(self, clave, datos):
+        with self._lock:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO estados VALUES (?, ?, ?)", (clave, datos, time.time()))
+
+    def cargar(self, clave):
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT datos FROM estados WHERE clave = ?", (clave,)).fetchone()
+        return None if fila is None else bytes(fila[0])
+
+    def borrar(self, clave):
+        with self._lock:
+            self._conexion.execute("DELETE FROM estados WHERE clave = ?", (clave,))
+
+    def purgar(self, antiguedad):
+        """Borra las instantáneas sin actualizar en `antiguedad` segundos."""
+        with self._lock:
+            return self._conexion.execute(
+                "DELETE FROM estados WHERE actualizado < ?", (time.time() - antiguedad,)).rowcount
+
+    def cerrar(self):
+        self._conexion.close()
+
+
+def medir_instantaneas(turnos=10, repeticiones=2000, ruta_sqlite=None):
+    """Tamaño de una instantánea tras `turnos` turnos y tiempos medios en µs.
+
+    Devuelve un diccionario con bytes, serializar, restaurar y guardar en
+    cada almacén.
+    """
+    import os
+    import tempfile
+
+    from flujo_batalla import FlujoBatalla
+    from motor import Batalla
+    from pokemon import CATALOGO, crear_pokemon
+    from sesiones import Sesion
+
+    nombres = list(CATALOGO)
+    sesion = Sesion(semilla=1)
+    sesion.nombre_jugador = "Ash"
+    sesion.jugador_pokemon = crear_pokemon(sesion.rng.choice(nombres))
+    sesion.rival_pokemon = crear_pokemon(sesion.rng.choice(nombres))
+    batalla = Batalla(sesion.jugador_pokemon, sesion.rival_pokemon, *sesion.crear_rngs(),
+                      registrar=False)
+    sesion.flujo = FlujoBatalla(batalla, None, None, None)
+    for _ in range(turnos):
+        if batalla.terminada():
+            break
+        batalla.jugar_turno()
+
+    def cronometrar(funcion):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+    datos = serializar_sesion(sesion)
+    resultado = {
+        "turnos": batalla.turnos,
+        "bytes": len(datos),
+        "serializar_us": cronometrar(lambda: serializar_sesion(sesion)),
+        "restaurar_us": cronometrar(lambda: restaurar_sesion(datos, Sesion(semilla=0))),
+    }
+    memoria = AlmacenMemoria()
+    resultado["guardar_memoria_us"] = cronometrar(lambda: memoria.guardar("s", datos))
+
+    directorio = None
+    if ruta_sqlite is None:
+        directorio = tempfile.mkdtemp()
+        ruta_sqlite = os.path.join(directorio, "estados.sqlite")
+    sqlite = AlmacenSQLite(ruta_sqlite)
+    resultado["guardar_sqlite_us"] = cronometrar(lambda: sqlite.guardar("s", datos))
+    resultado["cargar_sqlite_us"] = cronometrar(lambda: sqlite.cargar("s"))
+    sqlite.cerrar()
+    if directorio is not None:
+        for nombre in os.listdir(directorio):
+            os.remove(os.path.join(directorio, nombre))
+        os.rmdir(directorio)
+    return resultado
+
+
+if __name__ == "__main__":
+    for clave, valor in medir_instantaneas().items():
+        print(f"{clave:<20} {valor:10.2f}" if isinstance(valor, float) else f"{clave:<20} {valor:>7}")
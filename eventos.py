@@ -0,0 +1,276 @@
+"""Registro binario de eventos de batalla.
+
+Cada evento (ataque, Pokémon debilitado, fin de batalla) ocupa un registro de
+ancho fijo de 22 bytes, escrito a través de un búfer que se vuelca al
+archivo en bloques. El archivo solo crece por el final.
+
+La lectura usa `numpy.memmap`: los bloques se recorren como vistas de un
+arreglo estructurado, sin cargar el archivo entero en memoria ni convertir
+cada evento en objetos de Python, de modo que las agregaciones funcionan con
+archivos mayores que la RAM.
+
+Formato: cabecera (b"PKEV", versión, tamaño de registro, longitud del JSON
+con los nombres de especie, primer id de batalla libre, JSON) seguida de los
+registros. El id libre se reescribe en su sitio antes de cada volcado, para
+continuar un archivo sin recorrerlo. Los de la versión 1, que no lo tienen,
+se pueden leer pero no ampliar.
+
+Lo escriben la interfaz (`python interfaz.py --eventos RUTA`) y las
+simulaciones de `motor.simular_batallas` con `al_evento=escritor.oyente()`:
+
+    python eventos.py simular eventos.bin --batallas 1000
+    python eventos.py resumen eventos.bin
+"""
+import argparse
+import json
+import os
+import random
+import struct
+
+import numpy as np
+
+from motor import EVENTO_ATAQUE, EVENTO_DEBILITADO, EVENTO_FIN, simular_batallas
+from pokemon import CATALOGO
+
+MAGIA = b"PKEV"
+VERSION = 2
+_CABECERA = struct.Struct("<4sHHI")
+# Desde la versión 2, justo después de _CABECERA
+_SIGUIENTE_ID = struct.Struct("<I")
+_REGISTRO = struct.Struct("<IHBBHHBxHHf")
+
+DTYPE_EVENTO = np.dtype([
+    ("batalla", "<u4"),
+    ("turno", "<u2"),
+    ("evento", "u1"),
+    ("lado", "u1"),
+    ("atacante", "<u2"),
+    ("defensor", "<u2"),
+    ("ataque", "u1"),
+    ("relleno", "u1"),
+    ("dano", "<u2"),
+    ("hp_despues", "<u2"),
+    ("multiplicador", "<f4"),
+])
+assert DTYPE_EVENTO.itemsize == _REGISTRO.size
+
+
+class EscritorEventos:
+    """Escritor con búfer; se usa como gestor de contexto."""
+
+    def __init__(self, ruta, nombres=None, tamano_bufer=1 << 16):
+        self.ruta = ruta
+        self.tamano_bufer = tamano_bufer
+        self._bufer = bytearray()
+        self.eventos_escritos = 0
+        # Primer id de batalla sin usar en el archivo
+        self.siguiente_id = 0
+
+        if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            # Se continúa un archivo existente con su misma tabla de especies
+            lector = LectorEventos(ruta)
+            if lector.version != VERSION:
+                raise ValueError(f"{ruta} es de la versión {lector.version} del formato; "
+                                 f"solo se puede ampliar la {VERSION}")
+            self.nombres = lector.nombres
+            self.siguiente_id = lector.siguiente_id
+        else:
+            self.nombres = list(nombres or CATALOGO)
+            nombres_json = json.dumps(self.nombres, ensure_ascii=False).encode("utf-8")
+            with open(ruta, "wb") as f:
+                f.write(_CABECERA.pack(MAGIA, VERSION, _REGISTRO.size, len(nombres_json)))
+                f.write(_SIGUIENTE_ID.pack(0))
+                f.write(nombres_json)
+        self._ids = {nombre: i for i, nombre in enumerate(self.nombres)}
+        # El id guardado en la cabecera; se reescribe si cambia
+        self._id_en_cabecera = self.siguiente_id
+        self._archivo = open(ruta, "r+b")
+        self._archivo.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def oyente(self, id_batalla=None):
+        """Callback `al_evento` para motor.Batalla.
+
+        Sin `id_batalla`, cada batalla distinta que lo use recibe el siguiente
+        id libre, así que sirve para una serie de batallas seguidas.
+        """
+        automatico = id_batalla is None
+        ultima = None
+
+        def al_evento(tipo, batalla, lado, indice_ataque, dano, multiplicador):
+            nonlocal ultima, id_batalla
+            if automatico and batalla is not ultima:
+                ultima = batalla
+                id_batalla = self.siguiente_id
+            atacante = batalla.pokemon[lado]
+            defensor = batalla.pokemon[1 - lado]
+            if tipo == EVENTO_DEBILITADO:
+                # En este evento `lado` es el del Pokémon debilitado
+                atacante, defensor = defensor, atacante
+            self.escribir(id_batalla, batalla.turnos, tipo, lado,
+                          atacante.nombre, defensor.nombre,
+                          indice_ataque, dano, defensor.hp_actual, multiplicador)
+        return al_evento
+
+    def escribir(self, id_batalla, turno, tipo, lado, atacante, defensor,
+                 indice_ataque, dano, hp_despues, multiplicador):
+        try:
+            atacante_id, defensor_id = self._ids[atacante], self._ids[defensor]
+        except KeyError as error:
+            raise ValueError(f"{error.args[0]} no está en la tabla de especies "
+                             f"de {self.ruta}") from None
+        self._bufer += _REGISTRO.pack(
+            id_batalla, turno, tipo, lado, atacante_id, defensor_id,
+            indice_ataque, dano, hp_despues, multiplicador,
+        )
+        self.eventos_escritos += 1
+        if id_batalla >= self.siguiente_id:
+            self.siguiente_id = id_batalla + 1
+        if len(self._bufer) >= self.tamano_bufer:
+            self.vaciar()
+
+    def vaciar(self):
+        if self._id_en_cabecera != self.siguiente_id:
+            # Antes que los registros: si algo falla entre medias, como mucho
+            # quedan ids sin usar, nunca ids repetidos
+            self._archivo.seek(_CABECERA.size)
+            self._archivo.write(_SIGUIENTE_ID.pack(self.siguiente_id))
+            self._archivo.seek(0, os.SEEK_END)
+            self._id_en_cabecera = self.siguiente_id
+        if self._bufer:
+            self._archivo.write(self._bufer)
+            self._bufer.clear()
+        self._archivo.flush()
+
+    def cerrar(self):
+        if not self._archivo.closed:
+            self.vaciar()
+            self._archivo.close()
+
+
+class LectorEventos:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, "rb") as f:
+            magia, version, tamano, largo = _CABECERA.unpack(f.read(_CABECERA.size))
+            if magia != MAGIA or tamano != DTYPE_EVENTO.itemsize:
+                raise ValueError(f"{ruta} no es un registro de eventos válido")
+            self.version = version
+            # Primer id de batalla libre; None si el archivo no lo guarda
+            self.siguiente_id = None
+            extra = 0
+            if version >= 2:
+                self.siguiente_id, = _SIGUIENTE_ID.unpack(f.read(_SIGUIENTE_ID.size))
+                extra = _SIGUIENTE_ID.size
+            self.nombres = json.loads(f.read(largo).decode("utf-8"))
+        self.inicio_datos = _CABECERA.size + extra + largo
+
+    def __len__(self):
+        return (os.path.getsize(self.ruta) - self.inicio_datos) // DTYPE_EVENTO.itemsize
+
+    def bloques(self, tamano=1 << 20):
+        """Recorre los eventos en bloques de `tamano` como arreglos estructurados.
+
+        Cada bloque es una vista sobre el archivo mapeado en memoria; solo se
+        leen del disco las páginas que se tocan.
+        """
+        total = len(self)
+        if total == 0:
+            return
+        eventos = np.memmap(self.ruta, dtype=DTYPE_EVENTO, mode="r",
+                            offset=self.inicio_datos, shape=(total,))
+        for inicio in range(0, total, tamano):
+            yield eventos[inicio:inicio + tamano]
+
+    def __iter__(self):
+        """Eventos como tuplas, para quien necesite recorrerlos uno a uno."""
+        for bloque in self.bloques():
+            yield from bloque.tolist()
+
+
+def estadisticas_ataques(lector, tamano_bloque=1 << 20):
+    """Usos, daño total y daño medio por (especie atacante, índice de ataque).
+
+    Todo se acumula con `np.bincount` por bloque.
+    """
+    n_especies = len(lector.nombres)
+    n_ataques = 256
+    usos = np.zeros(n_especies * n_ataques, dtype=np.int64)
+    dano = np.zeros(n_especies * n_ataques, dtype=np.int64)
+    for bloque in lector.bloques(tamano_bloque):
+        ataques = bloque[bloque["evento"] == EVENTO_ATAQUE]
+        clave = ataques["atacante"].astype(np.int64) * n_ataques + ataques["ataque"]
+        usos += np.bincount(clave, minlength=usos.size)
+        dano += np.bincount(clave, weights=ataques["dano"], minlength=dano.size).astype(np.int64)
+
+    resultado = {}
+    for clave in np.flatnonzero(usos):
+        especie, ataque = divmod(int(clave), n_ataques)
+        resultado[(lector.nombres[especie], ataque)] = {
+            "usos": int(usos[clave]),
+            "dano_total": int(dano[clave]),
+            "dano_medio": float(dano[clave] / usos[clave]),
+        }
+    return resultado
+
+
+def estadisticas_victorias(lector, tamano_bloque=1 << 20):
+    """Batallas, victorias y tasa de victoria por especie a partir de los eventos de fin."""
+    n_especies = len(lector.nombres)
+    victorias = np.zeros(n_especies, dtype=np.int64)
+    derrotas = np.zeros(n_especies, dtype=np.int64)
+    for bloque in lector.bloques(tamano_bloque):
+        fines = bloque[bloque["evento"] == EVENTO_FIN]
+        victorias += np.bincount(fines["atacante"], minlength=n_especies)
+        derrotas += np.bincount(fines["defensor"], minlength=n_especies)
+
+    resultado = {}
+    for i, nombre in enumerate(lector.nombres):
+        batallas = int(victorias[i] + derrotas[i])
+        if batallas:
+            resultado[nombre] = {
+                "batallas": batallas,
+                "victorias": int(victorias[i]),
+                "tasa_victoria": float(victorias[i] / batallas),
+            }
+    return resultado
+
+
+def simular(escritor, batallas, semilla=0, nombres=None):
+    """Simula `batallas` batallas por cada par de especies y registra sus eventos."""
+    nombres = list(nombres or escritor.nombres)
+    semillas = random.Random(semilla)
+    al_evento = escritor.oyente()
+    for a in nombres:
+        for b in nombres:
+            simular_batallas(a, b, batallas, semillas.getrandbits(64), al_evento=al_evento)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    modos = parser.add_subparsers(dest="modo", required=True)
+    generar = modos.add_parser("simular", help="añade batallas simuladas al registro")
+    generar.add_argument("ruta")
+    generar.add_argument("--batallas", type=int, default=1000, help="batallas por par de especies")
+    generar.add_argument("--semilla", type=int, default=0)
+    resumen = modos.add_parser("resumen", help="victorias y uso de ataques del registro")
+    resumen.add_argument("ruta")
+    args = parser.parse_args()
+
+    if args.modo == "simular":
+        with EscritorEventos(args.ruta) as escritor:
+            simular(escritor, args.batallas, args.semilla)
+        print(f"{escritor.eventos_escritos} eventos añadidos a {args.ruta}")
+    else:
+        lector = LectorEventos(args.ruta)
+        print(f"{len(lector)} eventos")
+        for nombre, fila in estadisticas_victorias(lector).items():
+            print(f"  {nombre:<20} {fila['batallas']:>9} batallas  {fila['tasa_victoria']:6.1%}")
+        for (nombre, ataque), fila in sorted(estadisticas_ataques(lector).items()):
+            print(f"  {nombre:<20} ataque {ataque}  {fila['usos']:>9} usos  "
+                  f"{fila['dano_medio']:6.1f} de daño medio")
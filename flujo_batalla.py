@@ -0,0 +1,133 @@
+"""Flujo de turnos asíncrono para la interfaz.
+
+`FlujoBatalla` recorre un turno completo (ataque del jugador, pausa, ataque
+del rival, pausa) como una máquina de estados sobre `motor.Batalla`. Las
+pausas usan `asyncio.sleep`, de modo que un manejador de Flet que espera el
+turno no bloquea el hilo ni a las demás sesiones. Las pausas se pueden saltar,
+el turno se puede cancelar y el modo rápido las elimina.
+
+Ejecutar `python flujo_batalla.py` lanza una prueba de carga con sesiones
+simuladas concurrentes.
+"""
+import asyncio
+import time
+
+from motor import JUGADOR, RIVAL, Batalla
+
+ESPERANDO = "esperando"
+ATAQUE_JUGADOR = "ataque_jugador"
+ATAQUE_RIVAL = "ataque_rival"
+TERMINADA = "terminada"
+CANCELADA = "cancelada"
+
+
+class FlujoBatalla:
+    def __init__(self, batalla, al_atacar, al_terminar, al_esperar,
+                 pausa=2.0, modo_rapido=False):
+        self.batalla = batalla
+        # al_atacar(lado, ataque, dano, efectividad); al_terminar(ganador); al_esperar()
+        self.al_atacar = al_atacar
+        self.al_terminar = al_terminar
+        self.al_esperar = al_esperar
+        self.pausa = pausa
+        self.modo_rapido = modo_rapido
+        self.estado = ESPERANDO
+        self._saltar = asyncio.Event()
+        self._tarea = None
+
+    async def turno(self, ataque):
+        """Juega el ataque del jugador y la respuesta del rival.
+
+        Devuelve False si no era el momento de atacar (p. ej. doble clic).
+        """
+        if self.estado != ESPERANDO:
+            return False
+        self._tarea = asyncio.current_task()
+        try:
+            self.estado = ATAQUE_JUGADOR
+            dano, efectividad = self.batalla.ejecutar_ataque(ataque)
+            self.al_atacar(JUGADOR, ataque, dano, efectividad)
+            await self._esperar()
+            if self.batalla.terminada():
+                return self._terminar()
+
+            self.estado = ATAQUE_RIVAL
+            ataque_rival, dano, efectividad = self.batalla.jugar_turno()
+            self.al_atacar(RIVAL, ataque_rival, dano, efectividad)
+            await self._esperar()
+            if self.batalla.terminada():
+                return self._terminar()
+
+            self.estado = ESPERANDO
+            self.al_esperar()
+            return True
+        except asyncio.CancelledError:
+            self.estado = CANCELADA
+            raise
+        finally:
+            self._tarea = None
+
+    def saltar(self):
+        """Termina la pausa en curso, si la hay."""
+        self._saltar.set()
+
+    def cancelar(self):
+        """Cancela el turno en curso (p. ej. al salir de la pantalla)."""
+        if self._tarea is not None:
+            self._tarea.cancel()
+        else:
+            self.estado = CANCELADA
+
+    def _terminar(self):
+        self.estado = TERMINADA
+        self.al_terminar(self.batalla.ganador())
+        return True
+
+    async def _esperar(self):
+        if self.modo_rapido or self.pausa <= 0:
+            return
+        self._saltar.clear()
+        try:
+            await asyncio.wait_for(self._saltar.wait(), self.pausa)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _sesion_simulada(jugador, rival, pausa, max_turnos):
+    fin = asyncio.Event()
+    flujo = FlujoBatalla(
+        Batalla(jugador, rival, registrar=False),
+        al_atacar=lambda lado, ataque, dano, efectividad: None,
+        al_terminar=lambda ganador: fin.set(),
+        al_esperar=lambda: None,
+        pausa=pausa,
+    )
+    turnos = 0
+    while not fin.is_set() and turnos < max_turnos:
+        await flujo.turno(jugador.ataques[0])
+        turnos += 1
+    return turnos
+
+
+async def prueba_carga(n_sesiones=200, pausa=0.05, max_turnos=3):
+    """Lanza n sesiones a la vez y compara el tiempo con el de hacerlas en serie.
+
+    Devuelve (segundos reales, segundos si las pausas se ejecutaran en serie).
+    """
+    from pokemon import crear_pokemon
+
+    inicio = time.perf_counter()
+    turnos = await asyncio.gather(*(
+        _sesion_simulada(crear_pokemon("Bulbasaur"), crear_pokemon("Charmander"),
+                         pausa, max_turnos)
+        for _ in range(n_sesiones)
+    ))
+    real = time.perf_counter() - inicio
+    # Cada turno completo hace como máximo dos pausas
+    en_serie = sum(turnos) * 2 * pausa
+    return real, en_serie
+
+
+if __name__ == "__main__":
+    real, en_serie = asyncio.run(prueba_carga())
+    print(f"200 sesiones: {real:.2f} s (en serie serían ~{en_serie:.1f} s)")
@@ -0,0 +1,329 @@
+"""Estrategias para el rival, intercambiables.
+
+Todas se usan como las de motor: `estrategia(atacante, defensor, rng)`
+devuelve el `Ataque` elegido, así que sirven para `motor.Batalla`, para la
+interfaz y, con `equipos.desde_estrategia_individual`, para combates por
+equipos.
+
+- `IAVoraz`: el ataque que más daño hace ahora, teniendo en cuenta los tipos.
+- `IAAnticipacion`: expectiminimax con profundidad limitada y, opcionalmente,
+  un presupuesto de tiempo (profundización iterativa); supone que el otro
+  lado elige al azar, como el resolvedor.
+- `IATabla`: consulta una `resolvedor.TablaPolitica`; para los pares que no
+  están en la tabla recurre a otra estrategia.
+
+La decisión se memoiza por (especie atacante, especie defensora, cubeta de
+HP de cada uno): se calcula con el HP representativo de cada cubeta, de modo
+que el resultado solo depende de la clave. Una instancia se puede compartir
+entre todas las batallas del proceso; con la caché caliente una decisión es
+una consulta a un diccionario. Con presupuesto de tiempo la profundidad
+alcanzada depende de la máquina y la elección deja de ser reproducible.
+
+    python ia.py --batallas 300
+"""
+import argparse
+import random
+import time
+from abc import ABC, abstractmethod
+
+from motor import ataque_aleatorio, simular_batallas
+from pokemon import CATALOGO, crear_pokemon
+from resolvedor import ALEATORIA, OPTIMO, modelo_rival
+
+
+class _SinTiempo(Exception):
+    pass
+
+
+class EstrategiaIA(ABC):
+    """Base con la caché de decisiones; las subclases implementan `_evaluar`."""
+
+    nombre = None
+
+    def __init__(self, cubetas=16, max_entradas=1 << 20):
+        if cubetas < 1:
+            raise ValueError(f"Hace falta al menos una cubeta de HP, no {cubetas}")
+        self.cubetas = cubetas
+        self.max_entradas = max_entradas
+        self._cache = {}
+        self.aciertos = 0
+        self.fallos = 0
+
+    def __call__(self, atacante, defensor, rng):
+        cubetas = self.cubetas
+        clave = (atacante.nombre, defensor.nombre,
+                 -(-atacante.hp_actual * cubetas // atacante.hp_max),
+                 -(-defensor.hp_actual * cubetas // defensor.hp_max))
+        indice = self._cache.get(clave)
+        if indice is None:
+            self.fallos += 1
+            indice = self._evaluar(atacante, defensor,
+                                   self._representativo(atacante.hp_max, clave[2]),
+                                   self._representativo(defensor.hp_max, clave[3]))
+            if len(self._cache) >= self.max_entradas:
+                self._cache.clear()
+            self._cache[clave] = indice
+        else:
+            self.aciertos += 1
+        return atacante.ataques[indice]
+
+    def _representativo(self, hp_max, cubeta):
+        # El HP más alto de la cubeta: la cubeta llena es exactamente hp_max
+        return -(-cubeta * hp_max // self.cubetas)
+
+    @abstractmethod
+    def _evaluar(self, atacante, defensor, hp_atacante, hp_defensor):
+        """Índice del ataque elegido con esos HP."""
+
+    def opciones(self):
+        """Argumentos de `crear_estrategia` que reconstruyen esta estrategia."""
+        return {"cubetas": self.cubetas}
+
+    def invalidar(self):
+        """Vacía la caché (p. ej. tras cambiar los datos de las especies)."""
+        self._cache.clear()
+
+    def estadisticas(self):
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self._cache)}
+
+
+class IAVoraz(EstrategiaIA):
+    nombre = "voraz"
+
+    def _evaluar(self, atacante, defensor, hp_atacante, hp_defensor):
+        mejor, elegido = None, 0
+        for i, ataque in enumerate(atacante.ataques):
+            dano = atacante.calcular_dano(ataque, defensor)[0]
+            # El daño que sobra tras debilitar no cuenta; ante empate, el más fuerte
+            puntos = (min(dano, hp_defensor), dano)
+            if mejor is None or puntos > mejor:
+                mejor, elegido = puntos, i
+        return elegido
+
+
+class IAAnticipacion(EstrategiaIA):
+    """Expectiminimax hasta `profundidad` ataques (de ambos lados).
+
+    Con `presupuesto` (segundos) se profundiza de uno en uno y se usa la
+    última profundidad completada a tiempo; la primera siempre se completa.
+    Las hojas se valoran por la diferencia de HP relativo.
+    """
+
+    nombre = "anticipacion"
+
+    def __init__(self, profundidad=4, presupuesto=None, oponente=ALEATORIA, cubetas=16,
+                 max_entradas=1 << 20):
+        if profundidad < 1:
+            raise ValueError(f"La profundidad mínima es 1, no {profundidad}")
+        oponente = modelo_rival(oponente)
+        super().__init__(cubetas, max_entradas)
+        self.profundidad = profundidad
+        self.presupuesto = presupuesto
+        self.oponente = oponente
+        self.nodos = 0
+
+    def opciones(self):
+        if self.presupuesto is not None:
+            raise ValueError("Con presupuesto de tiempo la estrategia no es reproducible")
+        return {"profundidad": self.profundidad, "oponente": self.oponente,
+                "cubetas": self.cubetas}
+
+    def _evaluar(self, atacante, defensor, hp_atacante, hp_defensor):
+        danos_propios = [atacante.calcular_dano(a, defensor)[0] for a in atacante.ataques]
+        danos_rivales = [defensor.calcular_dano(a, atacante)[0] for a in defensor.ataques]
+        limite = None if self.presupuesto is None else time.perf_counter() + self.presupuesto
+        elegido = 0
+        for profundidad in range(1, self.profundidad + 1):
+            try:
+                elegido = self._raiz(danos_propios, danos_rivales, hp_atacante, hp_defensor,
+                                     atacante.hp_max, defensor.hp_max, profundidad,
+                                     limite if profundidad > 1 else None)
+            except _SinTiempo:
+                break
+        return elegido
+
+    def _raiz(self, danos_propios, danos_rivales, hp_propio, hp_rival, max_propio, max_rival,
+              profundidad, limite):
+        memo = {}
+        aleatorio = self.oponente == ALEATORIA
+
+        def valor(hp_p, hp_r, restante, mueve_propio):
+            if hp_r <= 0:
+                return 1.0
+            if hp_p <= 0:
+                return 0.0
+            if restante == 0:
+                return 0.5 + (hp_p / max_propio - hp_r / max_rival) / 2
+            clave = (hp_p, hp_r, restante, mueve_propio)
+            guardado = memo.get(clave)
+            if guardado is not None:
+                return guardado
+            self.nodos += 1
+            if limite is not None and time.perf_counter() > limite:
+                raise _SinTiempo
+            if mueve_propio:
+                resultado = max(valor(hp_p, hp_r - d, restante - 1, False) for d in danos_propios)
+            else:
+                valores = [valor(hp_p - d, hp_r, restante - 1, True) for d in danos_rivales]
+                resultado = sum(valores) / len(valores) if aleatorio else min(valores)
+            memo[clave] = resultado
+            return resultado
+
+        mejor, elegido = None, 0
+        for i, dano in enumerate(danos_propios):
+            # Ante empate, el ataque que más daña
+            puntos = (valor(hp_propio, hp_rival - dano, profundidad - 1, False), dano)
+            if mejor is None or puntos > mejor:
+                mejor, elegido = puntos, i
+        return elegido
+
+
+class IATabla(EstrategiaIA):
+    """Juega según una `TablaPolitica`; fuera de la tabla usa `respaldo`.
+
+    La tabla ya responde en O(1) con el HP exacto, así que no pasa por la caché.
+    """
+
+    nombre = "tabla"
+
+    def __init__(self, tabla, respaldo=None, ruta=None):
+        super().__init__()
+        self.tabla = tabla
+        self.respaldo = respaldo or IAVoraz()
+        self.ruta = ruta
+
+    @classmethod
+    def cargar(cls, ruta, respaldo=None):
+        from resolvedor import TablaPolitica
+
+        return cls(TablaPolitica.cargar(ruta), respaldo, ruta)
+
+    def opciones(self):
+        if type(self.respaldo) is not IAVoraz:
+            raise ValueError("Solo se puede describir una tabla con el respaldo por defecto")
+        return {"ruta": self.ruta} if self.ruta else {}
+
+    @classmethod
+    def resolver(cls, nombres=None, respaldo=None):
+        """Resuelve en el momento los pares de `nombres` (por defecto, todo el catálogo)."""
+        from resolvedor import TablaPolitica, resolver_todos
+
+        return cls(TablaPolitica(resolver_todos(nombres, exacto=False)), respaldo)
+
+    def _evaluar(self, atacante, defensor, hp_atacante, hp_defensor):
+        """Como en la base, o None si la tabla no cubre ese estado."""
+        solucion = self.tabla.pares.get((atacante.nombre, defensor.nombre))
+        if solucion is None or hp_atacante > solucion.hp_max[0] or hp_defensor > solucion.hp_max[1]:
+            return None
+        return solucion.mejor_ataque(hp_atacante, hp_defensor)
+
+    def __call__(self, atacante, defensor, rng):
+        indice = self._evaluar(atacante, defensor, atacante.hp_actual, defensor.hp_actual)
+        if indice is None:
+            return self.respaldo(atacante, defensor, rng)
+        self.aciertos += 1
+        return atacante.ataques[indice]
+
+
+ESTRATEGIAS = (ALEATORIA, "voraz", "anticipacion", "tabla")
+
+
+def crear_estrategia(nombre, **opciones):
+    """Estrategia por nombre; `opciones` se pasan a su constructor.
+
+    Para "tabla", `ruta` indica una tabla exportada por resolvedor.py; sin
+    ella se resuelven en el momento todas las especies del catálogo.
+    """
+    if nombre == ALEATORIA:
+        return ataque_aleatorio
+    if nombre == "voraz":
+        return IAVoraz(**opciones)
+    if nombre == "anticipacion":
+        return IAAnticipacion(**opciones)
+    if nombre == "tabla":
+        ruta = opciones.pop("ruta", None)
+        if ruta:
+            return IATabla.cargar(ruta, **opciones)
+        return IATabla.resolver(**opciones)
+    raise ValueError(f"Estrategia desconocida: {nombre!r} (opciones: {', '.join(ESTRATEGIAS)})")
+
+
+def describir_estrategia(estrategia):
+    """Diccionario con el que `crear_estrategia(**descripcion)` la reconstruye.
+
+    Lanza ValueError si la estrategia no se puede reconstruir igual (p. ej.
+    una función propia o una anticipación con presupuesto de tiempo).
+    """
+    if estrategia is ataque_aleatorio:
+        return {"nombre": ALEATORIA}
+    if isinstance(estrategia, EstrategiaIA) and estrategia.nombre is not None:
+        return {"nombre": estrategia.nombre, **estrategia.opciones()}
+    raise ValueError(f"No se puede describir la estrategia {estrategia!r}")
+
+
+def medir_decisiones(estrategia, n=100000, semilla=0, nombres=None):
+    """(decisiones/s con la caché vacía, decisiones/s con la caché caliente).
+
+    Los estados son pares de especies y HP al azar; se repiten los mismos en
+    las dos pasadas.
+    """
+    rng = random.Random(semilla)
+    nombres = list(nombres or CATALOGO)
+    estados = []
+    for _ in range(n):
+        atacante = crear_pokemon(rng.choice(nombres))
+        defensor = crear_pokemon(rng.choice(nombres))
+        atacante.hp_actual = rng.randint(1, atacante.hp_max)
+        defensor.hp_actual = rng.randint(1, defensor.hp_max)
+        estados.append((atacante, defensor))
+
+    if isinstance(estrategia, EstrategiaIA):
+        estrategia.invalidar()
+    ritmos = []
+    for _ in range(2):
+        inicio = time.perf_counter()
+        for atacante, defensor in estados:
+            estrategia(atacante, defensor, rng)
+        ritmos.append(n / (time.perf_counter() - inicio))
+    return tuple(ritmos)
+
+
+def tasa_victoria(estrategia, batallas=300, semilla=0, nombres=None):
+    """Victorias del rival con `estrategia` contra un jugador que ataca al azar.
+
+    Se juegan `batallas` por cada par de especies; el jugador siempre mueve
+    primero, así que la referencia es la misma medida con el rival al azar.
+    """
+    nombres = list(nombres or CATALOGO)
+    semillas = random.Random(semilla)
+    ganadas = total = 0
+    for a in nombres:
+        for b in nombres:
+            _, derrotas, _ = simular_batallas(a, b, batallas, semillas.getrandbits(64),
+                                              estrategia_rival=estrategia)
+            ganadas += derrotas
+            total += batallas
+    return ganadas / total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batallas", type=int, default=300, help="batallas por par de especies")
+    parser.add_argument("--decisiones", type=int, default=100000)
+    parser.add_argument("--tabla", metavar="RUTA", help="tabla de resolvedor.py ya exportada")
+    parser.add_argument("--presupuesto", type=float, default=None,
+                        help="segundos por decisión para la anticipación")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    candidatas = {
+        ALEATORIA: crear_estrategia(ALEATORIA),
+        "voraz": crear_estrategia("voraz"),
+        "anticipacion": crear_estrategia("anticipacion", presupuesto=args.presupuesto),
+        "tabla": crear_estrategia("tabla", ruta=args.tabla),
+    }
+    print(f"{'estrategia':<14} {'decisiones/s (fría)':>20} {'(caliente)':>12} {'victorias':>10}")
+    for nombre, estrategia in candidatas.items():
+        frio, caliente = medir_decisiones(estrategia, args.decisiones, args.semilla)
+        victorias = tasa_victoria(estrategia, args.batallas, args.semilla)
+        print(f"{nombre:<14} {frio:>20,.0f} {caliente:>12,.0f} {victorias:>10.1%}")
@@ -0,0 +1,315 @@
+"""Instrumentación opcional: spans con nombre, contadores y perfiles plegados.
+
+Nada se mide mientras no se llame a `activar()`. Al activarla se sustituyen
+en su clase los métodos listados en `PUNTOS` por envoltorios que miden su
+tiempo; `desactivar()` devuelve los originales. Así, con la instrumentación
+apagada el código es exactamente el de siempre y el coste es cero. El
+inconveniente: los métodos ligados que se guardaron antes de activar (p. ej.
+callbacks de una app ya creada) siguen sin medirse, así que conviene activar
+al arrancar.
+
+Los puntos de la interfaz (Flet, pantallas, planificador) solo se sustituyen
+si la interfaz ya está importada o se pide con `interfaz=True`: perfilar el
+motor sin interfaz no carga Flet ni mide su importación.
+
+Cada span acumula llamadas, tiempo total y máximo. Además se guarda el tiempo
+propio de cada pila "pantalla;span;span..." en formato plegado, el que
+aceptan flamegraph.pl y speedscope. La pantalla es la última que mostró
+`mostrar_vista`; con varias sesiones a la vez es aproximada.
+
+    python interfaz.py --perfil perfil.folded --metricas metricas.prom
+    python instrumentacion.py --batallas 2000 --perfil motor.folded
+"""
+import argparse
+import functools
+import importlib
+import json
+import sys
+import threading
+import time
+
+SPAN = "span"
+CONTADOR = "contador"
+
+# (módulo, clase, método, nombre, tipo)
+PUNTOS = (
+    ("pokemon", "Pokemon", "atacar", "logica.atacar", SPAN),
+    # Incluye la consulta a la matriz de efectividades de `tipos.REGISTRO`
+    ("pokemon", "Pokemon", "calcular_dano", "logica.calcular_dano", SPAN),
+    ("motor", "Batalla", "ejecutar_ataque", "logica.ejecutar_ataque", SPAN),
+    ("interfaz", "PokemonBatallaApp", "construir_menu_principal", "construccion.menu", SPAN),
+    ("interfaz", "PokemonBatallaApp", "construir_seleccion_pokemon", "construccion.seleccion", SPAN),
+    ("interfaz", "PokemonBatallaApp", "construir_batalla", "construccion.batalla", SPAN),
+    ("interfaz", "PokemonBatallaApp", "construir_fin_batalla", "construccion.fin", SPAN),
+    ("interfaz", "PokemonBatallaApp", "crear_barra_hp", "construccion.barra_hp", SPAN),
+    ("interfaz", "PokemonBatallaApp", "iniciar_batalla", "construccion.iniciar_batalla", SPAN),
+    ("interfaz", "PokemonBatallaApp", "vincular_batalla", "construccion.vincular_batalla", SPAN),
+    ("seleccion", "CuadriculaSeleccion", "refrescar", "construccion.refrescar_seleccion", SPAN),
+    ("actualizaciones", "PlanificadorActualizaciones", "vaciar", "envio.vaciar", SPAN),
+    ("flet", "Page", "update", "envio.page_update", SPAN),
+    ("flet", "Page", "update", "updates_enviados", CONTADOR),
+    ("flet", "Control", "__init__", "controles_creados", CONTADOR),
+)
+
+_PANTALLA = ("interfaz", "PokemonBatallaApp", "mostrar_vista")
+# Puntos de PUNTOS que solo existen con la interfaz
+_MODULOS_INTERFAZ = frozenset({"interfaz", "seleccion", "actualizaciones", "flet"})
+
+
+class Instrumentacion:
+    def __init__(self, reloj=time.perf_counter_ns):
+        self.reloj = reloj
+        self.activa = False
+        self.pantalla = "inicio"
+        # nombre -> [llamadas, ns totales, ns máximo]
+        self.spans = {}
+        self.contadores = {}
+        # "pantalla;span;span" -> ns propios
+        self.plegadas = {}
+        self._originales = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pila(self):
+        pila = getattr(self._local, "pila", None)
+        if pila is None:
+            pila = self._local.pila = []
+        return pila
+
+    def contar(self, nombre, cantidad=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def _entrar(self, nombre):
+        # Marco: [nombre, inicio, ns de los spans hijos, pantalla al entrar]
+        self._pila().append([nombre, self.reloj(), 0, self.pantalla])
+
+    def _salir(self):
+        pila = self._pila()
+        nombre, inicio, hijos, pantalla = pila.pop()
+        duracion = self.reloj() - inicio
+        if pila:
+            pila[-1][2] += duracion
+            # Toda la pila cuelga de la pantalla en la que empezó el span exterior
+            pantalla = pila[0][3]
+        ruta = ";".join([pantalla, *(marco[0] for marco in pila), nombre])
+        with self._lock:
+            span = self.spans.get(nombre)
+            if span is None:
+                span = self.spans[nombre] = [0, 0, 0]
+            span[0] += 1
+            span[1] += duracion
+            if duracion > span[2]:
+                span[2] = duracion
+            self.plegadas[ruta] = self.plegadas.get(ruta, 0) + duracion - hijos
+
+    def span(self, nombre):
+        """Gestor de contexto para medir un bloque a mano."""
+        return _Span(self, nombre)
+
+    def envolver(self, funcion, nombre, tipo=SPAN):
+        instrumentacion = self
+        if tipo == CONTADOR:
+            @functools.wraps(funcion)
+            def contado(*args, **kwargs):
+                instrumentacion.contar(nombre)
+                return funcion(*args, **kwargs)
+            return contado
+
+        @functools.wraps(funcion)
+        def medido(*args, **kwargs):
+            instrumentacion._entrar(nombre)
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                instrumentacion._salir()
+        return medido
+
+    def activar(self, puntos=PUNTOS, interfaz=None):
+        """Sustituye los puntos; con `interfaz=None`, los de la interfaz solo si ya está cargada."""
+        if self.activa:
+            return
+        if interfaz is None:
+            interfaz = "interfaz" in sys.modules
+        for modulo, clase, metodo, nombre, tipo in puntos:
+            if not interfaz and modulo in _MODULOS_INTERFAZ:
+                continue
+            self._sustituir(modulo, clase, metodo, lambda f, n=nombre, t=tipo: self.envolver(f, n, t))
+        if interfaz:
+            self._sustituir(*_PANTALLA, self._envolver_pantalla)
+        self.activa = True
+
+    def desactivar(self):
+        for clase, metodo, original in reversed(self._originales):
+            setattr(clase, metodo, original)
+        self._originales.clear()
+        self.activa = False
+
+    def _sustituir(self, modulo, clase, metodo, envolver):
+        cls = getattr(importlib.import_module(modulo), clase)
+        original = cls.__dict__[metodo]
+        self._originales.append((cls, metodo, original))
+        setattr(cls, metodo, envolver(original))
+
+    def _envolver_pantalla(self, funcion):
+        instrumentacion = self
+
+        @functools.wraps(funcion)
+        def mostrar_vista(app, nombre, *args, **kwargs):
+            instrumentacion.pantalla = nombre
+            return funcion(app, nombre, *args, **kwargs)
+        return mostrar_vista
+
+    def reiniciar(self):
+        with self._lock:
+            self.spans.clear()
+            self.contadores.clear()
+            self.plegadas.clear()
+
+    def resumen(self):
+        with self._lock:
+            return {
+                "spans": {
+                    nombre: {
+                        "llamadas": llamadas,
+                        "segundos": total / 1e9,
+                        "media_us": total / llamadas / 1e3,
+                        "maximo_us": maximo / 1e3,
+                    }
+                    for nombre, (llamadas, total, maximo) in sorted(self.spans.items())
+                },
+                "contadores": dict(sorted(self.contadores.items())),
+            }
+
+    def prometheus(self):
+        resumen = self.resumen()
+        lineas = [
+            "# HELP pokemon_span_llamadas_total Llamadas a cada span instrumentado.",
+            "# TYPE pokemon_span_llamadas_total counter",
+        ]
+        lineas += [f'pokemon_span_llamadas_total{{span="{n}"}} {s["llamadas"]}'
+                   for n, s in resumen["spans"].items()]
+        lineas += [
+            "# HELP pokemon_span_segundos_total Tiempo total dentro de cada span.",
+            "# TYPE pokemon_span_segundos_total counter",
+        ]
+        lineas += [f'pokemon_span_segundos_total{{span="{n}"}} {s["segundos"]:.9f}'
+                   for n, s in resumen["spans"].items()]
+        lineas += [
+            "# HELP pokemon_span_maximo_segundos Duración máxima de una llamada.",
+            "# TYPE pokemon_span_maximo_segundos gauge",
+        ]
+        lineas += [f'pokemon_span_maximo_segundos{{span="{n}"}} {s["maximo_us"] / 1e6:.9f}'
+                   for n, s in resumen["spans"].items()]
+        for nombre, valor in resumen["contadores"].items():
+            lineas.append(f"# TYPE pokemon_{nombre}_total counter")
+            lineas.append(f"pokemon_{nombre}_total {valor}")
+        return "\n".join(lineas) + "\n"
+
+    def exportar(self, ruta):
+        """Escribe las métricas: texto de Prometheus si la ruta acaba en .prom, si no JSON."""
+        with open(ruta, "w", encoding="utf-8") as f:
+            if ruta.endswith(".prom"):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.resumen(), f, indent=2, ensure_ascii=False)
+
+    def exportar_plegado(self, ruta):
+        """Perfil en formato plegado ("pila microsegundos" por línea) para flamegraph.pl."""
+        with self._lock:
+            filas = sorted(self.plegadas.items())
+        with open(ruta, "w", encoding="utf-8") as f:
+            for pila, ns in filas:
+                f.write(f"{pila} {max(1, ns // 1000)}\n")
+
+
+class _Span:
+    __slots__ = ("instrumentacion", "nombre")
+
+    def __init__(self, instrumentacion, nombre):
+        self.instrumentacion = instrumentacion
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.instrumentacion._entrar(self.nombre)
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentacion._salir()
+
+
+INSTRUMENTACION = Instrumentacion()
+
+
+def activar(puntos=PUNTOS, interfaz=None):
+    INSTRUMENTACION.activar(puntos, interfaz)
+    return INSTRUMENTACION
+
+
+def desactivar():
+    INSTRUMENTACION.desactivar()
+
+
+def agregar_argumentos(parser):
+    """Añade --perfil y --metricas a un ArgumentParser."""
+    parser.add_argument("--perfil", metavar="RUTA",
+                        help="al salir, escribe un perfil plegado por pantalla (flamegraph)")
+    parser.add_argument("--metricas", metavar="RUTA",
+                        help="al salir, escribe spans y contadores (.prom o .json)")
+
+
+def exportar_al_salir(args, interfaz=None):
+    """Activa la instrumentación si se pidió algún volcado y lo registra para la salida."""
+    if not (args.perfil or args.metricas):
+        return
+    import atexit
+
+    activar(interfaz=interfaz)
+
+    def volcar():
+        if args.perfil:
+            INSTRUMENTACION.exportar_plegado(args.perfil)
+        if args.metricas:
+            INSTRUMENTACION.exportar(args.metricas)
+
+    atexit.register(volcar)
+
+
+def medir_sobrecarga(batallas=2000, semilla=0):
+    """Segundos de las mismas batallas con la instrumentación apagada y encendida."""
+    from motor import simular_batalla
+    from pokemon import CATALOGO
+
+    nombres = list(CATALOGO)
+
+    def jugar():
+        inicio = time.perf_counter()
+        for i in range(batallas):
+            simular_batalla(nombres[i % len(nombres)], nombres[(i + 1) % len(nombres)],
+                            semilla + i, registrar=False)
+        return time.perf_counter() - inicio
+
+    apagada = jugar()
+    activar()
+    try:
+        encendida = jugar()
+    finally:
+        desactivar()
+    return apagada, encendida
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batallas", type=int, default=2000)
+    parser.add_argument("--semilla", type=int, default=0)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    apagada, encendida = medir_sobrecarga(args.batallas, args.semilla)
+    print(f"Sin instrumentar: {apagada:.3f} s   instrumentado: {encendida:.3f} s")
+    for nombre, span in INSTRUMENTACION.resumen()["spans"].items():
+        print(f"{nombre:<32} {span['llamadas']:>9} llamadas  {span['media_us']:8.2f} us de media")
+    if args.perfil:
+        INSTRUMENTACION.exportar_plegado(args.perfil)
+    if args.metricas:
+        INSTRUMENTACION.exportar(args.metricas)
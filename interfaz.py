@@ -0,0 +1,788 @@
+"""Interfaz gráfica de la batalla, con Flet.
+
+El modelo (pokemon.py) no depende de Flet; este módulo lo importa solo quien
+lanza la interfaz:
+
+    python interfaz.py [--perfil RUTA] [--metricas RUTA]
+"""
+import argparse
+import asyncio
+import atexit
+import os
+import threading
+from typing import Optional
+
+import flet as ft
+
+from actualizaciones import PlanificadorActualizaciones
+from flujo_batalla import ESPERANDO, FlujoBatalla
+from ia import ALEATORIA, ESTRATEGIAS, crear_estrategia, describir_estrategia
+from motor import JUGADOR, RIVAL, Batalla, ataque_aleatorio
+from pokemon import CACHE_ESPECIES, CATALOGO, Pokemon, crear_pokemon, devolver_pokemon
+from repeticion import ArchivoRepeticiones, Repeticion
+from seleccion import CuadriculaSeleccion
+from sesiones import Sesion
+
+# Cartas de la pantalla de selección; con rosters grandes solo se leen del
+# catálogo las especies que se muestran
+FILAS_SELECCION = 2
+COLUMNAS_SELECCION = 4
+
+class PokemonBatallaApp:
+    def __init__(self, page: ft.Page, pausa=2.0, modo_rapido=False, sprites=None, sesion=None,
+                 almacen=None, estrategia_rival=ataque_aleatorio, grabadora=None, eventos=None):
+        self.page = page
+        self.page.title = "Batalla Pokémon"
+        self.page.window_width = 800
+        self.page.window_height = 600
+        self.page.padding = 0
+        
+        # El estado de la partida (Pokémon, batalla, RNG) vive en la sesión, no en la página
+        self.sesion = sesion or Sesion()
+        self.sesion.al_expulsar = self.sesion_expirada
+        # Almacén de instantáneas opcional (estado.py): se escribe tras cada turno
+        self.almacen = almacen
+        self.turno_jugador = True
+        self.mensaje_batalla = ""
+        # Segundos entre ataques; el modo rápido las elimina
+        self.pausa = pausa
+        self.modo_rapido = modo_rapido
+        # GestorSprites opcional: sirve las imágenes desde la caché local
+        self.sprites = sprites
+        # Cualquier estrategia de motor o de ia.py; se puede compartir entre sesiones
+        self.estrategia_rival = estrategia_rival
+        # ArchivoRepeticiones opcional (repeticion.py): se guarda cada batalla terminada
+        self.grabadora = grabadora
+        if grabadora is not None:
+            # Falla ya, y no al terminar la primera batalla, si no se puede grabar
+            describir_estrategia(estrategia_rival)
+        # EscritorEventos opcional (eventos.py): recibe los eventos de cada batalla jugada
+        self.eventos = eventos
+        self.reproduciendo = False
+        self.cuadricula = None
+        # Si el cliente se desconecta a mitad de turno, se cancelan las pausas pendientes
+        self.page.on_disconnect = lambda e: self.cerrar_sesion()
+        
+        # Cada pantalla se construye una sola vez y se queda en la página;
+        # cambiar de pantalla solo alterna `visible`
+        self.vistas = {}
+        self.vista_actual = None
+        # Los manejadores síncronos corren en hilos de Flet, la precarga en el bucle
+        self._lock_vistas = threading.Lock()
+        
+        # Todos los envíos al cliente pasan por el planificador: un update por tick
+        self.actualizador = PlanificadorActualizaciones(page, animar=not modo_rapido)
+        self.actualizador.iniciar()
+        
+        if self.sesion.batalla_pendiente is not None:
+            self.reanudar_batalla()
+        else:
+            self.mostrar_menu_principal()
+        # La primera pantalla ya se envió; el resto se construye sin hacerla esperar
+        self.precargar_vistas()
+    
+    @property
+    def jugador_pokemon(self) -> Optional[Pokemon]:
+        return self.sesion.jugador_pokemon
+    
+    @jugador_pokemon.setter
+    def jugador_pokemon(self, pokemon):
+        self.sesion.jugador_pokemon = pokemon
+    
+    @property
+    def rival_pokemon(self) -> Optional[Pokemon]:
+        return self.sesion.rival_pokemon
+    
+    @rival_pokemon.setter
+    def rival_pokemon(self, pokemon):
+        self.sesion.rival_pokemon = pokemon
+    
+    @property
+    def flujo(self):
+        return self.sesion.flujo
+    
+    @flujo.setter
+    def flujo(self, flujo):
+        self.sesion.flujo = flujo
+    
+    @property
+    def nombre_jugador(self):
+        return self.sesion.nombre_jugador
+    
+    @nombre_jugador.setter
+    def nombre_jugador(self, nombre):
+        self.sesion.nombre_jugador = nombre
+    
+    def guardar_estado(self):
+        if self.almacen is None:
+            return
+        # Solo entre turnos, con el jugador por mover: es como se retoma la batalla
+        flujo = self.flujo
+        if flujo is not None and (flujo.estado != ESPERANDO or flujo.batalla.turno != JUGADOR):
+            return
+        from estado import serializar_sesion
+        self.almacen.guardar(self.sesion.clave, serializar_sesion(self.sesion))
+    
+    def cerrar_sesion(self):
+        self.cancelar_batalla()
+        self.actualizador.detener()
+        self.sesion.cerrar()
+    
+    def sesion_expirada(self, sesion):
+        # El gestor llama desde su hilo: el trabajo se hace en el bucle de la página
+        self.page.run_task(self.mostrar_sesion_expirada)
+    
+    async def mostrar_sesion_expirada(self):
+        self.cerrar_sesion()
+        self.page.controls.clear()
+        self.page.add(ft.Text("La sesión expiró por inactividad. Recarga la página para volver a jugar.",
+                              size=20))
+    
+    def get_color_tipo(self, tipo):
+        colores = {
+            "fuego": ft.Colors.RED_400,
+            "planta": ft.Colors.GREEN_400,
+            "electrico": ft.Colors.YELLOW_700,
+            "normal": ft.Colors.GREY_400
+        }
+        return colores.get(tipo, ft.Colors.BLUE_400)
+    
+    def src_sprite(self, url):
+        if self.sprites is None:
+            return url
+        return self.sprites.resolver(url)
+    
+    def obtener_vista(self, nombre, construir):
+        with self._lock_vistas:
+            vista = self.vistas.get(nombre)
+            if vista is None:
+                vista = construir()
+                vista.visible = False
+                self.vistas[nombre] = vista
+                self.page.controls.append(vista)
+                self.actualizador.marcar_pagina()
+        return vista
+    
+    def precargar_vistas(self):
+        """Construye en el bucle de la página las pantallas que aún no se ven."""
+        # Sin bucle (p. ej. la página falsa de rendimiento.py) se construyen al mostrarlas
+        if hasattr(self.page, "run_task"):
+            self.page.run_task(self._precargar_vistas)
+    
+    async def _precargar_vistas(self):
+        for nombre, construir in (("seleccion", self.construir_seleccion_pokemon),
+                                  ("fin", self.construir_fin_batalla)):
+            # Entre pantalla y pantalla se cede el bucle a los eventos del usuario
+            await asyncio.sleep(0)
+            self.obtener_vista(nombre, construir)
+    
+    def mostrar_vista(self, nombre, construir):
+        vista = self.obtener_vista(nombre, construir)
+        if self.vista_actual is not None and self.vista_actual is not vista:
+            self.vista_actual.visible = False
+            self.actualizador.marcar(self.vista_actual)
+        vista.visible = True
+        self.vista_actual = vista
+        # Las transiciones de la pantalla anterior ya no se ven
+        self.actualizador.terminar_transiciones()
+        self.actualizador.marcar(vista)
+        self.actualizador.vaciar()
+    
+    def mostrar_menu_principal(self):
+        self.mostrar_vista("menu", self.construir_menu_principal)
+    
+    def construir_menu_principal(self):
+        titulo = ft.Container(
+            content=ft.Column([
+                ft.Text("⚡ BATALLA POKÉMON ⚡", 
+                       size=40, 
+                       weight=ft.FontWeight.BOLD,
+                       color=ft.Colors.YELLOW_400),
+                ft.Text("Edición Flet - POO", 
+                       size=20, 
+                       color=ft.Colors.WHITE70),
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            alignment=ft.alignment.center,
+            padding=40
+        )
+        
+        nombre_input = ft.TextField(
+            label="Tu nombre",
+            hint_text="Ash",
+            width=300,
+            text_align=ft.TextAlign.CENTER,
+        )
+        
+        def iniciar_juego(e):
+            with self.sesion.medir("menu"):
+                nombre = nombre_input.value.strip() or "Ash"
+                self.nombre_jugador = nombre
+                self.mostrar_seleccion_pokemon()
+        
+        boton_iniciar = ft.ElevatedButton(
+            "COMENZAR AVENTURA",
+            on_click=iniciar_juego,
+            width=300,
+            height=50,
+            style=ft.ButtonStyle(
+                color=ft.Colors.WHITE,
+                bgcolor=ft.Colors.GREEN_600,
+            )
+        )
+        
+        return ft.Container(
+            content=ft.Column([
+                titulo,
+                nombre_input,
+                ft.Container(height=20),
+                boton_iniciar,
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            gradient=ft.LinearGradient(
+                begin=ft.alignment.top_center,
+                end=ft.alignment.bottom_center,
+                colors=[ft.Colors.BLUE_900, ft.Colors.BLUE_700]
+            ),
+            expand=True,
+            alignment=ft.alignment.center
+        )
+    
+    def mostrar_seleccion_pokemon(self):
+        # Las imágenes que se descargaron desde la última visita pasan a servirse en local
+        if "seleccion" in self.vistas:
+            self.cuadricula.refrescar()
+        self.mostrar_vista("seleccion", self.construir_seleccion_pokemon)
+    
+    def construir_seleccion_pokemon(self):
+        def seleccionar(nombre_pokemon):
+            with self.sesion.medir("seleccion"):
+                self.jugador_pokemon = crear_pokemon(nombre_pokemon)
+                self.elegir_rival()
+                self.iniciar_batalla()
+        
+        # Solo se leen datos: basta con la plantilla, sin crear una instancia
+        self.cuadricula = CuadriculaSeleccion(
+            CATALOGO,
+            CACHE_ESPECIES.prototipo,
+            seleccionar,
+            src_sprite=self.src_sprite,
+            color_tipo=self.get_color_tipo,
+            filas=FILAS_SELECCION,
+            columnas=COLUMNAS_SELECCION,
+            actualizador=self.actualizador,
+        )
+        
+        return ft.Container(
+            content=ft.Column([
+                ft.Text("Elige tu Pokémon inicial", 
+                       size=30, 
+                       weight=ft.FontWeight.BOLD,
+                       color=ft.Colors.WHITE),
+                ft.Container(height=30),
+                self.cuadricula.control,
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            gradient=ft.LinearGradient(
+                begin=ft.alignment.top_center,
+                end=ft.alignment.bottom_center,
+                colors=[ft.Colors.PURPLE_900, ft.Colors.PURPLE_700]
+            ),
+            expand=True,
+            alignment=ft.alignment.center,
+            padding=40
+        )
+    
+    def elegir_rival(self):
+        # Elegir rival aleatoriamente (no basado en la elección del jugador)
+        opciones = list(CATALOGO)
+        # Opcional: evitar elegir exactamente la misma especie que el jugador
+        try:
+            nombre_jugador = self.jugador_pokemon.nombre
+            candidatos = [n for n in opciones if n != nombre_jugador]
+            if not candidatos:
+                candidatos = opciones
+        except Exception:
+            candidatos = opciones
+        
+        self.rival_pokemon = crear_pokemon(self.sesion.rng.choice(candidatos))
+    
+    def color_hp(self, porcentaje):
+        if porcentaje > 0.5:
+            return ft.Colors.GREEN
+        elif porcentaje > 0.25:
+            return ft.Colors.YELLOW
+        return ft.Colors.RED
+    
+    def crear_barra_hp(self, pokemon):
+        porcentaje = pokemon.hp_actual / pokemon.hp_max
+        
+        # Barra externa (fondo) y barra interna (indicador)
+        barra_interna = ft.Container(
+            bgcolor=self.color_hp(porcentaje),
+            width=200 * porcentaje,
+            height=20,
+            border_radius=5,
+        )
+
+        barra_externa = ft.Container(
+            content=ft.Row([barra_interna]),
+            width=200,
+            height=20,
+            bgcolor=ft.Colors.GREY_800,
+            border_radius=5,
+        )
+
+        # Guardamos la referencia a la barra interna para actualizarla después
+        barra_externa.barra_interna = barra_interna
+        return barra_externa
+    
+    def crear_manejador_ataque(self, ataque):
+        # Flet solo espera el manejador si es una función async
+        async def manejador(e):
+            await self.ejecutar_ataque(ataque)
+        return manejador
+    
+    def iniciar_batalla(self, batalla=None):
+        self.cancelar_batalla()
+        if batalla is None:
+            batalla = Batalla(self.jugador_pokemon, self.rival_pokemon, *self.sesion.crear_rngs(),
+                              estrategia_rival=self.estrategia_rival,
+                              registrar=self.grabadora is not None)
+        if self.eventos is not None and not self.reproduciendo:
+            batalla.al_evento = self.eventos.oyente()
+        self.flujo = FlujoBatalla(
+            batalla,
+            al_atacar=self.mostrar_ataque,
+            al_terminar=lambda ganador: self.fin_batalla(ganador == JUGADOR),
+            al_esperar=self.esperar_jugador,
+            pausa=self.pausa,
+            modo_rapido=self.modo_rapido,
+        )
+        
+        # La pantalla de batalla se reutiliza: solo se cambian los datos
+        self.obtener_vista("batalla", self.construir_batalla)
+        self.vincular_batalla()
+        self.mostrar_vista("batalla", self.construir_batalla)
+        self.guardar_estado()
+    
+    def reanudar_batalla(self):
+        """Retoma la batalla restaurada de una instantánea, con el jugador por mover."""
+        batalla = self.sesion.batalla_pendiente
+        self.sesion.batalla_pendiente = None
+        # Una batalla restaurada no guarda la estrategia del rival
+        batalla.estrategias = (batalla.estrategias[0], self.estrategia_rival)
+        # Instantáneas antiguas se pudieron guardar a mitad de turno: el rival termina el suyo
+        if batalla.turno == RIVAL and not batalla.terminada():
+            batalla.jugar_turno()
+        self.iniciar_batalla(batalla)
+        if batalla.terminada():
+            self.fin_batalla(batalla.ganador() == JUGADOR)
+    
+    async def reproducir(self, repeticion, velocidad=1.0):
+        """Muestra una batalla grabada; `velocidad` escala las pausas y 0 las quita."""
+        self.sesion.liberar()
+        batalla = repeticion.crear_batalla()
+        self.jugador_pokemon, self.rival_pokemon = batalla.pokemon
+        self.reproduciendo = True
+        try:
+            self.iniciar_batalla(batalla)
+            # El ritmo lo marca la reproducción, también si la app va en modo rápido
+            self.flujo.modo_rapido = velocidad <= 0
+            if velocidad > 0:
+                self.flujo.pausa = self.pausa / velocidad
+            for indice in repeticion.acciones:
+                if self.flujo is None:
+                    break
+                self.actualizador.nuevo_turno()
+                await self.flujo.turno(self.jugador_pokemon.ataques[indice])
+                self.actualizador.vaciar()
+        finally:
+            self.reproduciendo = False
+    
+    def construir_batalla(self):
+        # Información del Pokémon rival (arriba)
+        self.rival_nombre_text = ft.Text(
+            "",
+            size=20,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.WHITE
+        )
+        self.rival_hp_text = ft.Text(
+            f"Lv. 42",
+            size=16,
+            color=ft.Colors.WHITE70
+        )
+        self.rival_hp_bar = self.crear_barra_hp(self.rival_pokemon)
+        self.rival_hp_numero = ft.Text(
+            "",
+            size=14,
+            color=ft.Colors.WHITE
+        )
+        
+        rival_info = ft.Container(
+            content=ft.Column([
+                ft.Row([self.rival_nombre_text, self.rival_hp_text], spacing=10),
+                ft.Row([
+                    ft.Text("HP", size=14, color=ft.Colors.WHITE),
+                    self.rival_hp_bar,
+                ], spacing=5),
+                self.rival_hp_numero,
+            ], spacing=5),
+            bgcolor=ft.Colors.with_opacity(0.8, ft.Colors.BLACK),
+            padding=15,
+            border_radius=10,
+            width=300,
+        )
+        
+        # Sprite rival
+        self.rival_sprite = ft.Image(
+            src=self.rival_pokemon.sprite_url,
+            width=150,
+            height=150,
+        )
+        
+        # Información del Pokémon jugador (abajo)
+        self.jugador_nombre_text = ft.Text(
+            "",
+            size=20,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.WHITE
+        )
+        self.jugador_hp_text = ft.Text(
+            f"Lv. 42",
+            size=16,
+            color=ft.Colors.WHITE70
+        )
+        self.jugador_hp_bar = self.crear_barra_hp(self.jugador_pokemon)
+        self.jugador_hp_numero = ft.Text(
+            "",
+            size=14,
+            color=ft.Colors.WHITE
+        )
+        
+        jugador_info = ft.Container(
+            content=ft.Column([
+                ft.Row([self.jugador_nombre_text, self.jugador_hp_text], spacing=10),
+                ft.Row([
+                    ft.Text("HP", size=14, color=ft.Colors.WHITE),
+                    self.jugador_hp_bar,
+                ], spacing=5),
+                self.jugador_hp_numero,
+            ], spacing=5),
+            bgcolor=ft.Colors.with_opacity(0.8, ft.Colors.BLACK),
+            padding=15,
+            border_radius=10,
+            width=300,
+        )
+        
+        # Sprite jugador
+        self.jugador_sprite = ft.Image(
+            src=self.jugador_pokemon.sprite_url,
+            width=150,
+            height=150,
+        )
+        
+        # Mensaje de batalla
+        self.mensaje_text = ft.Text(
+            "",
+            size=20,
+            color=ft.Colors.WHITE,
+            weight=ft.FontWeight.BOLD,
+        )
+        
+        mensaje_box = ft.Container(
+            content=self.mensaje_text,
+            bgcolor=ft.Colors.with_opacity(0.95, ft.Colors.BLACK),
+            # Asegurar texto legible
+            padding=22,
+            border_radius=10,
+            width=420,
+            height=100,
+            # Un clic en el mensaje salta la pausa actual
+            on_click=self.saltar_animacion,
+        )
+        
+        # Botones de ataque: se crean al vincular y se reutilizan entre batallas
+        self.botones_ataque = []
+        self.filas_botones = ft.Column([], spacing=10)
+        
+        # Mantener siempre el mismo contenedor; solo deshabilitaremos botones durante animaciones
+        self.botones_container = ft.Container(
+            content=self.filas_botones,
+            visible=True
+        )
+        
+        # Layout principal
+        campo_batalla = ft.Stack([
+            # Fondo
+            ft.Container(
+                gradient=ft.LinearGradient(
+                    begin=ft.alignment.top_center,
+                    end=ft.alignment.bottom_center,
+                    colors=[ft.Colors.CYAN_300, ft.Colors.GREEN_300]
+                ),
+                expand=True,
+            ),
+            
+            # Rival (arriba derecha)
+            ft.Container(
+                content=self.rival_sprite,
+                top=40,
+                right=80,
+            ),
+            ft.Container(
+                content=rival_info,
+                top=30,
+                right=200,
+            ),
+            
+            # Jugador (abajo izquierda)
+            ft.Container(
+                content=self.jugador_sprite,
+                bottom=140,
+                left=80,
+            ),
+            ft.Container(
+                content=jugador_info,
+                bottom=120,
+                left=200,
+            ),
+        ])
+        
+        menu_batalla = ft.Container(
+            content=ft.Column([
+                mensaje_box,
+                ft.Container(height=10),
+                self.botones_container,
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            bgcolor=ft.Colors.with_opacity(0.9, ft.Colors.BLACK),
+            padding=20,
+            border_radius=ft.border_radius.only(top_left=15, top_right=15),
+        )
+        
+        return ft.Column([
+            ft.Container(content=campo_batalla, expand=True),
+            menu_batalla,
+        ], spacing=0, expand=True)
+    
+    def asegurar_botones(self, cantidad):
+        """Crea botones de ataque solo si la pantalla aún no tiene suficientes."""
+        while len(self.botones_ataque) < cantidad:
+            btn = ft.ElevatedButton(
+                "",
+                width=180,
+                height=80,
+                color=ft.Colors.WHITE,
+            )
+            self.botones_ataque.append(btn)
+            # Dos botones por fila
+            if len(self.botones_ataque) % 2 == 1:
+                self.filas_botones.controls.append(ft.Row([], spacing=10))
+            self.filas_botones.controls[-1].controls.append(btn)
+    
+    def vincular_batalla(self):
+        """Carga en la pantalla de batalla los datos de los Pokémon actuales."""
+        self.rival_nombre_text.value = self.rival_pokemon.nombre
+        self.rival_sprite.src = self.src_sprite(self.rival_pokemon.sprite_url)
+        self.jugador_nombre_text.value = self.jugador_pokemon.nombre
+        self.jugador_sprite.src = self.src_sprite(self.jugador_pokemon.sprite_url)
+        for barra, pokemon in ((self.jugador_hp_bar, self.jugador_pokemon),
+                               (self.rival_hp_bar, self.rival_pokemon)):
+            barra.barra_interna.bgcolor = self.color_hp(pokemon.hp_actual / pokemon.hp_max)
+        self.actualizar_barras_hp(animar=False)
+        
+        ataques = self.jugador_pokemon.ataques
+        self.asegurar_botones(len(ataques))
+        for i, btn in enumerate(self.botones_ataque):
+            if i < len(ataques):
+                ataque = ataques[i]
+                btn.text = f"{ataque.nombre}\n({ataque.tipo} - {ataque.poder})"
+                btn.bgcolor = self.get_color_tipo(ataque.tipo)
+                btn.on_click = self.crear_manejador_ataque(ataque)
+                btn.visible = True
+            else:
+                btn.visible = False
+        
+        self.esperar_jugador()
+    
+    async def ejecutar_ataque(self, ataque):
+        # Un segundo clic durante las pausas no es un turno: ni se mide ni se guarda
+        if self.flujo is None or self.flujo.estado != ESPERANDO:
+            return
+        # Latencia del manejador: hasta que se muestra el ataque del jugador
+        self.sesion.iniciar_medicion("ataque")
+        self.actualizador.nuevo_turno()
+        # Deshabilitar botones (sin cambiar el layout)
+        for b in getattr(self, 'botones_ataque', []):
+            b.disabled = True
+        self.actualizador.marcar(*self.botones_ataque)
+        
+        # Las pausas entre ataques son asyncio.sleep: no bloquean el hilo del manejador.
+        # Durante las pausas el planificador envía los cambios en cada tick
+        if not await self.flujo.turno(ataque):
+            return
+        self.sesion.registrar_turno()
+        self.guardar_estado()
+        self.actualizador.vaciar()
+    
+    def mostrar_ataque(self, lado, ataque, dano, efectividad):
+        atacante = self.flujo.batalla.pokemon[lado]
+        mensaje = f"¡{atacante.nombre} usa {ataque.nombre}!"
+        if efectividad > 1.0:
+            mensaje += " ¡Es súper efectivo!"
+        elif efectividad < 1.0:
+            mensaje += " No es muy efectivo..."
+        
+        self.mensaje_text.value = mensaje
+        self.actualizador.marcar(self.mensaje_text)
+        self.actualizar_barras_hp()
+        if atacante is self.jugador_pokemon:
+            self.sesion.terminar_medicion("ataque")
+    
+    def esperar_jugador(self):
+        # Restaurar menú y habilitar botones
+        self.mensaje_text.value = f"¿Qué hará {self.jugador_pokemon.nombre}?"
+        # En una repetición los ataques del jugador salen de la grabación
+        for b in getattr(self, 'botones_ataque', []):
+            b.disabled = self.reproduciendo
+        self.actualizador.marcar(self.mensaje_text, *self.botones_ataque)
+    
+    def saltar_animacion(self, e=None):
+        if self.flujo is not None:
+            self.flujo.saltar()
+    
+    def cancelar_batalla(self):
+        if self.flujo is not None:
+            self.flujo.cancelar()
+            self.flujo = None
+    
+    def actualizar_barras_hp(self, animar=True):
+        # Solo se marcan la barra y el texto del lado cuyo HP cambió
+        self.actualizar_hp(self.jugador_pokemon, self.jugador_hp_bar, self.jugador_hp_numero, animar)
+        self.actualizar_hp(self.rival_pokemon, self.rival_hp_bar, self.rival_hp_numero, animar)
+    
+    def actualizar_hp(self, pokemon, barra, texto, animar=True):
+        porcentaje = pokemon.hp_actual / pokemon.hp_max
+        # La barra se anima con el tick del planificador, sin updates adicionales
+        self.actualizador.animar_a(barra.barra_interna, "width", 200 * porcentaje,
+                                   duracion=0.5 if animar else 0)
+        valor = f"{pokemon.hp_actual}/{pokemon.hp_max}"
+        if texto.value != valor:
+            texto.value = valor
+            self.actualizador.marcar(texto)
+    
+    def fin_batalla(self, victoria):
+        batalla = self.flujo.batalla
+        self.flujo = None
+        if self.grabadora is not None and not self.reproduciendo and batalla.registro is not None:
+            semillas = tuple(rng.semilla_inicial for rng in batalla.rngs)
+            self.grabadora.guardar(Repeticion.desde_batalla(batalla, semillas, self.estrategia_rival))
+        self.obtener_vista("fin", self.construir_fin_batalla)
+        
+        if victoria:
+            self.fin_titulo_text.value = "🏆 ¡VICTORIA! 🏆"
+            self.fin_mensaje_text.value = f"¡Has derrotado a {self.rival_pokemon.nombre}!"
+            self.fin_gradiente.colors = [ft.Colors.GREEN_700, ft.Colors.BLACK]
+        else:
+            self.fin_titulo_text.value = "💔 DERROTA 💔"
+            self.fin_mensaje_text.value = f"{self.jugador_pokemon.nombre} fue derrotado..."
+            self.fin_gradiente.colors = [ft.Colors.RED_700, ft.Colors.BLACK]
+        
+        self.mostrar_vista("fin", self.construir_fin_batalla)
+    
+    def construir_fin_batalla(self):
+        def jugar_de_nuevo(e):
+            # Un segundo clic llega con los luchadores ya devueltos
+            if self.jugador_pokemon is not None:
+                devolver_pokemon(self.jugador_pokemon)
+            if self.rival_pokemon is not None:
+                devolver_pokemon(self.rival_pokemon)
+            self.jugador_pokemon = None
+            self.rival_pokemon = None
+            self.mostrar_menu_principal()
+        
+        self.fin_titulo_text = ft.Text("", size=50, weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE)
+        self.fin_mensaje_text = ft.Text("", size=25, color=ft.Colors.WHITE70)
+        self.fin_gradiente = ft.LinearGradient(
+            begin=ft.alignment.top_center,
+            end=ft.alignment.bottom_center,
+            colors=[ft.Colors.GREEN_700, ft.Colors.BLACK]
+        )
+        
+        return ft.Container(
+            content=ft.Column([
+                self.fin_titulo_text,
+                ft.Container(height=20),
+                self.fin_mensaje_text,
+                ft.Container(height=40),
+                ft.ElevatedButton(
+                    "JUGAR DE NUEVO",
+                    on_click=jugar_de_nuevo,
+                    width=250,
+                    height=50,
+                    bgcolor=ft.Colors.BLUE_600,
+                    color=ft.Colors.WHITE
+                ),
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            gradient=self.fin_gradiente,
+            expand=True,
+            alignment=ft.alignment.center
+        )
+
+GESTOR_SPRITES = None
+ESTRATEGIA_RIVAL = ataque_aleatorio
+GRABADORA = None
+EVENTOS = None
+# (Repeticion, velocidad) que se reproduce al abrir, en lugar del menú
+REPRODUCIR = None
+
+def main(page: ft.Page):
+    app = PokemonBatallaApp(page, sprites=GESTOR_SPRITES, estrategia_rival=ESTRATEGIA_RIVAL,
+                            grabadora=GRABADORA, eventos=EVENTOS)
+    if REPRODUCIR is not None:
+        page.run_task(app.reproducir, *REPRODUCIR)
+
+def ejecutar(argv=None):
+    global GESTOR_SPRITES, ESTRATEGIA_RIVAL, GRABADORA, EVENTOS, REPRODUCIR
+    from instrumentacion import agregar_argumentos, exportar_al_salir
+    from sprites import DIRECTORIO_ASSETS, GestorSprites
+    
+    parser = argparse.ArgumentParser(description="Batalla Pokémon")
+    parser.add_argument("--ia", choices=ESTRATEGIAS, default=ALEATORIA,
+                        help="estrategia del rival (ver ia.py)")
+    parser.add_argument("--grabar", metavar="RUTA",
+                        help="añade cada batalla terminada a un archivo de repeticiones")
+    parser.add_argument("--repeticion", metavar="RUTA",
+                        help="reproduce una batalla de un archivo de repeticiones")
+    parser.add_argument("--indice", type=int, default=-1,
+                        help="qué repetición del archivo (por defecto, la última)")
+    parser.add_argument("--velocidad", type=float, default=1.0,
+                        help="ritmo de la reproducción; 0 = instantánea")
+    parser.add_argument("--eventos", metavar="RUTA",
+                        help="registra los eventos de cada batalla (ver eventos.py)")
+    agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+    exportar_al_salir(args, interfaz=True)
+    ESTRATEGIA_RIVAL = crear_estrategia(args.ia)
+    if args.grabar:
+        GRABADORA = ArchivoRepeticiones(args.grabar)
+    if args.eventos:
+        # numpy solo se carga si se pide el registro
+        from eventos import EscritorEventos
+        EVENTOS = EscritorEventos(args.eventos)
+        atexit.register(EVENTOS.cerrar)
+    if args.repeticion:
+        repeticiones = list(ArchivoRepeticiones(args.repeticion).leer())
+        if not repeticiones:
+            parser.error(f"{args.repeticion} no tiene repeticiones")
+        REPRODUCIR = (repeticiones[args.indice], args.velocidad)
+    
+    # POKEMON_SIN_RED=1 para kioscos sin conexión: solo se usan sprites ya descargados
+    GESTOR_SPRITES = GestorSprites(sin_red=os.environ.get("POKEMON_SIN_RED") == "1")
+    atexit.register(GESTOR_SPRITES.cerrar)
+    primeras = CATALOGO.nombres(cantidad=FILAS_SELECCION * COLUMNAS_SELECCION)
+    GESTOR_SPRITES.precargar((CATALOGO[n]["sprite_url"] for n in primeras), esperar=False)
+    ft.app(target=main, assets_dir=DIRECTORIO_ASSETS)
+
+if __name__ == "__main__":
+    # Desde el módulo importado: la instrumentación sustituye los métodos de esa clase
+    import interfaz
+    interfaz.ejecutar()
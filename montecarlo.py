@@ -0,0 +1,187 @@
+"""Simulación Monte Carlo vectorizada con NumPy.
+
+Avanza N batallas en paralelo, un ataque por paso, guardando HP, ataques
+elegidos y multiplicadores de tipo en arreglos. Las batallas terminadas se
+enmascaran y dejan de cambiar.
+
+Las elecciones de ataque salen de un número uniforme por batalla y por paso
+(`_uniformes_paso`), de modo que `motor.Batalla` puede reproducir exactamente
+cualquier batalla con la estrategia `EleccionesUniformes`.
+"""
+from statistics import NormalDist
+
+import numpy as np
+
+from motor import JUGADOR, RIVAL, Batalla
+from pokemon import CATALOGO, CachePrototipos, crear_pokemon
+
+
+def _uniformes_paso(semilla, paso, n):
+    """Números uniformes en [0, 1) de un paso, uno por batalla."""
+    return np.random.default_rng([semilla, paso]).random(n)
+
+
+class TablasEspecies:
+    """Daños y multiplicadores precalculados para un conjunto de especies.
+
+    Con `datos` (formato de POKEMON_DATA) y `registro` (un RegistroTipos) se
+    calculan para especies y tipos candidatos sin tocar el catálogo ni el
+    registro global (ver balance.py). `crear(nombre)` da instancias con esos
+    mismos datos y registro, para jugar las batallas en motor.Batalla.
+    """
+
+    def __init__(self, nombres=None, datos=None, registro=None):
+        self.nombres = list(nombres or (CATALOGO if datos is None else datos))
+        if datos is None and registro is None:
+            self.crear = crear_pokemon
+        else:
+            cache = CachePrototipos(CATALOGO if datos is None else datos, registro=registro)
+            self.crear = cache.crear
+        pokemon = [self.crear(nombre) for nombre in self.nombres]
+        n = len(pokemon)
+        max_ataques = max(len(p.ataques) for p in pokemon)
+
+        self.hp = np.array([p.hp_max for p in pokemon], dtype=np.int64)
+        self.n_ataques = np.array([len(p.ataques) for p in pokemon], dtype=np.int64)
+        # dano[atacante, defensor, ataque], igual que Pokemon.atacar
+        self.multiplicador = np.ones((n, n, max_ataques), dtype=np.float64)
+        self.dano = np.zeros((n, n, max_ataques), dtype=np.int64)
+        for i, atacante in enumerate(pokemon):
+            for j, defensor in enumerate(pokemon):
+                for k, ataque in enumerate(atacante.ataques):
+                    # El mismo registro (y los mismos ids) que Pokemon.calcular_dano
+                    mult = atacante.registro.efectividad_id(ataque.tipo_id, defensor.tipo_id)
+                    self.multiplicador[i, j, k] = mult
+                    self.dano[i, j, k] = int(ataque.poder * mult)
+
+    def indice(self, nombre):
+        return self.nombres.index(nombre)
+
+
+class ResultadosVectorizados:
+    def __init__(self, ganador, turnos, hp_jugador, hp_rival):
+        # ganador: JUGADOR, RIVAL o -1 si se agotaron los turnos
+        self.ganador = ganador
+        self.turnos = turnos
+        self.hp_jugador = hp_jugador
+        self.hp_rival = hp_rival
+
+
+def simular_vectorizado(tablas, especie_jugador, especie_rival, semilla=0,
+                        max_turnos=1000):
+    """Simula en paralelo las batallas especie_jugador[i] vs especie_rival[i]."""
+    esp = (np.asarray(especie_jugador, dtype=np.intp),
+           np.asarray(especie_rival, dtype=np.intp))
+    n = esp[JUGADOR].shape[0]
+    hp = (tablas.hp[esp[JUGADOR]].copy(), tablas.hp[esp[RIVAL]].copy())
+    ganador = np.full(n, -1, dtype=np.int8)
+    turnos = np.zeros(n, dtype=np.int32)
+    activas = np.ones(n, dtype=bool)
+
+    for paso in range(max_turnos):
+        if not activas.any():
+            break
+        lado = paso % 2
+        atacante, defensor = esp[lado], esp[1 - lado]
+        u = _uniformes_paso(semilla, paso, n)
+        ataque = (u * tablas.n_ataques[atacante]).astype(np.intp)
+        dano = tablas.dano[atacante, defensor, ataque]
+
+        hp_defensor = hp[1 - lado]
+        # recibir_dano: resta y recorta a cero, solo en batallas activas
+        hp_defensor[activas] = np.maximum(hp_defensor[activas] - dano[activas], 0)
+        turnos[activas] += 1
+
+        # esta_debilitado: hp <= 0
+        debilitado = activas & (hp_defensor <= 0)
+        ganador[debilitado] = lado
+        activas &= ~debilitado
+
+    return ResultadosVectorizados(ganador, turnos, hp[JUGADOR], hp[RIVAL])
+
+
+class MatrizVictorias:
+    def __init__(self, nombres, n, probabilidad, ic_inferior, ic_superior):
+        self.nombres = nombres
+        self.n = n
+        self.probabilidad = probabilidad
+        self.ic_inferior = ic_inferior
+        self.ic_superior = ic_superior
+
+    def __getitem__(self, par):
+        a, b = (self.nombres.index(nombre) for nombre in par)
+        return self.probabilidad[a, b], (self.ic_inferior[a, b], self.ic_superior[a, b])
+
+
+def intervalo_wilson(victorias, n, confianza=0.95):
+    """Intervalo de confianza de Wilson para una proporción (vectorizado)."""
+    z = NormalDist().inv_cdf(0.5 + confianza / 2)
+    p = np.asarray(victorias, dtype=np.float64) / n
+    denominador = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / denominador
+    margen = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominador
+    return centro - margen, centro + margen
+
+
+def matriz_victorias(n, semilla=0, nombres=None, confianza=0.95, max_turnos=1000, tablas=None):
+    """Probabilidad de victoria del jugador (fila) contra el rival (columna).
+
+    Simula n batallas por cada par de especies en una sola pasada vectorizada.
+    """
+    tablas = tablas or TablasEspecies(nombres)
+    k = len(tablas.nombres)
+    filas, columnas = np.meshgrid(np.arange(k), np.arange(k), indexing="ij")
+    especie_jugador = np.repeat(filas.ravel(), n)
+    especie_rival = np.repeat(columnas.ravel(), n)
+
+    resultados = simular_vectorizado(tablas, especie_jugador, especie_rival,
+                                     semilla, max_turnos)
+    victorias = (resultados.ganador == JUGADOR).reshape(k, k, n).sum(axis=2)
+    inferior, superior = intervalo_wilson(victorias, n, confianza)
+    return MatrizVictorias(tablas.nombres, n, victorias / n, inferior, superior)
+
+
+class EleccionesUniformes:
+    """Estrategia para motor.Batalla que elige ataques con uniformes dados.
+
+    Permite reproducir en el motor escalar una batalla de la simulación
+    vectorizada: se usa la misma estrategia para ambos lados y cada llamada
+    consume el uniforme del paso siguiente.
+    """
+
+    def __init__(self, uniformes):
+        self.uniformes = uniformes
+        self.paso = 0
+
+    def __call__(self, atacante, defensor, rng):
+        u = self.uniformes[self.paso]
+        self.paso += 1
+        return atacante.ataques[int(u * len(atacante.ataques))]
+
+
+def verificar_contra_motor(tablas, especie_jugador, especie_rival, resultados,
+                           semilla=0, indices=None):
+    """Re-simula batallas con motor.Batalla y devuelve los índices que difieren."""
+    n = len(especie_jugador)
+    indices = range(n) if indices is None else indices
+    max_paso = int(resultados.turnos.max())
+    uniformes = np.stack([_uniformes_paso(semilla, paso, n) for paso in range(max_paso)])
+
+    divergencias = []
+    for i in indices:
+        estrategia = EleccionesUniformes(uniformes[:, i])
+        batalla = Batalla(
+            tablas.crear(tablas.nombres[especie_jugador[i]]),
+            tablas.crear(tablas.nombres[especie_rival[i]]),
+            estrategia_jugador=estrategia,
+            estrategia_rival=estrategia,
+            registrar=False,
+        )
+        resultado = batalla.jugar(max_paso)
+        ganador = -1 if resultado.ganador is None else resultado.ganador
+        if (ganador != resultados.ganador[i]
+                or resultado.turnos != resultados.turnos[i]
+                or batalla.jugador.hp_actual != resultados.hp_jugador[i]
+                or batalla.rival.hp_actual != resultados.hp_rival[i]):
+            divergencias.append(i)
+    return divergencias
@@ -0,0 +1,191 @@
+"""Motor de batallas sin interfaz gráfica.
+
+Ejecuta batallas completas sin Flet y sin pausas, con generadores aleatorios
+independientes para cada lado, de modo que una misma semilla siempre produce
+la misma batalla.
+"""
+import random
+from typing import Optional
+
+from pokemon import CATALOGO, crear_pokemon
+
+JUGADOR = 0
+RIVAL = 1
+
+# Tipos de evento que recibe `al_evento`
+EVENTO_ATAQUE = 1
+EVENTO_DEBILITADO = 2
+EVENTO_FIN = 3
+# Solo en combates por equipos (equipos.py)
+EVENTO_CAMBIO = 4
+
+
+def ataque_aleatorio(atacante, defensor, rng):
+    """Estrategia por defecto: la misma que usa el rival en la interfaz."""
+    return rng.choice(atacante.ataques)
+
+
+def semillas_batalla(semilla=None):
+    """Semillas (jugador, rival) derivadas de una semilla de batalla."""
+    base = random.Random(semilla)
+    return base.getrandbits(64), base.getrandbits(64)
+
+
+def crear_rngs(semilla=None):
+    """Deriva dos generadores independientes (jugador, rival) de una semilla."""
+    semilla_jugador, semilla_rival = semillas_batalla(semilla)
+    return random.Random(semilla_jugador), random.Random(semilla_rival)
+
+
+class ResultadoBatalla:
+    def __init__(self, nombres, ganador, turnos, registro):
+        self.nombres = nombres
+        self.ganador = ganador
+        self.turnos = turnos
+        # Lista de tuplas (lado, indice_ataque, dano); None si no se registró
+        self.registro = registro
+
+    @property
+    def nombre_ganador(self):
+        if self.ganador is None:
+            return None
+        return self.nombres[self.ganador]
+
+    def __repr__(self):
+        return (f"ResultadoBatalla(ganador={self.nombre_ganador!r}, "
+                f"turnos={self.turnos})")
+
+
+class Batalla:
+    def __init__(self, jugador, rival, rng_jugador=None, rng_rival=None,
+                 estrategia_jugador=ataque_aleatorio,
+                 estrategia_rival=ataque_aleatorio, registrar=True, al_evento=None):
+        if rng_jugador is None or rng_rival is None:
+            rng_j, rng_r = crear_rngs()
+            rng_jugador = rng_jugador or rng_j
+            rng_rival = rng_rival or rng_r
+
+        self.pokemon = (jugador, rival)
+        self.rngs = (rng_jugador, rng_rival)
+        self.estrategias = (estrategia_jugador, estrategia_rival)
+        self.turno = JUGADOR
+        self.turnos = 0
+        self.registro = [] if registrar else None
+        # al_evento(tipo, batalla, lado, indice_ataque, dano, multiplicador)
+        self.al_evento = al_evento
+
+    @property
+    def jugador(self):
+        return self.pokemon[JUGADOR]
+
+    @property
+    def rival(self):
+        return self.pokemon[RIVAL]
+
+    def terminada(self):
+        return self.jugador.esta_debilitado() or self.rival.esta_debilitado()
+
+    def ganador(self) -> Optional[int]:
+        if self.rival.esta_debilitado():
+            return JUGADOR
+        if self.jugador.esta_debilitado():
+            return RIVAL
+        return None
+
+    def ejecutar_ataque(self, ataque):
+        """Aplica el ataque del lado al que le toca y pasa el turno al otro."""
+        atacante = self.pokemon[self.turno]
+        defensor = self.pokemon[1 - self.turno]
+        try:
+            indice = atacante.ataques.index(ataque)
+        except ValueError:
+            raise ValueError(f"{atacante.nombre} no conoce {ataque.nombre}") from None
+        dano, efectividad = atacante.atacar(ataque, defensor)
+        lado = self.turno
+
+        if self.registro is not None:
+            self.registro.append((lado, indice, dano))
+        self.turnos += 1
+        self.turno = 1 - self.turno
+
+        if self.al_evento is not None:
+            self.al_evento(EVENTO_ATAQUE, self, lado, indice, dano, efectividad)
+            if defensor.esta_debilitado():
+                self.al_evento(EVENTO_DEBILITADO, self, 1 - lado, indice, dano, efectividad)
+                self.al_evento(EVENTO_FIN, self, lado, indice, dano, efectividad)
+        return dano, efectividad
+
+    def jugar_turno(self):
+        """Deja que la estrategia del lado actual elija y ejecute su ataque.
+
+        Devuelve (ataque, dano, efectividad).
+        """
+        lado = self.turno
+        atacante = self.pokemon[lado]
+        defensor = self.pokemon[1 - lado]
+        ataque = self.estrategias[lado](atacante, defensor, self.rngs[lado])
+        dano, efectividad = self.ejecutar_ataque(ataque)
+        return ataque, dano, efectividad
+
+    def jugar(self, max_turnos=1000):
+        """Juega hasta que un Pokémon se debilite o se agoten los turnos."""
+        while not self.terminada() and self.turnos < max_turnos:
+            self.jugar_turno()
+        return ResultadoBatalla(
+            (self.jugador.nombre, self.rival.nombre),
+            self.ganador(),
+            self.turnos,
+            self.registro,
+        )
+
+
+def simular_batalla(nombre_jugador, nombre_rival, semilla=None,
+                    estrategia_jugador=ataque_aleatorio,
+                    estrategia_rival=ataque_aleatorio,
+                    registrar=True, max_turnos=1000, al_evento=None):
+    """Simula una batalla completa entre dos especies del catálogo.
+
+    `al_evento` se pasa a la `Batalla` (p. ej. `EscritorEventos.oyente()`).
+    """
+    rng_jugador, rng_rival = crear_rngs(semilla)
+    batalla = Batalla(
+        crear_pokemon(nombre_jugador),
+        crear_pokemon(nombre_rival),
+        rng_jugador,
+        rng_rival,
+        estrategia_jugador,
+        estrategia_rival,
+        registrar,
+        al_evento,
+    )
+    return batalla.jugar(max_turnos)
+
+
+def simular_batallas(nombre_jugador, nombre_rival, n, semilla=None, al_evento=None, **kwargs):
+    """Simula n batallas independientes y devuelve (victorias, derrotas, empates).
+
+    Cada batalla recibe su propia semilla derivada de `semilla`, así que el
+    conjunto completo es reproducible. `al_evento` recibe los eventos de
+    todas ellas, una tras otra.
+    """
+    kwargs.setdefault("registrar", False)
+    semillas = random.Random(semilla)
+    conteo = [0, 0, 0]
+    for _ in range(n):
+        resultado = simular_batalla(
+            nombre_jugador, nombre_rival, semillas.getrandbits(64), al_evento=al_evento, **kwargs
+        )
+        conteo[2 if resultado.ganador is None else resultado.ganador] += 1
+    return tuple(conteo)
+
+
+def matriz_victorias(n, semilla=None, nombres=None):
+    """Tasa de victoria del jugador para cada par de especies (fila vs columna)."""
+    nombres = list(nombres or CATALOGO)
+    semillas = random.Random(semilla)
+    matriz = {}
+    for a in nombres:
+        for b in nombres:
+            victorias, _, _ = simular_batallas(a, b, n, semillas.getrandbits(64))
+            matriz[(a, b)] = victorias / n
+    return matriz
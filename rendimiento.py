@@ -0,0 +1,415 @@
+"""Benchmarks de rendimiento con línea base y detección de regresiones.
+
+Mide:
+- `Pokemon.atacar`: microsegundos por ataque.
+- Batallas completas sin interfaz por segundo (`motor.simular_batalla`).
+- Combates 6v6 por segundo y acciones por segundo del planificador de turnos
+  (`equipos.py`).
+- Decisiones por segundo del rival con anticipación (`ia.py`), caché caliente.
+- Repeticiones verificadas por segundo (`repeticion.py`).
+- Bloques y bytes reservados por cada `crear_pokemon`.
+- Tiempo de construcción y número de controles de cada pantalla de
+  `PokemonBatallaApp`, sobre una página falsa que no envía nada.
+- Arranque en un proceso nuevo: importar el modelo (`pokemon`, sin Flet),
+  importar la interfaz y construir la primera pantalla.
+
+Las comprobaciones son pruebas de pytest, en test_rendimiento.py: una por
+métrica contra la línea base de rendimiento_base.json. Son lentas y solo
+corren con --rendimiento. Este módulo tiene las medidas y la comparación;
+como script es un atajo para esas pruebas.
+
+Los tiempos son la mediana de varias repeticiones y se comparan corregidos
+por un bucle de calibración medido justo antes y después de cada uno, salvo
+los de arranque, que se miden en otro proceso y se comparan tal cual. Cada
+métrica es además la mediana de varias corridas completas (3 por defecto).
+Una métrica es una regresión si empeora más que su tolerancia: la de
+`TOLERANCIAS` si la tiene (más amplia para las de pocos milisegundos) o el
+umbral (25 % por defecto).
+
+    python rendimiento.py                # = pytest test_rendimiento.py --rendimiento
+    python rendimiento.py --guardar      # actualiza la línea base
+    python rendimiento.py --umbral 0.5 --corridas 5
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RUTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rendimiento_base.json")
+
+MENOR = "menor"
+MAYOR = "mayor"
+UNIDADES_TIEMPO = ("us/ataque", "ms")
+UNIDADES_RITMO = ("batallas/s", "acciones/s", "decisiones/s", "repeticiones/s")
+
+# Empeoramiento tolerado por métrica; las demás usan --umbral. Las de menos de
+# unos milisegundos y los microbenchmarks más cortos varían mucho de una
+# ejecución a otra aunque nada cambie
+TOLERANCIAS = {
+    "planificador_por_segundo": 0.4,
+    "ia_decisiones_por_segundo": 0.4,
+    "pantalla_menu_ms": 0.5,
+    "pantalla_seleccion_ms": 0.5,
+    "pantalla_batalla_ms": 0.5,
+    "pantalla_fin_ms": 0.5,
+    "arranque_modelo_ms": 0.5,
+    "arranque_interfaz_ms": 0.5,
+    "arranque_primera_pantalla_ms": 0.5,
+}
+
+
+class PaginaFalsa:
+    """Lo mínimo de ft.Page que usa PokemonBatallaApp, sin conexión ni bucle."""
+
+    def __init__(self):
+        self.controls = []
+        self.title = None
+        self.padding = None
+        self.window_width = None
+        self.window_height = None
+        self.on_disconnect = None
+        self.updates = 0
+
+    def add(self, *controles):
+        self.controls.extend(controles)
+        self.updates += 1
+
+    def update(self, *controles):
+        self.updates += 1
+
+
+def _mediana(funcion, repeticiones, por_vuelta=1):
+    """Mediana del tiempo (segundos por operación) de `repeticiones` vueltas.
+
+    La mediana, y no el mínimo, para que una vuelta con suerte no fije una
+    línea base que luego no se repite. Como timeit, sin recolector de basura
+    durante la medida: sus pausas dependen de todo lo reservado antes y son
+    el mayor ruido entre ejecuciones.
+    """
+    tiempos = []
+    reactivar = gc.isenabled()
+    try:
+        for _ in range(repeticiones):
+            gc.collect()
+            gc.disable()
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) / por_vuelta)
+            gc.enable()
+    finally:
+        if reactivar:
+            gc.enable()
+        else:
+            gc.disable()
+    return statistics.median(tiempos)
+
+
+def medir_calibracion(n=100000, repeticiones=5):
+    """Microsegundos de un bucle de Python fijo, para descontar la velocidad de la máquina."""
+    def vuelta():
+        total = 0
+        valores = {}
+        for i in range(n):
+            valores[i & 255] = i
+            total += valores[i & 127]
+        return total
+
+    return _mediana(vuelta, repeticiones) * 1e6
+
+
+def medir_atacar(n=20000, repeticiones=9):
+    from pokemon import crear_pokemon
+
+    atacante = crear_pokemon("Pikachu")
+    defensor = crear_pokemon("Bulbasaur")
+    ataque = atacante.ataques[0]
+
+    def vuelta():
+        for _ in range(n):
+            defensor.hp_actual = defensor.hp_max
+            atacante.atacar(ataque, defensor)
+
+    return _mediana(vuelta, repeticiones, n) * 1e6
+
+
+def medir_batallas(n=2000, repeticiones=7):
+    from motor import simular_batalla
+    from pokemon import POKEMON_DATA
+
+    nombres = list(POKEMON_DATA)
+    pares = [(a, b) for a in nombres for b in nombres]
+
+    def vuelta():
+        for i in range(n):
+            a, b = pares[i % len(pares)]
+            simular_batalla(a, b, i, registrar=False)
+
+    return 1 / _mediana(vuelta, repeticiones, n)
+
+
+def medir_equipos(n=300, repeticiones=7):
+    """Batallas 6v6 por segundo, con un 10 % de cambios."""
+    from equipos import _batallas_aleatorias
+
+    def vuelta():
+        for batalla in _batallas_aleatorias(n, 0, 0.1):
+            batalla.jugar()
+
+    return 1 / _mediana(vuelta, repeticiones, n)
+
+
+def medir_planificador(n=50000, repeticiones=9):
+    from equipos import medir_planificador
+
+    return statistics.median(medir_planificador(n) for _ in range(repeticiones))
+
+
+def medir_ia(n=20000, repeticiones=5):
+    from ia import IAAnticipacion, medir_decisiones
+
+    return statistics.median(medir_decisiones(IAAnticipacion(), n)[1] for _ in range(repeticiones))
+
+
+def medir_repeticiones(n=1000, repeticiones=7):
+    from repeticion import grabar_batallas, verificar
+
+    grabadas = grabar_batallas(n)
+
+    def vuelta():
+        _, divergencias = verificar(grabadas)
+        if divergencias:
+            raise RuntimeError(f"{len(divergencias)} repeticiones no coinciden")
+
+    return 1 / _mediana(vuelta, repeticiones, n)
+
+
+def medir_asignaciones(n=1000):
+    """(bloques, bytes) reservados y aún vivos por cada crear_pokemon."""
+    from pokemon import CACHE_ESPECIES, crear_pokemon
+
+    # Plantilla ya construida y pool vacío: se mide el clon, no la primera carga
+    CACHE_ESPECIES.invalidar("Pikachu")
+    crear_pokemon("Pikachu")
+    creados = []
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.take_snapshot()
+        for _ in range(n):
+            creados.append(crear_pokemon("Pikachu"))
+        despues = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diferencias = despues.compare_to(antes, "filename")
+    # La lista que guarda las instancias no cuenta
+    propias = [d for d in diferencias if not d.traceback[0].filename.endswith(__file__)]
+    bloques = sum(d.count_diff for d in propias)
+    tamano = sum(d.size_diff for d in propias)
+    return bloques / n, tamano / n
+
+
+def medir_pantallas(repeticiones=50):
+    """Pantalla -> (milisegundos de construcción, controles)."""
+    from interfaz import PokemonBatallaApp
+    from pokemon import crear_pokemon
+    from seleccion import contar_controles
+
+    app = PokemonBatallaApp(PaginaFalsa(), modo_rapido=True)
+    app.jugador_pokemon = crear_pokemon("Pikachu")
+    app.rival_pokemon = crear_pokemon("Charmander")
+    constructores = {
+        "menu": app.construir_menu_principal,
+        "seleccion": app.construir_seleccion_pokemon,
+        "batalla": app.construir_batalla,
+        "fin": app.construir_fin_batalla,
+    }
+    resultado = {}
+    for nombre, construir in constructores.items():
+        segundos = _mediana(construir, repeticiones)
+        resultado[nombre] = (segundos * 1e3, contar_controles(construir()))
+    return resultado
+
+
+_ARRANQUE = """
+import sys, time
+inicio = time.perf_counter()
+import pokemon
+modelo = time.perf_counter()
+con_flet = "flet" in sys.modules
+import interfaz
+from rendimiento import PaginaFalsa
+importado = time.perf_counter()
+interfaz.PokemonBatallaApp(PaginaFalsa(), modo_rapido=True)
+fin = time.perf_counter()
+print(modelo - inicio, importado - modelo, fin - importado, con_flet)
+"""
+
+
+def medir_arranque(repeticiones=9):
+    """Milisegundos de (importar pokemon, importar interfaz, primera pantalla).
+
+    Cada repetición es un intérprete nuevo, para que nada esté ya importado,
+    y se devuelve la mediana de cada tiempo. Falla si importar el modelo
+    carga Flet.
+    """
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    muestras = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", _ARRANQUE], cwd=directorio, check=True,
+                                capture_output=True, text=True).stdout.split()
+        if salida[3] != "False":
+            raise RuntimeError("importar pokemon no debería cargar flet")
+        muestras.append([float(s) * 1e3 for s in salida[:3]])
+    return tuple(statistics.median(tiempos) for tiempos in zip(*muestras))
+
+
+def _calibrado(funcion):
+    """(resultado de `funcion`, calibración media medida justo antes y después)."""
+    antes = medir_calibracion()
+    resultado = funcion()
+    return resultado, (antes + medir_calibracion()) / 2
+
+
+def _normalizado(metrica):
+    """Valor corregido por su calibración, para ordenar muestras de distintas corridas."""
+    valor = metrica["valor"]
+    calibracion = metrica.get("calibracion_us")
+    if calibracion is None:
+        return valor
+    if metrica["unidad"] in UNIDADES_TIEMPO:
+        return valor / calibracion
+    if metrica["unidad"] in UNIDADES_RITMO:
+        return valor * calibracion
+    return valor
+
+
+def ejecutar(corridas=1):
+    """Corre todos los benchmarks; devuelve nombre -> {valor, unidad, mejor[, calibracion_us]}.
+
+    Con varias corridas, cada métrica es la de la corrida mediana (según su
+    valor calibrado), con su propia calibración.
+    """
+    resultados = [_ejecutar_una() for _ in range(corridas)]
+    combinado = {}
+    for nombre in resultados[0]:
+        muestras = sorted((r[nombre] for r in resultados), key=_normalizado)
+        combinado[nombre] = muestras[len(muestras) // 2]
+    return combinado
+
+
+def _ejecutar_una():
+    """Una corrida de todos los benchmarks.
+
+    Cada tiempo medido en este proceso lleva la calibración tomada a su
+    alrededor: la máquina puede cambiar de ritmo a mitad de la ejecución.
+    """
+    # nombre -> (valor, unidad, mejor, calibración o None)
+    metricas = {}
+    for nombre, funcion, unidad, mejor in (
+        ("atacar_us", medir_atacar, "us/ataque", MENOR),
+        ("batallas_por_segundo", medir_batallas, "batallas/s", MAYOR),
+        ("equipos_por_segundo", medir_equipos, "batallas/s", MAYOR),
+        ("planificador_por_segundo", medir_planificador, "acciones/s", MAYOR),
+        ("ia_decisiones_por_segundo", medir_ia, "decisiones/s", MAYOR),
+        ("repeticiones_por_segundo", medir_repeticiones, "repeticiones/s", MAYOR),
+    ):
+        metricas[nombre] = (*_calibrado(funcion), unidad, mejor)
+    bloques, tamano = medir_asignaciones()
+    metricas["crear_pokemon_bloques"] = (bloques, None, "bloques/llamada", MENOR)
+    metricas["crear_pokemon_bytes"] = (tamano, None, "bytes/llamada", MENOR)
+    pantallas, calibracion = _calibrado(medir_pantallas)
+    for pantalla, (ms, controles) in pantallas.items():
+        metricas[f"pantalla_{pantalla}_ms"] = (ms, calibracion, "ms", MENOR)
+        metricas[f"pantalla_{pantalla}_controles"] = (controles, None, "controles", MENOR)
+    # En un intérprete nuevo: la calibración de este proceso no les aplica
+    modelo, interfaz, primera = medir_arranque()
+    metricas["arranque_modelo_ms"] = (modelo, None, "ms", MENOR)
+    metricas["arranque_interfaz_ms"] = (interfaz, None, "ms", MENOR)
+    metricas["arranque_primera_pantalla_ms"] = (primera, None, "ms", MENOR)
+
+    resultado = {}
+    for nombre, (valor, calibracion, unidad, mejor) in metricas.items():
+        resultado[nombre] = {"valor": valor, "unidad": unidad, "mejor": mejor}
+        if calibracion is not None:
+            resultado[nombre]["calibracion_us"] = calibracion
+    return resultado
+
+
+def comparar(actuales, base, umbral=0.25, tolerancias=TOLERANCIAS):
+    """Filas (nombre, base, actual, cambio relativo, regresión?).
+
+    El cambio es positivo cuando la métrica empeora, sea cual sea su sentido,
+    y es regresión si supera `tolerancias[nombre]` o, sin ella, `umbral`.
+    Las métricas con calibración se corrigen por ella: si la máquina va un
+    30 % más lenta que al guardar la línea base, eso no cuenta como regresión.
+    """
+    filas = []
+    for nombre, actual in actuales.items():
+        anterior = base.get(nombre)
+        if anterior is None or not anterior["valor"]:
+            filas.append((nombre, None, actual["valor"], None, False))
+            continue
+        valor = actual["valor"]
+        if "calibracion_us" in actual and "calibracion_us" in anterior:
+            escala = anterior["calibracion_us"] / actual["calibracion_us"]
+            if actual["unidad"] in UNIDADES_TIEMPO:
+                valor *= escala
+            elif actual["unidad"] in UNIDADES_RITMO:
+                valor /= escala
+        cambio = (valor - anterior["valor"]) / anterior["valor"]
+        if actual["mejor"] == MAYOR:
+            cambio = -cambio
+        tolerancia = tolerancias.get(nombre, umbral)
+        filas.append((nombre, anterior["valor"], actual["valor"], cambio, cambio > tolerancia))
+    return filas
+
+
+def cargar_base(ruta=RUTA_BASE):
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def guardar_base(metricas, ruta=RUTA_BASE):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(metricas, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def formatear(filas):
+    """Líneas de texto, una por fila de `comparar`."""
+    lineas = []
+    for nombre, anterior, actual, cambio, regresion in filas:
+        if cambio is None:
+            lineas.append(f"{nombre:<28} {'-':>12} {actual:>12.2f}   (sin línea base)")
+            continue
+        marca = "  REGRESIÓN" if regresion else ""
+        lineas.append(f"{nombre:<28} {anterior:>12.2f} {actual:>12.2f} {cambio:+8.1%}{marca}")
+    return lineas
+
+
+if __name__ == "__main__":
+    import pytest
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guardar", action="store_true", help="guarda los resultados como línea base")
+    parser.add_argument("--umbral", type=float, default=0.25,
+                        help="empeoramiento relativo tolerado por las métricas sin "
+                             "tolerancia propia (0.25 = 25 %%)")
+    parser.add_argument("--base", default=RUTA_BASE)
+    parser.add_argument("--corridas", type=int, default=3,
+                        help="corridas completas; se usa la mediana de cada métrica")
+    args = parser.parse_args()
+
+    pruebas = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_rendimiento.py")
+    opciones = ["-q", "-m", "rendimiento", "--rendimiento", f"--umbral={args.umbral}",
+                f"--corridas={args.corridas}", f"--ruta-base={args.base}"]
+    if args.guardar:
+        opciones.append("--guardar-base")
+    sys.exit(pytest.main([pruebas, *opciones]))
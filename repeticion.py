@@ -0,0 +1,243 @@
+"""Repeticiones: batallas grabadas como semillas más acciones del jugador.
+
+Una batalla es determinista si se conocen las semillas de los generadores de
+cada lado, la estrategia del rival y los ataques que eligió el jugador: nada
+más en el motor es aleatorio. Una `Repeticion` guarda eso y el resultado
+esperado (ganador, turnos, HP final y una huella del registro de ataques),
+así que volver a simularla comprueba que hoy el juego hace lo mismo que
+cuando se jugó.
+
+Se guardan en archivos JSON Lines, una repetición por línea. La interfaz las
+graba con `python interfaz.py --grabar RUTA` y las reproduce con
+`--repeticion RUTA`.
+
+    python repeticion.py grabar repeticiones.jsonl --batallas 5000 --ia voraz
+    python repeticion.py verificar repeticiones.jsonl
+"""
+import argparse
+import hashlib
+import json
+import random
+import struct
+import sys
+import threading
+import time
+
+from ia import ALEATORIA, crear_estrategia, describir_estrategia
+from motor import JUGADOR, RIVAL, Batalla, semillas_batalla
+from pokemon import CATALOGO, crear_pokemon, devolver_pokemon
+
+VERSION = 1
+_ENTRADA_REGISTRO = struct.Struct("<BBH")
+
+
+def huella_registro(registro):
+    """Resumen corto del registro (lado, indice_ataque, dano) de una batalla."""
+    resumen = hashlib.sha256()
+    for lado, indice, dano in registro:
+        resumen.update(_ENTRADA_REGISTRO.pack(lado, indice, dano))
+    return resumen.hexdigest()[:16]
+
+
+class AccionesGrabadas:
+    """Estrategia que repite, en orden, los índices de ataque grabados."""
+
+    def __init__(self, acciones):
+        self.acciones = acciones
+        self.siguiente = 0
+
+    def __call__(self, atacante, defensor, rng):
+        if self.siguiente >= len(self.acciones):
+            raise ValueError("La repetición no tiene más acciones del jugador")
+        indice = self.acciones[self.siguiente]
+        self.siguiente += 1
+        return atacante.ataques[indice]
+
+
+class Repeticion:
+    def __init__(self, jugador, rival, semillas, estrategia_rival, acciones,
+                 ganador=None, turnos=0, hp_final=None, huella=None):
+        self.jugador = jugador
+        self.rival = rival
+        # Semillas de los generadores (jugador, rival) de la batalla
+        self.semillas = tuple(semillas)
+        # Descripción de la estrategia del rival (ver ia.describir_estrategia)
+        self.estrategia_rival = estrategia_rival
+        # Índices de los ataques del jugador, en orden
+        self.acciones = list(acciones)
+        self.ganador = ganador
+        self.turnos = turnos
+        self.hp_final = None if hp_final is None else tuple(hp_final)
+        self.huella = huella
+
+    @classmethod
+    def desde_batalla(cls, batalla, semillas, estrategia_rival):
+        """Graba una batalla terminada que empezó con HP completo y `registrar=True`."""
+        if batalla.registro is None or len(batalla.registro) != batalla.turnos:
+            raise ValueError("Solo se puede grabar una batalla registrada desde su primer turno")
+        jugador, rival = batalla.pokemon
+        return cls(
+            jugador.nombre, rival.nombre, semillas, describir_estrategia(estrategia_rival),
+            [indice for lado, indice, _ in batalla.registro if lado == JUGADOR],
+            batalla.ganador(), batalla.turnos, (jugador.hp_actual, rival.hp_actual),
+            huella_registro(batalla.registro),
+        )
+
+    def crear_batalla(self, estrategia_rival=None, registrar=True):
+        """Batalla lista para jugarse igual que la grabada, con HP completo."""
+        if estrategia_rival is None:
+            estrategia_rival = crear_estrategia(**self.estrategia_rival)
+        return Batalla(
+            crear_pokemon(self.jugador), crear_pokemon(self.rival),
+            random.Random(self.semillas[JUGADOR]), random.Random(self.semillas[RIVAL]),
+            AccionesGrabadas(self.acciones), estrategia_rival, registrar,
+        )
+
+    def a_dict(self):
+        return {
+            "version": VERSION,
+            "jugador": self.jugador,
+            "rival": self.rival,
+            "semillas": list(self.semillas),
+            "estrategia_rival": self.estrategia_rival,
+            "acciones": self.acciones,
+            "ganador": self.ganador,
+            "turnos": self.turnos,
+            "hp_final": None if self.hp_final is None else list(self.hp_final),
+            "huella": self.huella,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        version = datos.get("version")
+        if version != VERSION:
+            raise ValueError(f"Versión de repetición no soportada: {version}")
+        return cls(datos["jugador"], datos["rival"], datos["semillas"], datos["estrategia_rival"],
+                   datos["acciones"], datos["ganador"], datos["turnos"], datos["hp_final"],
+                   datos["huella"])
+
+
+def resimular(repeticion, estrategia_rival=None):
+    """Vuelve a jugar la repetición; devuelve la lista de diferencias (vacía si coincide).
+
+    Cada diferencia es (campo, esperado, obtenido).
+    """
+    try:
+        # Falla si alguna especie ya no está en el catálogo
+        batalla = repeticion.crear_batalla(estrategia_rival)
+    except ValueError as error:
+        return [("error", None, str(error))]
+    try:
+        # Un turno de margen para detectar batallas que ahora duran más
+        batalla.jugar(max_turnos=repeticion.turnos + 1)
+    except (ValueError, IndexError) as error:
+        return [("error", None, str(error))]
+    finally:
+        for pokemon in batalla.pokemon:
+            devolver_pokemon(pokemon)
+
+    obtenido = {
+        "ganador": batalla.ganador(),
+        "turnos": batalla.turnos,
+        "hp_final": tuple(p.hp_actual for p in batalla.pokemon),
+        "huella": huella_registro(batalla.registro),
+    }
+    return [(campo, getattr(repeticion, campo), valor)
+            for campo, valor in obtenido.items() if getattr(repeticion, campo) != valor]
+
+
+def verificar(repeticiones):
+    """Resimula todas; devuelve (comprobadas, [(posición, diferencias), ...])."""
+    # Una instancia por estrategia distinta, para aprovechar su caché
+    estrategias = {}
+    divergencias = []
+    comprobadas = 0
+    for posicion, repeticion in enumerate(repeticiones):
+        clave = json.dumps(repeticion.estrategia_rival, sort_keys=True)
+        if clave not in estrategias:
+            try:
+                estrategias[clave] = crear_estrategia(**repeticion.estrategia_rival)
+            except (ValueError, TypeError, OSError) as error:
+                # Una estrategia que ya no existe (o con opciones que ya no
+                # acepta) es una diferencia de esa repetición, no un fallo de todas
+                estrategias[clave] = error
+        estrategia = estrategias[clave]
+        if isinstance(estrategia, Exception):
+            diferencias = [("error", None, str(estrategia))]
+        else:
+            diferencias = resimular(repeticion, estrategia)
+        if diferencias:
+            divergencias.append((posicion, diferencias))
+        comprobadas += 1
+    return comprobadas, divergencias
+
+
+class ArchivoRepeticiones:
+    """Archivo JSON Lines al que se añaden repeticiones; se puede usar desde varios hilos."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def guardar(self, repeticion):
+        linea = json.dumps(repeticion.a_dict(), ensure_ascii=False, separators=(",", ":"))
+        with self._lock, open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+    def leer(self):
+        with open(self.ruta, encoding="utf-8") as f:
+            for linea in f:
+                if linea.strip():
+                    yield Repeticion.desde_dict(json.loads(linea))
+
+
+def grabar_batallas(n, semilla=0, estrategia_rival=None, nombres=None):
+    """Juega n batallas sin interfaz (jugador al azar) y devuelve sus repeticiones."""
+    estrategia_rival = estrategia_rival or crear_estrategia(ALEATORIA)
+    nombres = list(nombres or CATALOGO)
+    rng = random.Random(semilla)
+    repeticiones = []
+    for _ in range(n):
+        semillas = semillas_batalla(rng.getrandbits(64))
+        jugador = crear_pokemon(rng.choice(nombres))
+        rival = crear_pokemon(rng.choice(nombres))
+        batalla = Batalla(jugador, rival, random.Random(semillas[JUGADOR]),
+                          random.Random(semillas[RIVAL]), estrategia_rival=estrategia_rival)
+        batalla.jugar()
+        repeticiones.append(Repeticion.desde_batalla(batalla, semillas, estrategia_rival))
+        devolver_pokemon(jugador)
+        devolver_pokemon(rival)
+    return repeticiones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    modos = parser.add_subparsers(dest="modo", required=True)
+    grabar = modos.add_parser("grabar", help="graba batallas simuladas")
+    grabar.add_argument("ruta")
+    grabar.add_argument("--batallas", type=int, default=1000)
+    grabar.add_argument("--semilla", type=int, default=0)
+    grabar.add_argument("--ia", default=ALEATORIA, help="estrategia del rival (ver ia.py)")
+    comprobar = modos.add_parser("verificar", help="resimula las repeticiones de un archivo")
+    comprobar.add_argument("ruta")
+    comprobar.add_argument("--mostrar", type=int, default=20,
+                           help="divergencias que se listan como mucho")
+    args = parser.parse_args()
+
+    archivo = ArchivoRepeticiones(args.ruta)
+    if args.modo == "grabar":
+        for repeticion in grabar_batallas(args.batallas, args.semilla, crear_estrategia(args.ia)):
+            archivo.guardar(repeticion)
+        print(f"{args.batallas} repeticiones añadidas a {args.ruta}")
+        sys.exit(0)
+
+    inicio = time.perf_counter()
+    comprobadas, divergencias = verificar(archivo.leer())
+    segundos = time.perf_counter() - inicio
+    print(f"{comprobadas} repeticiones en {segundos:.2f} s "
+          f"({comprobadas / max(segundos, 1e-9):,.0f}/s), {len(divergencias)} divergentes")
+    for posicion, diferencias in divergencias[:args.mostrar]:
+        detalle = "; ".join(f"{campo}: esperado {esperado!r}, obtenido {obtenido!r}"
+                            for campo, esperado, obtenido in diferencias)
+        print(f"  línea {posicion + 1}: {detalle}")
+    sys.exit(1 if divergencias else 0)
@@ -0,0 +1,189 @@
+"""Juego óptimo exacto para cada enfrentamiento del catálogo de especies.
+
+Expectiminimax sobre los estados (HP del jugador, HP del rival, turno) de un
+par de especies. El jugador elige el ataque que maximiza su probabilidad de
+ganar; el rival es un nodo de azar que elige uniformemente, como en la
+interfaz, o un adversario que minimiza (`rival=OPTIMO`). Los valores ya
+calculados se guardan en una tabla de transposición indexada por un entero
+que codifica el estado.
+
+El resultado se exporta a JSON y `TablaPolitica` lo carga para consultar en
+O(1) el mejor ataque de cualquier estado durante la partida.
+
+    python resolvedor.py politica.json
+"""
+import json
+import sys
+from array import array
+from fractions import Fraction
+
+from motor import JUGADOR, RIVAL
+from pokemon import CATALOGO, crear_pokemon
+
+# Cómo juega el rival; ALEATORIA es también el nombre de la estrategia al azar
+# en ia.py, que es justo la que se supone
+ALEATORIA = "aleatoria"
+OPTIMO = "optimo"
+# Nombre que tenía ALEATORIA en tablas y repeticiones más antiguas
+_ALEATORIA_ANTIGUA = "aleatorio"
+
+
+def modelo_rival(nombre):
+    """Nombre canónico de un modelo de rival; ValueError si no existe."""
+    if nombre == _ALEATORIA_ANTIGUA:
+        return ALEATORIA
+    if nombre not in (ALEATORIA, OPTIMO):
+        raise ValueError(f"Modelo de rival desconocido: {nombre!r}")
+    return nombre
+
+
+class SolucionPar:
+    def __init__(self, nombres, hp_max, politica, probabilidad):
+        self.nombres = nombres
+        self.hp_max = hp_max
+        # Índices hp_jugador * (hp_max_rival + 1) + hp_rival, con el jugador por mover
+        self.politica = politica
+        self.probabilidad = probabilidad
+
+    def _indice(self, hp_jugador, hp_rival):
+        return hp_jugador * (self.hp_max[RIVAL] + 1) + hp_rival
+
+    def mejor_ataque(self, hp_jugador, hp_rival):
+        return self.politica[self._indice(hp_jugador, hp_rival)]
+
+    def probabilidad_victoria(self, hp_jugador=None, hp_rival=None):
+        """Probabilidad exacta de ganar desde el estado dado (por defecto, el inicial)."""
+        hp_jugador = self.hp_max[JUGADOR] if hp_jugador is None else hp_jugador
+        hp_rival = self.hp_max[RIVAL] if hp_rival is None else hp_rival
+        return self.probabilidad[self._indice(hp_jugador, hp_rival)]
+
+
+def resolver_par(nombre_jugador, nombre_rival, rival=ALEATORIA, exacto=True):
+    """Resuelve todos los estados con el jugador por mover para un par de especies."""
+    jugador = crear_pokemon(nombre_jugador)
+    oponente = crear_pokemon(nombre_rival)
+    danos_jugador = [jugador.calcular_dano(a, oponente)[0] for a in jugador.ataques]
+    danos_rival = [oponente.calcular_dano(a, jugador)[0] for a in oponente.ataques]
+    # Con ataques de daño 0 habría ciclos entre estados y el juego podría no terminar
+    if min(danos_jugador + danos_rival) <= 0:
+        raise ValueError(f"{nombre_jugador} vs {nombre_rival}: hay ataques sin daño")
+
+    uno, cero = (Fraction(1), Fraction(0)) if exacto else (1.0, 0.0)
+    ancho = oponente.hp_max + 1
+    # Tabla de transposición: clave entera del estado -> (valor, ataque elegido)
+    tabla = {}
+
+    def valor(hp_j, hp_r, turno):
+        clave = (hp_j * ancho + hp_r) * 2 + turno
+        guardado = tabla.get(clave)
+        if guardado is not None:
+            return guardado[0]
+
+        if turno == JUGADOR:
+            mejor, elegido, dano_elegido = None, -1, 0
+            for i, dano in enumerate(danos_jugador):
+                v = uno if hp_r - dano <= 0 else valor(hp_j, hp_r - dano, RIVAL)
+                # Ante empate, el ataque que más daña
+                if mejor is None or (v, dano) > (mejor, dano_elegido):
+                    mejor, elegido, dano_elegido = v, i, dano
+        elif rival == OPTIMO:
+            mejor, elegido, dano_elegido = None, -1, 0
+            for i, dano in enumerate(danos_rival):
+                v = cero if hp_j - dano <= 0 else valor(hp_j - dano, hp_r, JUGADOR)
+                if mejor is None or (v, -dano) < (mejor, -dano_elegido):
+                    mejor, elegido, dano_elegido = v, i, dano
+        else:
+            total = cero
+            for dano in danos_rival:
+                total += cero if hp_j - dano <= 0 else valor(hp_j - dano, hp_r, JUGADOR)
+            mejor, elegido = total / len(danos_rival), -1
+
+        tabla[clave] = (mejor, elegido)
+        return mejor
+
+    profundidad = jugador.hp_max // min(danos_rival) + oponente.hp_max // min(danos_jugador)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 2 * profundidad + 100))
+
+    politica = array("b", [-1]) * ((jugador.hp_max + 1) * ancho)
+    probabilidad = [cero] * len(politica)
+    for hp_j in range(1, jugador.hp_max + 1):
+        for hp_r in range(1, ancho):
+            indice = hp_j * ancho + hp_r
+            probabilidad[indice] = valor(hp_j, hp_r, JUGADOR)
+            politica[indice] = tabla[indice * 2 + JUGADOR][1]
+
+    return SolucionPar(
+        (nombre_jugador, nombre_rival),
+        (jugador.hp_max, oponente.hp_max),
+        politica,
+        probabilidad,
+    )
+
+
+def resolver_todos(nombres=None, rival=ALEATORIA, exacto=True):
+    nombres = list(nombres or CATALOGO)
+    return {
+        (a, b): resolver_par(a, b, rival, exacto)
+        for a in nombres
+        for b in nombres
+    }
+
+
+def exportar_tabla(soluciones, ruta, rival=ALEATORIA):
+    pares = {}
+    for (a, b), solucion in soluciones.items():
+        pares[f"{a}|{b}"] = {
+            "hp_max": list(solucion.hp_max),
+            "politica": list(solucion.politica),
+            "probabilidad": [round(float(p), 6) for p in solucion.probabilidad],
+            "victoria_exacta": str(solucion.probabilidad_victoria()),
+        }
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "rival": rival, "pares": pares}, f,
+                  ensure_ascii=False, separators=(",", ":"))
+
+
+class TablaPolitica:
+    """Tabla exportada por `exportar_tabla`, lista para consultas O(1)."""
+
+    def __init__(self, pares, rival=ALEATORIA):
+        self.rival = rival
+        self.pares = pares
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        pares = {}
+        for clave, entrada in datos["pares"].items():
+            a, b = clave.split("|")
+            pares[(a, b)] = SolucionPar(
+                (a, b),
+                tuple(entrada["hp_max"]),
+                array("b", entrada["politica"]),
+                array("d", entrada["probabilidad"]),
+            )
+        return cls(pares, modelo_rival(datos.get("rival", ALEATORIA)))
+
+    def mejor_ataque(self, nombre_atacante, nombre_defensor, hp_atacante, hp_defensor):
+        """Índice del mejor ataque para el Pokémon que mueve ahora."""
+        solucion = self.pares[(nombre_atacante, nombre_defensor)]
+        return solucion.mejor_ataque(hp_atacante, hp_defensor)
+
+    def probabilidad_victoria(self, nombre_atacante, nombre_defensor, hp_atacante, hp_defensor):
+        solucion = self.pares[(nombre_atacante, nombre_defensor)]
+        return solucion.probabilidad_victoria(hp_atacante, hp_defensor)
+
+    def estrategia(self, atacante, defensor, rng):
+        """Estrategia para motor.Batalla que juega según la tabla."""
+        indice = self.mejor_ataque(atacante.nombre, defensor.nombre,
+                                   atacante.hp_actual, defensor.hp_actual)
+        return atacante.ataques[indice]
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else "politica.json"
+    soluciones = resolver_todos()
+    exportar_tabla(soluciones, ruta)
+    for (a, b), solucion in soluciones.items():
+        print(f"{a:>10} vs {b:<10} {float(solucion.probabilidad_victoria()):.4f}")
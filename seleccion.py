@@ -0,0 +1,252 @@
+"""Cuadrícula virtualizada para elegir especie.
+
+Solo existen controles para las filas visibles: un conjunto fijo de cartas
+que se vuelven a rellenar con otra especie al desplazarse, en lugar de una
+carta por especie del catálogo. Las especies y sus sprites se leen del
+catálogo únicamente cuando su carta se muestra.
+
+La búsqueda por prefijo y el filtro por tipo usan los índices del catálogo.
+
+    python seleccion.py 1000 5000
+"""
+import flet as ft
+
+TODOS_LOS_TIPOS = "todos"
+
+
+class FiltroEspecies:
+    """Lista (posiblemente filtrada) de nombres, consultada por ventanas."""
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+        self.texto = ""
+        self.tipo = None
+        # None = sin filtro: la ventana se pide al catálogo sin listar todo
+        self._nombres = None
+
+    def filtrar(self, texto="", tipo=None):
+        self.texto = texto.strip()
+        self.tipo = None if tipo in (None, "", TODOS_LOS_TIPOS) else tipo
+        nombres = self.catalogo.por_prefijo(self.texto) if self.texto else None
+        if self.tipo is not None:
+            del_tipo = self.catalogo.por_tipo(self.tipo)
+            if nombres is None:
+                nombres = del_tipo
+            else:
+                permitidos = set(del_tipo)
+                nombres = [n for n in nombres if n in permitidos]
+        self._nombres = nombres
+
+    def __len__(self):
+        return len(self.catalogo) if self._nombres is None else len(self._nombres)
+
+    def ventana(self, desde, cantidad):
+        if self._nombres is None:
+            return self.catalogo.nombres(desde, cantidad)
+        return self._nombres[desde:desde + cantidad]
+
+
+class CartaEspecie:
+    """Controles de una carta; se reasignan a otra especie con `mostrar`."""
+
+    def __init__(self, al_elegir):
+        self.nombre = None
+        self.imagen = ft.Image(width=100, height=100)
+        self.nombre_text = ft.Text(size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK)
+        self.tipo_text = ft.Text(size=14, color=ft.Colors.BLACK)
+        self.hp_text = ft.Text(size=14, color=ft.Colors.BLACK)
+        self.boton = ft.ElevatedButton(
+            "ELEGIR",
+            on_click=lambda e: al_elegir(self.nombre),
+            color=ft.Colors.WHITE
+        )
+        self.contenedor = ft.Container(
+            content=ft.Column([
+                self.imagen,
+                self.nombre_text,
+                self.tipo_text,
+                self.hp_text,
+                self.boton,
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=10),
+            bgcolor=ft.Colors.WHITE,
+            border_radius=15,
+            padding=20,
+            width=200,
+            visible=False,
+        )
+
+    def mostrar(self, pokemon, src, color):
+        self.nombre = pokemon.nombre
+        self.imagen.src = src
+        self.nombre_text.value = pokemon.nombre
+        self.tipo_text.value = f"Tipo: {pokemon.tipo.upper()}"
+        self.hp_text.value = f"HP: {pokemon.hp_max}"
+        self.boton.bgcolor = color
+        self.contenedor.border = ft.border.all(3, color)
+        self.contenedor.visible = True
+
+    def ocultar(self):
+        self.nombre = None
+        self.contenedor.visible = False
+
+
+class CuadriculaSeleccion:
+    """Selector con `filas` x `columnas` cartas reutilizables.
+
+    `prototipo(nombre)` devuelve la plantilla de la especie (p. ej.
+    `CACHE_ESPECIES.prototipo`), `src_sprite(url)` el `src` de la imagen y
+    `color_tipo(tipo)` el color de la carta. Los cambios se marcan en
+    `actualizador` (un PlanificadorActualizaciones), si se indica.
+    """
+
+    def __init__(self, catalogo, prototipo, al_elegir, src_sprite=None, color_tipo=None,
+                 filas=2, columnas=4, actualizador=None):
+        self.filtro = FiltroEspecies(catalogo)
+        self.prototipo = prototipo
+        self.src_sprite = src_sprite or (lambda url: url)
+        self.color_tipo = color_tipo or (lambda tipo: ft.Colors.BLUE_400)
+        self.filas = filas
+        self.columnas = columnas
+        self.actualizador = None
+        self.primera_fila = 0
+
+        self.cartas = [CartaEspecie(al_elegir) for _ in range(filas * columnas)]
+        self.busqueda = ft.TextField(
+            label="Buscar", width=250, on_change=lambda e: self.aplicar_filtro(),
+        )
+        self.tipo_dropdown = ft.Dropdown(
+            label="Tipo",
+            width=180,
+            value=TODOS_LOS_TIPOS,
+            options=[ft.dropdown.Option(t) for t in [TODOS_LOS_TIPOS, *catalogo.tipos()]],
+            on_change=lambda e: self.aplicar_filtro(),
+        )
+        self.barra = ft.Slider(min=0, max=1, value=0, width=600,
+                               on_change=lambda e: self.ir_a_fila(int(e.control.value)))
+        self.posicion_text = ft.Text(color=ft.Colors.WHITE)
+        self.rejilla = ft.Column([
+            ft.Row([carta.contenedor for carta in self.cartas[f * columnas:(f + 1) * columnas]],
+                   alignment=ft.MainAxisAlignment.CENTER, spacing=20)
+            for f in range(filas)
+        ], spacing=20)
+        self.control = ft.Column([
+            ft.Row([self.busqueda, self.tipo_dropdown],
+                   alignment=ft.MainAxisAlignment.CENTER, spacing=20),
+            # La rueda del ratón desplaza fila a fila
+            ft.GestureDetector(content=self.rejilla, on_scroll=self._al_desplazar),
+            ft.Row([
+                ft.IconButton(ft.Icons.KEYBOARD_ARROW_UP, icon_color=ft.Colors.WHITE,
+                              on_click=lambda e: self.desplazar(-self.filas)),
+                self.barra,
+                ft.IconButton(ft.Icons.KEYBOARD_ARROW_DOWN, icon_color=ft.Colors.WHITE,
+                              on_click=lambda e: self.desplazar(self.filas)),
+            ], alignment=ft.MainAxisAlignment.CENTER),
+            self.posicion_text,
+        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=20)
+        self.refrescar()
+        # Antes de estar en la página no hay nada que enviar
+        self.actualizador = actualizador
+
+    @property
+    def total_filas(self):
+        return -(-len(self.filtro) // self.columnas)
+
+    def aplicar_filtro(self):
+        self.filtro.filtrar(self.busqueda.value or "", self.tipo_dropdown.value)
+        self.primera_fila = 0
+        self.refrescar()
+
+    def desplazar(self, filas):
+        self.ir_a_fila(self.primera_fila + filas)
+
+    def _al_desplazar(self, e):
+        if e.scroll_delta_y:
+            self.desplazar(1 if e.scroll_delta_y > 0 else -1)
+
+    def ir_a_fila(self, fila):
+        fila = max(0, min(fila, self.total_filas - self.filas))
+        if fila != self.primera_fila:
+            self.primera_fila = fila
+            self.refrescar()
+
+    def refrescar(self):
+        """Rellena las cartas visibles; también actualiza los sprites ya descargados."""
+        nombres = self.filtro.ventana(self.primera_fila * self.columnas, len(self.cartas))
+        for i, carta in enumerate(self.cartas):
+            if i < len(nombres):
+                pokemon = self.prototipo(nombres[i])
+                carta.mostrar(pokemon, self.src_sprite(pokemon.sprite_url),
+                              self.color_tipo(pokemon.tipo))
+            else:
+                carta.ocultar()
+
+        total = len(self.filtro)
+        self.barra.max = max(1, self.total_filas - self.filas)
+        self.barra.value = min(self.primera_fila, self.barra.max)
+        self.barra.disabled = self.total_filas <= self.filas
+        inicio = self.primera_fila * self.columnas
+        self.posicion_text.value = (
+            f"{inicio + 1}-{inicio + len(nombres)} de {total}" if nombres else "Sin resultados"
+        )
+        if self.actualizador is not None:
+            self.actualizador.marcar(self.rejilla, self.barra, self.posicion_text)
+
+
+def contar_controles(control):
+    """Número de controles del árbol que cuelga de `control`."""
+    total = 1
+    for hijo in control._get_children():
+        total += contar_controles(hijo)
+    return total
+
+
+def medir_seleccion(tamanos=(1000, 5000), repeticiones=5):
+    """Tiempo de construcción y controles de la cuadrícula frente a una carta por especie.
+
+    Devuelve filas (especies, modo, segundos, controles). "virtual" es esta
+    cuadrícula; "completa" construye una `CartaEspecie` por especie, como
+    hacía la pantalla original.
+    """
+    import time
+
+    from catalogo import CatalogoMemoria, generar_catalogo
+    from pokemon import CachePrototipos
+
+    resultados = []
+    for n in tamanos:
+        catalogo = CatalogoMemoria(generar_catalogo(n))
+
+        mejor = float("inf")
+        for _ in range(repeticiones):
+            cache = CachePrototipos(catalogo)
+            inicio = time.perf_counter()
+            cuadricula = CuadriculaSeleccion(catalogo, cache.prototipo, lambda nombre: None)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        resultados.append((n, "virtual", mejor, contar_controles(cuadricula.control)))
+
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            cuadricula.desplazar(1)
+        resultados.append((n, "desplazar", (time.perf_counter() - inicio) / repeticiones,
+                           contar_controles(cuadricula.control)))
+
+        cache = CachePrototipos(catalogo)
+        inicio = time.perf_counter()
+        cartas = []
+        for nombre in catalogo:
+            carta = CartaEspecie(lambda nombre: None)
+            pokemon = cache.prototipo(nombre)
+            carta.mostrar(pokemon, pokemon.sprite_url, ft.Colors.BLUE_400)
+            cartas.append(carta.contenedor)
+        completa = ft.Row(cartas, wrap=True)
+        resultados.append((n, "completa", time.perf_counter() - inicio,
+                           contar_controles(completa)))
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    tamanos = [int(a) for a in sys.argv[1:]] or [1000, 5000]
+    for n, modo, segundos, controles in medir_seleccion(tamanos):
+        print(f"{n:>6} especies  {modo:<10} {segundos * 1000:9.2f} ms  {controles:>7} controles")
@@ -0,0 +1,413 @@
+"""Modo servidor: sesiones aisladas, expulsión por inactividad y métricas.
+
+Cada jugador conectado tiene una `Sesion` con su propio generador aleatorio y
+su estado de batalla (Pokémon elegidos, flujo en curso), separada de la
+página de Flet que la muestra. `GestorSesiones` limita cuántas hay a la vez,
+expulsa las que llevan demasiado tiempo sin actividad y expone métricas:
+sesiones activas, turnos por segundo, percentiles de latencia de los
+manejadores y memoria por sesión.
+
+    python sesiones.py servidor --puerto 8550 --max-sesiones 200 --estados estados.sqlite
+    python sesiones.py carga --sesiones 500 --turnos 30
+"""
+import argparse
+import atexit
+import asyncio
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from estado import RngRegistrado
+
+
+# Entrada del almacenamiento del navegador con la clave de la sesión
+CLAVE_CLIENTE = "pokemon.sesion"
+
+
+class LimiteSesiones(RuntimeError):
+    """No caben más sesiones aunque se expulsen las inactivas."""
+
+
+def memoria_proceso():
+    """Bytes en uso: los de tracemalloc si está activo, si no el RSS; None si no se sabe."""
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not ordenados:
+        return None
+    indice = max(0, -(-len(ordenados) * p // 100) - 1)
+    return ordenados[int(indice)]
+
+
+class Metricas:
+    def __init__(self, ventana=10.0, muestras=2048, reloj=time.monotonic):
+        self.ventana = ventana
+        self.muestras = muestras
+        self.reloj = reloj
+        self.turnos_totales = 0
+        # Instantes de los turnos de la última `ventana` segundos
+        self._turnos = deque()
+        # nombre del manejador -> últimas latencias en segundos
+        self._latencias = {}
+        self._lock = threading.Lock()
+
+    def registrar_turno(self):
+        with self._lock:
+            self.turnos_totales += 1
+            self._turnos.append(self.reloj())
+
+    def registrar_latencia(self, nombre, segundos):
+        with self._lock:
+            latencias = self._latencias.get(nombre)
+            if latencias is None:
+                latencias = self._latencias[nombre] = deque(maxlen=self.muestras)
+            latencias.append(segundos)
+
+    def turnos_por_segundo(self):
+        with self._lock:
+            limite = self.reloj() - self.ventana
+            while self._turnos and self._turnos[0] < limite:
+                self._turnos.popleft()
+            return len(self._turnos) / self.ventana
+
+    def latencias(self, percentiles=(50, 95, 99)):
+        """nombre -> {"p50": ms, ..., "muestras": n}."""
+        with self._lock:
+            copias = {nombre: sorted(valores) for nombre, valores in self._latencias.items()}
+        resultado = {}
+        for nombre, ordenados in copias.items():
+            resultado[nombre] = {f"p{p}": percentil(ordenados, p) * 1000 for p in percentiles}
+            resultado[nombre]["muestras"] = len(ordenados)
+        return resultado
+
+
+class Sesion:
+    """Estado de un jugador, independiente de la página que lo muestra."""
+
+    def __init__(self, id_sesion=None, semilla=None, metricas=None, reloj=time.monotonic,
+                 clave=None):
+        self.id = id_sesion
+        # Clave con la que se guardan sus instantáneas; sobrevive a reconexiones
+        self.clave = clave or uuid.uuid4().hex
+        self.semilla = random.getrandbits(64) if semilla is None else semilla
+        # Registra sus extracciones para que quepa en una instantánea (ver estado.py)
+        self.rng = RngRegistrado(self.semilla)
+        self.metricas = metricas
+        self.reloj = reloj
+        self.creada = self.ultima_actividad = reloj()
+        self.turnos = 0
+
+        self.nombre_jugador = None
+        self.jugador_pokemon = None
+        self.rival_pokemon = None
+        self.flujo = None
+        # Batalla restaurada de una instantánea que la interfaz aún no ha retomado
+        self.batalla_pendiente = None
+
+        self.gestor = None
+        # Se llama con la sesión cuando el gestor la expulsa por inactividad;
+        # debe liberarla (el gestor ya la ha quitado de su lista)
+        self.al_expulsar = None
+        self._inicios = {}
+
+    def tocar(self):
+        self.ultima_actividad = self.reloj()
+
+    def inactiva_desde(self):
+        return self.reloj() - self.ultima_actividad
+
+    def crear_rngs(self):
+        """Generadores (jugador, rival) para una batalla, derivados del de la sesión."""
+        base = random.Random(self.rng.getrandbits(64))
+        return RngRegistrado(base.getrandbits(64)), RngRegistrado(base.getrandbits(64))
+
+    def registrar_turno(self):
+        self.turnos += 1
+        self.tocar()
+        if self.metricas is not None:
+            self.metricas.registrar_turno()
+
+    def iniciar_medicion(self, nombre):
+        self.tocar()
+        self._inicios[nombre] = time.perf_counter()
+
+    def terminar_medicion(self, nombre):
+        inicio = self._inicios.pop(nombre, None)
+        if inicio is not None and self.metricas is not None:
+            self.metricas.registrar_latencia(nombre, time.perf_counter() - inicio)
+
+    @contextmanager
+    def medir(self, nombre):
+        """Mide la latencia de un manejador completo."""
+        self.iniciar_medicion(nombre)
+        try:
+            yield
+        finally:
+            self.terminar_medicion(nombre)
+
+    def liberar(self):
+        """Cancela la batalla en curso y devuelve los Pokémon al pool."""
+        from pokemon import devolver_pokemon
+
+        if self.flujo is not None:
+            self.flujo.cancelar()
+            self.flujo = None
+        for pokemon in (self.jugador_pokemon, self.rival_pokemon):
+            if pokemon is not None:
+                devolver_pokemon(pokemon)
+        self.jugador_pokemon = None
+        self.rival_pokemon = None
+        self.batalla_pendiente = None
+
+    def cerrar(self):
+        self.liberar()
+        if self.gestor is not None:
+            self.gestor.quitar(self)
+
+
+class GestorSesiones:
+    def __init__(self, max_sesiones=500, inactividad=900.0, semilla=None,
+                 reloj=time.monotonic):
+        self.max_sesiones = max_sesiones
+        self.inactividad = inactividad
+        self.reloj = reloj
+        self.metricas = Metricas(reloj=reloj)
+        self.sesiones = {}
+        self.creadas = 0
+        self.expulsadas = 0
+        # Las semillas de sesión salen de aquí: con semilla fija, la carga es reproducible
+        self._semillas = random.Random(semilla)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._memoria_base = memoria_proceso()
+        self._vigilante = None
+
+    def __len__(self):
+        return len(self.sesiones)
+
+    def crear(self, clave=None):
+        if len(self.sesiones) >= self.max_sesiones:
+            self.expulsar_inactivas()
+        with self._lock:
+            if len(self.sesiones) >= self.max_sesiones:
+                raise LimiteSesiones(f"Ya hay {self.max_sesiones} sesiones activas")
+            sesion = Sesion(next(self._ids), self._semillas.getrandbits(64),
+                            self.metricas, self.reloj, clave)
+            sesion.gestor = self
+            self.sesiones[sesion.id] = sesion
+            self.creadas += 1
+        return sesion
+
+    def obtener(self, id_sesion):
+        return self.sesiones.get(id_sesion)
+
+    def quitar(self, sesion):
+        with self._lock:
+            self.sesiones.pop(sesion.id, None)
+
+    def expulsar_inactivas(self):
+        """Cierra las sesiones sin actividad en `inactividad` segundos; devuelve sus ids."""
+        with self._lock:
+            inactivas = [s for s in self.sesiones.values()
+                         if s.inactiva_desde() >= self.inactividad]
+        for sesion in inactivas:
+            self.quitar(sesion)
+            if sesion.al_expulsar is not None:
+                # La dueña de la sesión la libera desde su propio bucle de eventos
+                sesion.al_expulsar(sesion)
+            else:
+                sesion.liberar()
+            self.expulsadas += 1
+        return [sesion.id for sesion in inactivas]
+
+    def iniciar_vigilancia(self, intervalo=30.0, al_informar=None):
+        """Hilo que expulsa sesiones inactivas cada `intervalo` segundos.
+
+        `al_informar(metricas)`, si se indica, recibe las métricas en cada vuelta.
+        """
+        if self._vigilante is not None:
+            return
+
+        def vigilar():
+            while True:
+                time.sleep(intervalo)
+                self.expulsar_inactivas()
+                if al_informar is not None:
+                    al_informar(self.estadisticas())
+
+        self._vigilante = threading.Thread(target=vigilar, name="sesiones", daemon=True)
+        self._vigilante.start()
+
+    def memoria_por_sesion(self):
+        actual = memoria_proceso()
+        if actual is None or self._memoria_base is None or not self.sesiones:
+            return None
+        return max(0, actual - self._memoria_base) / len(self.sesiones)
+
+    def estadisticas(self):
+        return {
+            "sesiones_activas": len(self.sesiones),
+            "sesiones_creadas": self.creadas,
+            "sesiones_expulsadas": self.expulsadas,
+            "turnos_totales": self.metricas.turnos_totales,
+            "turnos_por_segundo": self.metricas.turnos_por_segundo(),
+            "latencias_ms": self.metricas.latencias(),
+            "memoria_por_sesion": self.memoria_por_sesion(),
+        }
+
+
+async def _jugador_simulado(sesion, turnos, pausa):
+    from flujo_batalla import FlujoBatalla
+    from motor import Batalla
+    from pokemon import CATALOGO, crear_pokemon
+
+    nombres = list(CATALOGO)
+    jugados = 0
+    while jugados < turnos:
+        sesion.jugador_pokemon = crear_pokemon(sesion.rng.choice(nombres))
+        sesion.rival_pokemon = crear_pokemon(sesion.rng.choice(nombres))
+        fin = asyncio.Event()
+
+        def al_atacar(lado, ataque, dano, efectividad):
+            # Latencia hasta que el ataque del jugador se aplica, como en la interfaz
+            if lado == 0:
+                sesion.terminar_medicion("ataque")
+
+        sesion.flujo = FlujoBatalla(
+            Batalla(sesion.jugador_pokemon, sesion.rival_pokemon,
+                    *sesion.crear_rngs(), registrar=False),
+            al_atacar=al_atacar,
+            al_terminar=lambda ganador: fin.set(),
+            al_esperar=lambda: None,
+            pausa=pausa,
+            modo_rapido=pausa == 0,
+        )
+        while not fin.is_set() and jugados < turnos:
+            sesion.iniciar_medicion("ataque")
+            await sesion.flujo.turno(sesion.rng.choice(sesion.jugador_pokemon.ataques))
+            sesion.registrar_turno()
+            jugados += 1
+            # Cede el bucle aunque no haya pausas, como haría un cliente real
+            await asyncio.sleep(0)
+        sesion.liberar()
+
+
+async def generar_carga(n_sesiones=200, turnos=20, pausa=0.0, inactividad=0.5, semilla=0):
+    """Simula `n_sesiones` jugadores a la vez sobre un mismo bucle de eventos.
+
+    Devuelve (estadísticas al terminar de jugar, sesiones expulsadas después).
+    Las sesiones no se cierran al acabar: quedan inactivas y se comprueba que
+    el gestor las expulsa pasado `inactividad`.
+    """
+    gestor = GestorSesiones(max_sesiones=n_sesiones, inactividad=inactividad, semilla=semilla)
+    sesiones = [gestor.crear() for _ in range(n_sesiones)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_jugador_simulado(s, turnos, pausa) for s in sesiones))
+    duracion = time.perf_counter() - inicio
+    estadisticas = gestor.estadisticas()
+    # La carga puede durar menos que la ventana de la métrica: se usa la media real
+    estadisticas["duracion"] = duracion
+    estadisticas["turnos_por_segundo"] = gestor.metricas.turnos_totales / duracion
+    await asyncio.sleep(inactividad)
+    expulsadas = gestor.expulsar_inactivas()
+    return estadisticas, len(expulsadas)
+
+
+def abrir_sesion(gestor, almacen=None, clave=None):
+    """Crea la sesión de una conexión, retomando su instantánea si `almacen` la tiene."""
+    datos = almacen.cargar(clave) if almacen is not None and clave else None
+    sesion = gestor.crear(clave if datos is not None else None)
+    if datos is not None:
+        from estado import restaurar_sesion
+
+        sesion.batalla_pendiente = restaurar_sesion(datos, sesion)
+    return sesion
+
+
+def servir(puerto=8550, max_sesiones=500, inactividad=900.0, intervalo=30.0, ruta_estados=None,
+           ia="aleatoria"):
+    """Lanza la interfaz como aplicación web con una sesión por conexión.
+
+    Con `ruta_estados` (un SQLite compartido) cada sesión se guarda tras cada
+    turno y un cliente que reconecta, a este o a otro proceso, la retoma.
+    """
+    import flet as ft
+
+    from estado import AlmacenSQLite
+    from ia import crear_estrategia
+    from interfaz import PokemonBatallaApp
+    from sprites import DIRECTORIO_ASSETS, GestorSprites
+
+    gestor = GestorSesiones(max_sesiones, inactividad)
+    sprites = GestorSprites(sin_red=os.environ.get("POKEMON_SIN_RED") == "1")
+    atexit.register(sprites.cerrar)
+    almacen = AlmacenSQLite(ruta_estados) if ruta_estados else None
+    # Una sola instancia para todas las sesiones: comparten la caché de decisiones
+    estrategia_rival = crear_estrategia(ia)
+
+    def main(page: ft.Page):
+        clave = page.client_storage.get(CLAVE_CLIENTE) if almacen is not None else None
+        try:
+            sesion = abrir_sesion(gestor, almacen, clave)
+        except LimiteSesiones:
+            page.add(ft.Text("El servidor está lleno, inténtalo más tarde."))
+            return
+        if almacen is not None and sesion.clave != clave:
+            page.client_storage.set(CLAVE_CLIENTE, sesion.clave)
+        PokemonBatallaApp(page, sprites=sprites, sesion=sesion, almacen=almacen,
+                          estrategia_rival=estrategia_rival)
+
+    gestor.iniciar_vigilancia(intervalo, al_informar=lambda m: print(json.dumps(m), flush=True))
+    ft.app(target=main, view=ft.AppView.WEB_BROWSER, port=puerto, assets_dir=DIRECTORIO_ASSETS)
+
+
+if __name__ == "__main__":
+    from ia import ESTRATEGIAS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    modos = parser.add_subparsers(dest="modo", required=True)
+    servidor = modos.add_parser("servidor")
+    servidor.add_argument("--puerto", type=int, default=8550)
+    servidor.add_argument("--max-sesiones", type=int, default=500)
+    servidor.add_argument("--inactividad", type=float, default=900.0,
+                          help="segundos sin actividad antes de expulsar una sesión")
+    servidor.add_argument("--intervalo", type=float, default=30.0,
+                          help="segundos entre revisiones e informes de métricas")
+    servidor.add_argument("--estados", metavar="RUTA",
+                          help="SQLite compartido para retomar sesiones tras reconectar")
+    servidor.add_argument("--ia", default="aleatoria", choices=ESTRATEGIAS,
+                          help="estrategia del rival")
+    carga = modos.add_parser("carga")
+    carga.add_argument("--sesiones", type=int, default=200)
+    carga.add_argument("--turnos", type=int, default=20, help="turnos por sesión")
+    carga.add_argument("--pausa", type=float, default=0.0)
+    carga.add_argument("--semilla", type=int, default=0)
+    carga.add_argument("--memoria", action="store_true",
+                       help="mide la memoria con tracemalloc en lugar del RSS")
+    args = parser.parse_args()
+
+    if args.modo == "servidor":
+        servir(args.puerto, args.max_sesiones, args.inactividad, args.intervalo, args.estados,
+               args.ia)
+    else:
+        if args.memoria:
+            tracemalloc.start()
+        estadisticas, expulsadas = asyncio.run(
+            generar_carga(args.sesiones, args.turnos, args.pausa, semilla=args.semilla))
+        print(json.dumps(estadisticas, indent=2))
+        print(f"Expulsadas por inactividad: {expulsadas}/{args.sesiones}")
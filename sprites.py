@@ -0,0 +1,197 @@
+"""Caché local de sprites.
+
+Las imágenes de `sprite_url` se descargan una vez a un directorio de assets de
+Flet y se guardan con el hash SHA-256 de su contenido como nombre, así que dos
+URLs con la misma imagen comparten archivo. Un índice JSON recuerda qué URL
+corresponde a cada archivo y en qué orden se usaron, para expulsar las menos
+recientes cuando se supera el tamaño máximo. El índice se escribe al
+descargar; el orden de uso cambia en memoria y se escribe unos segundos
+después o al llamar a `cerrar`, nunca desde `resolver`.
+
+En modo sin red nunca se descarga nada: solo se sirve lo que ya está en disco.
+"""
+import hashlib
+import json
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DIRECTORIO_ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+class GestorSprites:
+    def __init__(self, directorio_assets=DIRECTORIO_ASSETS, subdirectorio="sprites",
+                 max_bytes=50 * 1024 * 1024, sin_red=False, timeout=10, retardo_guardado=5.0):
+        self.directorio_assets = directorio_assets
+        self.subdirectorio = subdirectorio
+        self.directorio = os.path.join(directorio_assets, subdirectorio)
+        self.max_bytes = max_bytes
+        self.sin_red = sin_red
+        self.timeout = timeout
+        self.retardo_guardado = retardo_guardado
+        self._ruta_indice = os.path.join(self.directorio, "indice.json")
+        self._lock = threading.Lock()
+        # url -> {"archivo": ..., "bytes": ...}; el orden es el de uso (LRU al principio)
+        self._indice = OrderedDict()
+        # url -> Future de la descarga en curso
+        self._pendientes = {}
+        self._executor = None
+        # El orden de uso cambió y el índice en disco no lo refleja todavía
+        self._sucio = False
+        self._temporizador = None
+        self._cargar_indice()
+
+    def resolver(self, url, descargar=True):
+        """Devuelve el `src` para ft.Image: el asset local si existe.
+
+        Si no está en caché y hay red, se devuelve la URL original y la
+        descarga sigue en segundo plano (si `descargar`), para no bloquear la
+        interfaz; la próxima vez ya se sirve en local.
+        """
+        if not url:
+            return url
+        with self._lock:
+            entrada = self._indice.get(url)
+            if entrada is not None:
+                if next(reversed(self._indice)) != url:
+                    self._indice.move_to_end(url)
+                    self._marcar_sucio()
+                return f"/{self.subdirectorio}/{entrada['archivo']}"
+        if descargar and not self.sin_red:
+            self.precargar([url], esperar=False)
+        return url
+
+    def guardar(self):
+        """Escribe el índice si el orden de uso cambió desde la última escritura."""
+        with self._lock:
+            self._temporizador = None
+            if self._sucio:
+                self._guardar_indice()
+
+    def cerrar(self):
+        """Guarda el orden de uso pendiente y termina las descargas en curso."""
+        with self._lock:
+            temporizador, self._temporizador = self._temporizador, None
+            executor, self._executor = self._executor, None
+        if temporizador is not None:
+            temporizador.cancel()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self.guardar()
+
+    def esta_en_cache(self, url):
+        with self._lock:
+            return url in self._indice
+
+    def descargar(self, url):
+        """Descarga una URL a la caché; devuelve False si no fue posible.
+
+        Una imagen mayor que `max_bytes` no se guarda (vaciaría la caché entera).
+        """
+        resultados = self.precargar([url])
+        return resultados[0] if resultados else self.esta_en_cache(url)
+
+    def precargar(self, urls, esperar=True, hilos=4):
+        """Descarga en paralelo las URLs que aún no están en caché.
+
+        Con `esperar` devuelve una lista de booleanos; si no, los futuros.
+        """
+        if self.sin_red:
+            return []
+        futuros = []
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(hilos, thread_name_prefix="sprites")
+            for url in dict.fromkeys(urls):
+                if not url or url in self._indice:
+                    continue
+                # Una URL que ya se está descargando no se pide dos veces
+                futuro = self._pendientes.get(url)
+                if futuro is None:
+                    futuro = self._executor.submit(self._descargar, url)
+                    self._pendientes[url] = futuro
+                futuros.append(futuro)
+        if esperar:
+            return [f.result() for f in futuros]
+        return futuros
+
+    def _descargar(self, url):
+        try:
+            try:
+                with urllib.request.urlopen(url, timeout=self.timeout) as respuesta:
+                    contenido = respuesta.read()
+            except (OSError, ValueError):
+                # ValueError: URL mal formada o de un esquema que urllib no conoce
+                return False
+            if len(contenido) > self.max_bytes:
+                return False
+
+            archivo = hashlib.sha256(contenido).hexdigest() + _extension(url)
+            ruta = os.path.join(self.directorio, archivo)
+            if not os.path.exists(ruta):
+                temporal = f"{ruta}.{threading.get_ident()}.tmp"
+                with open(temporal, "wb") as f:
+                    f.write(contenido)
+                os.replace(temporal, ruta)
+
+            with self._lock:
+                self._indice[url] = {"archivo": archivo, "bytes": len(contenido)}
+                self._indice.move_to_end(url)
+                self._aplicar_limite()
+                self._guardar_indice()
+            return True
+        finally:
+            with self._lock:
+                self._pendientes.pop(url, None)
+
+    def bytes_en_uso(self):
+        with self._lock:
+            return self._bytes_en_uso()
+
+    def _bytes_en_uso(self):
+        # Cada archivo cuenta una sola vez aunque lo compartan varias URLs
+        archivos = {e["archivo"]: e["bytes"] for e in self._indice.values()}
+        return sum(archivos.values())
+
+    def _aplicar_limite(self):
+        while self._indice and self._bytes_en_uso() > self.max_bytes:
+            _, entrada = self._indice.popitem(last=False)
+            archivo = entrada["archivo"]
+            if all(e["archivo"] != archivo for e in self._indice.values()):
+                try:
+                    os.remove(os.path.join(self.directorio, archivo))
+                except FileNotFoundError:
+                    pass
+
+    def _cargar_indice(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        try:
+            with open(self._ruta_indice, encoding="utf-8") as f:
+                datos = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for url, entrada in datos:
+            # Se ignoran entradas cuyo archivo ya no está en disco
+            if os.path.exists(os.path.join(self.directorio, entrada["archivo"])):
+                self._indice[url] = entrada
+
+    def _marcar_sucio(self):
+        self._sucio = True
+        if self._temporizador is None:
+            self._temporizador = threading.Timer(self.retardo_guardado, self.guardar)
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _guardar_indice(self):
+        self._sucio = False
+        temporal = self._ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(list(self._indice.items()), f)
+        os.replace(temporal, self._ruta_indice)
+
+
+def _extension(url):
+    extension = os.path.splitext(url.split("?", 1)[0])[1].lower()
+    return extension if extension in (".png", ".gif", ".jpg", ".jpeg", ".webp", ".svg") else ""
@@ -0,0 +1,102 @@
+"""Orden de los turnos y cambios en los combates por equipos."""
+import asyncio
+import random
+import time
+
+import pytest
+
+from equipos import (ATACAR, CAMBIAR, BatallaEquipos, Equipo, PlanificadorTurnos,
+                     _batallas_aleatorias, jugar_concurrentes)
+from motor import JUGADOR, RIVAL
+from pokemon import Ataque, Pokemon
+
+
+def pokemon(nombre, velocidad, hp=100, poder=10):
+    resultado = Pokemon(nombre, "normal", hp, velocidad=velocidad)
+    resultado.agregar_ataque(Ataque("Placaje", "normal", poder))
+    return resultado
+
+
+def batalla(jugador, rival):
+    return BatallaEquipos(Equipo(jugador), Equipo(rival), random.Random(0), random.Random(1))
+
+
+def test_el_mas_rapido_ataca_primero():
+    for velocidad_jugador, primero in ((90, JUGADOR), (40, RIVAL)):
+        b = batalla([pokemon("A", velocidad_jugador)], [pokemon("B", 60)])
+        hechas = b.jugar_turno((ATACAR, 0), (ATACAR, 0))
+        assert [lado for lado, _, _, _ in hechas] == [primero, 1 - primero]
+
+
+def test_los_empates_de_velocidad_se_alternan():
+    b = batalla([pokemon("A", 50)], [pokemon("B", 50)])
+    primeros = [b.jugar_turno((ATACAR, 0), (ATACAR, 0))[0][0] for _ in range(4)]
+    assert primeros == [JUGADOR, RIVAL, JUGADOR, RIVAL]
+
+
+def test_el_cambio_va_antes_que_un_ataque_mas_rapido():
+    lento, reserva = pokemon("Lento", 10), pokemon("Reserva", 10)
+    b = batalla([lento, reserva], [pokemon("Rapido", 200, poder=30)])
+    hechas = b.jugar_turno((CAMBIAR, 1), (ATACAR, 0))
+    assert [(lado, accion[0]) for lado, accion, _, _ in hechas] == [(JUGADOR, CAMBIAR),
+                                                                  (RIVAL, ATACAR)]
+    # El ataque del rival lo recibe el que acaba de entrar
+    assert b.jugador.activo is reserva
+    assert (lento.hp_actual, reserva.hp_actual) == (100, 70)
+
+
+def test_el_debilitado_pierde_su_accion_y_se_reemplaza():
+    lento, reserva = pokemon("Lento", 10, hp=5), pokemon("Reserva", 10)
+    b = batalla([lento, reserva], [pokemon("Rapido", 200, poder=30)])
+    hechas = b.jugar_turno((ATACAR, 0), (ATACAR, 0))
+    assert [lado for lado, _, _, _ in hechas] == [RIVAL]
+    assert b.jugador.activo is reserva
+    assert not b.terminada()
+
+
+def test_no_se_puede_cambiar_a_un_debilitado():
+    caido = pokemon("Caido", 10, hp=1)
+    caido.recibir_dano(1)
+    b = batalla([pokemon("A", 10), caido], [pokemon("B", 10)])
+    with pytest.raises(ValueError):
+        b.jugar_turno((CAMBIAR, 1), (ATACAR, 0))
+
+
+def test_planificador_prioridad_velocidad_y_desempate():
+    planificador = PlanificadorTurnos()
+    planificador.programar("lento", (ATACAR, 0), 10)
+    planificador.programar("rapido", (ATACAR, 0), 90)
+    planificador.programar("cambio", (CAMBIAR, 1), 1)
+    planificador.programar("empate_1", (ATACAR, 0), 10, desempate=1)
+    assert [planificador.siguiente()[0] for _ in range(len(planificador))] == [
+        "cambio", "rapido", "lento", "empate_1"]
+
+
+def test_planificador_con_muchas_acciones():
+    # Pocos valores distintos para que haya muchos empates en cada criterio
+    rng = random.Random(0)
+    n = 200000
+    parametros = [(rng.randint(0, 2), rng.randint(1, 20), rng.randint(0, 3)) for _ in range(n)]
+    planificador = PlanificadorTurnos()
+    inicio = time.perf_counter()
+    for i, (prioridad, velocidad, desempate) in enumerate(parametros):
+        planificador.programar(i, (ATACAR, 0), velocidad, desempate, prioridad)
+    orden = [planificador.siguiente()[0] for _ in range(len(planificador))]
+    segundos = time.perf_counter() - inicio
+    assert len(orden) == n and not planificador
+    claves = [(-parametros[i][0], -parametros[i][1], parametros[i][2], i) for i in orden]
+    # Orden estricto: a igualdad de todo, sale antes la que se programó antes
+    assert all(a < b for a, b in zip(claves, claves[1:]))
+    # Holgado (aquí tarda alrededor de 1 s): detecta un cambio de orden de
+    # magnitud, como una cola que deja de ser un montículo
+    assert segundos < 5, f"{n} acciones en {segundos:.1f} s"
+
+
+def test_batallas_concurrentes_terminan_todas():
+    batallas = list(_batallas_aleatorias(200, 0, 0.1))
+    resultados = asyncio.run(jugar_concurrentes(batallas))
+    assert len(resultados) == 200
+    assert all(r.ganador is not None for r in resultados)
+    # Jugarlas a la vez da lo mismo que en serie
+    en_serie = [b.jugar() for b in _batallas_aleatorias(200, 0, 0.1)]
+    assert [(r.ganador, r.turnos) for r in resultados] == [(r.ganador, r.turnos) for r in en_serie]
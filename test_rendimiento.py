@@ -0,0 +1,69 @@
+"""Regresiones de rendimiento respecto a rendimiento_base.json.
+
+Las pruebas marcadas `rendimiento` corren los benchmarks de rendimiento.py
+(cerca de un minuto) y solo se ejecutan con --rendimiento:
+
+    python -m pytest test_rendimiento.py --rendimiento
+    python -m pytest test_rendimiento.py --rendimiento --guardar-base
+"""
+import pytest
+
+import rendimiento
+from rendimiento import MAYOR, MENOR, comparar
+
+
+@pytest.mark.rendimiento
+def test_cada_metrica_tiene_linea_base(medidas, base):
+    faltan = [nombre for nombre in medidas if nombre not in base]
+    assert not faltan, f"sin línea base: {faltan}; guardarla con --guardar-base"
+
+
+@pytest.mark.rendimiento
+def test_sin_regresion(metrica, medidas, base, pytestconfig):
+    if metrica not in medidas:
+        pytest.fail(f"{metrica} ya no se mide; guardar la línea base con --guardar-base")
+    umbral = pytestconfig.getoption("--umbral")
+    [(_, anterior, actual, cambio, regresion)] = comparar({metrica: medidas[metrica]}, base, umbral)
+    tolerancia = rendimiento.TOLERANCIAS.get(metrica, umbral)
+    assert not regresion, (f"{metrica}: {anterior:.2f} -> {actual:.2f} "
+                           f"({cambio:+.1%}, tolerancia {tolerancia:.0%})")
+
+
+def test_importar_el_modelo_no_carga_flet():
+    modelo, interfaz, primera = rendimiento.medir_arranque(repeticiones=1)
+    assert modelo > 0 and interfaz > 0 and primera > 0
+
+
+def entrada(valor, unidad, mejor, calibracion=None):
+    resultado = {"valor": valor, "unidad": unidad, "mejor": mejor}
+    if calibracion is not None:
+        resultado["calibracion_us"] = calibracion
+    return resultado
+
+
+def test_comparar_descuenta_la_velocidad_de_la_maquina():
+    base = {"ritmo": entrada(100.0, "batallas/s", MAYOR, 1000.0),
+            "tiempo": entrada(1.0, "ms", MENOR, 1000.0)}
+    # La máquina va un 30 % más lenta: la calibración también
+    actuales = {"ritmo": entrada(77.0, "batallas/s", MAYOR, 1300.0),
+                "tiempo": entrada(1.3, "ms", MENOR, 1300.0)}
+    for _, _, _, cambio, regresion in comparar(actuales, base, umbral=0.1, tolerancias={}):
+        assert cambio == pytest.approx(0, abs=0.01)
+        assert not regresion
+
+
+def test_comparar_usa_la_tolerancia_de_cada_metrica():
+    base = {"estable": entrada(100.0, "batallas/s", MAYOR),
+            "ruidosa": entrada(100.0, "batallas/s", MAYOR),
+            "controles": entrada(10, "controles", MENOR)}
+    actuales = {"estable": entrada(70.0, "batallas/s", MAYOR),
+                "ruidosa": entrada(70.0, "batallas/s", MAYOR),
+                "controles": entrada(9, "controles", MENOR),
+                "nueva": entrada(1.0, "ms", MENOR)}
+    filas = {fila[0]: fila for fila in comparar(actuales, base, umbral=0.25,
+                                                  tolerancias={"ruidosa": 0.5})}
+    assert filas["estable"][3:] == (pytest.approx(0.3), True)
+    assert filas["ruidosa"][3:] == (pytest.approx(0.3), False)
+    # Mejorar no es regresión, y una métrica sin línea base no se juzga
+    assert filas["controles"][3:] == (pytest.approx(-0.1), False)
+    assert filas["nueva"][3:] == (None, False)
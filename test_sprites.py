@@ -0,0 +1,145 @@
+"""Caché de sprites contra un servidor HTTP local."""
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from sprites import GestorSprites
+
+IMAGENES = {
+    "/a.png": b"A" * 100,
+    "/b.png": b"B" * 100,
+    "/c.png": b"C" * 100,
+    "/copia_a.png": b"A" * 100,
+    "/grande.png": b"G" * 1000,
+}
+
+
+@pytest.fixture
+def servidor():
+    peticiones = []
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            peticiones.append(self.path)
+            contenido = IMAGENES.get(self.path)
+            if contenido is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(contenido)))
+            self.end_headers()
+            self.wfile.write(contenido)
+
+        def log_message(self, *args):
+            pass
+
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    hilo = threading.Thread(target=http.serve_forever, daemon=True)
+    hilo.start()
+    base = f"http://127.0.0.1:{http.server_port}"
+    yield base, peticiones
+    http.shutdown()
+    http.server_close()
+
+
+def archivos(gestor):
+    return sorted(f for f in os.listdir(gestor.directorio) if f != "indice.json")
+
+
+def test_la_misma_imagen_se_guarda_una_vez(servidor, tmp_path):
+    base, peticiones = servidor
+    gestor = GestorSprites(str(tmp_path), max_bytes=1000)
+    urls = [f"{base}/a.png", f"{base}/copia_a.png", f"{base}/a.png"]
+    assert gestor.precargar(urls) == [True, True]
+    assert len(archivos(gestor)) == 1
+    assert gestor.bytes_en_uso() == 100
+    assert gestor.resolver(f"{base}/a.png") == gestor.resolver(f"{base}/copia_a.png")
+    # Lo que ya está en caché no se vuelve a pedir
+    assert gestor.precargar(urls) == []
+    assert sorted(peticiones) == ["/a.png", "/copia_a.png"]
+
+
+def test_se_expulsa_la_menos_usada_y_el_orden_sobrevive_al_reinicio(servidor, tmp_path):
+    base, _ = servidor
+    gestor = GestorSprites(str(tmp_path), max_bytes=250)
+    assert gestor.descargar(f"{base}/a.png")
+    assert gestor.descargar(f"{base}/b.png")
+    # Usar "a" la hace la más reciente; el orden se escribe al cerrar
+    assert gestor.resolver(f"{base}/a.png").startswith("/sprites/")
+    gestor.cerrar()
+
+    reiniciado = GestorSprites(str(tmp_path), max_bytes=250)
+    assert reiniciado.descargar(f"{base}/c.png")
+    assert reiniciado.esta_en_cache(f"{base}/a.png")
+    assert not reiniciado.esta_en_cache(f"{base}/b.png")
+    assert reiniciado.esta_en_cache(f"{base}/c.png")
+    assert len(archivos(reiniciado)) == 2
+
+
+def test_una_imagen_mayor_que_el_limite_no_vacia_la_cache(servidor, tmp_path):
+    base, _ = servidor
+    gestor = GestorSprites(str(tmp_path), max_bytes=250)
+    assert gestor.descargar(f"{base}/a.png")
+    assert not gestor.descargar(f"{base}/grande.png")
+    assert gestor.esta_en_cache(f"{base}/a.png")
+    assert not gestor.esta_en_cache(f"{base}/grande.png")
+    assert len(archivos(gestor)) == 1
+
+
+def test_sin_red_solo_sirve_lo_que_hay_en_disco(servidor, tmp_path):
+    base, peticiones = servidor
+    assert GestorSprites(str(tmp_path)).descargar(f"{base}/a.png")
+    peticiones.clear()
+
+    gestor = GestorSprites(str(tmp_path), sin_red=True)
+    assert gestor.resolver(f"{base}/a.png").startswith("/sprites/")
+    assert gestor.resolver(f"{base}/b.png") == f"{base}/b.png"
+    assert not gestor.descargar(f"{base}/b.png")
+    assert gestor.precargar([f"{base}/b.png"]) == []
+    assert peticiones == []
+
+
+def test_un_404_no_se_guarda(servidor, tmp_path):
+    base, peticiones = servidor
+    gestor = GestorSprites(str(tmp_path))
+    assert not gestor.descargar(f"{base}/no_existe.png")
+    assert not gestor.esta_en_cache(f"{base}/no_existe.png")
+    assert archivos(gestor) == []
+    # El fallo no queda como descarga pendiente: se puede volver a intentar
+    assert not gestor.descargar(f"{base}/no_existe.png")
+    assert peticiones == ["/no_existe.png", "/no_existe.png"]
+
+
+def test_resolver_no_escribe_el_indice(servidor, tmp_path):
+    base, _ = servidor
+    gestor = GestorSprites(str(tmp_path), retardo_guardado=60)
+    assert gestor.descargar(f"{base}/a.png") and gestor.descargar(f"{base}/b.png")
+    ruta = os.path.join(gestor.directorio, "indice.json")
+    with open(ruta, encoding="utf-8") as f:
+        escrito = f.read()
+    gestor.resolver(f"{base}/a.png")
+    with open(ruta, encoding="utf-8") as f:
+        assert f.read() == escrito
+    gestor.guardar()
+    with open(ruta, encoding="utf-8") as f:
+        assert f.read() != escrito
+
+
+def test_el_orden_se_guarda_solo_tras_el_retardo(servidor, tmp_path):
+    base, _ = servidor
+    gestor = GestorSprites(str(tmp_path), retardo_guardado=0.2)
+    assert gestor.descargar(f"{base}/a.png") and gestor.descargar(f"{base}/b.png")
+    gestor.resolver(f"{base}/a.png")
+    temporizador = gestor._temporizador
+    assert list(GestorSprites(str(tmp_path))._indice) == [f"{base}/a.png", f"{base}/b.png"]
+    temporizador.join()
+    assert list(GestorSprites(str(tmp_path))._indice) == [f"{base}/b.png", f"{base}/a.png"]
+
+
+def test_una_url_mal_formada_no_queda_pendiente(tmp_path):
+    gestor = GestorSprites(str(tmp_path))
+    for url in ("no es una url", "ftp//sin-esquema/a.png"):
+        assert not gestor.descargar(url)
+        assert url not in gestor._pendientes
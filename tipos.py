@@ -0,0 +1,107 @@
+"""Registro de tipos y tabla de efectividad precalculada.
+
+Cada nombre de tipo se convierte una sola vez en un entero pequeño y la
+efectividad se guarda en una matriz `matriz[id_ataque][id_defensor]`, de modo
+que consultar un multiplicador es un doble índice sin construir diccionarios
+ni comparar cadenas.
+
+Los tipos dobles se escriben "planta/veneno" (o como tupla) y solo tienen
+sentido como defensores: su columna es el producto de las columnas de cada
+tipo que los forma.
+"""
+import json
+
+SEPARADOR = "/"
+
+# multiplicador = TABLA_TIPOS[tipo_ataque][tipo_defensor]; lo que no aparece vale 1.0
+TABLA_TIPOS = {
+    "fuego": {"planta": 1.5, "electrico": 0.75},
+    "planta": {"electrico": 1.5, "fuego": 0.75},
+    "electrico": {"fuego": 1.5, "planta": 0.75},
+    "normal": {},
+}
+
+
+def _componentes(tipo):
+    if isinstance(tipo, str):
+        return tuple(tipo.split(SEPARADOR))
+    return tuple(tipo)
+
+
+class RegistroTipos:
+    def __init__(self, tabla=None, por_defecto=1.0):
+        self.por_defecto = por_defecto
+        self.tabla = {}
+        self.ids = {}
+        self.nombres = []
+        self.matriz = []
+        self.cargar(tabla or {})
+
+    @classmethod
+    def desde_json(cls, ruta, por_defecto=1.0):
+        with open(ruta, encoding="utf-8") as f:
+            return cls(json.load(f), por_defecto)
+
+    def cargar(self, tabla):
+        """Añade o reemplaza relaciones de tipo; los ids existentes se conservan."""
+        for tipo_ataque, relaciones in tabla.items():
+            self.tabla.setdefault(tipo_ataque, {}).update(relaciones)
+            for tipo_defensor in relaciones:
+                self._registrar(tipo_defensor)
+            self._registrar(tipo_ataque)
+        self._reconstruir()
+
+    def obtener_id(self, tipo):
+        """Devuelve el id de un tipo simple o doble, registrándolo si es nuevo."""
+        clave = SEPARADOR.join(_componentes(tipo))
+        id_tipo = self.ids.get(clave)
+        if id_tipo is None:
+            id_tipo = self._registrar(clave)
+            self._reconstruir()
+        return id_tipo
+
+    def nombre(self, id_tipo):
+        return self.nombres[id_tipo]
+
+    def efectividad_id(self, id_ataque, id_defensor):
+        return self.matriz[id_ataque][id_defensor]
+
+    def efectividad(self, tipo_ataque, tipo_defensor):
+        id_ataque = self.obtener_id(tipo_ataque)
+        id_defensor = self.obtener_id(tipo_defensor)
+        return self.matriz[id_ataque][id_defensor]
+
+    def _registrar(self, clave):
+        for componente in _componentes(clave):
+            if componente not in self.ids:
+                self.ids[componente] = len(self.nombres)
+                self.nombres.append(componente)
+        if clave not in self.ids:
+            self.ids[clave] = len(self.nombres)
+            self.nombres.append(clave)
+        return self.ids[clave]
+
+    def _multiplicador(self, tipo_ataque, tipo_defensor):
+        if SEPARADOR in tipo_ataque:
+            return self.por_defecto
+        relaciones = self.tabla.get(tipo_ataque, {})
+        resultado = 1.0
+        for componente in _componentes(tipo_defensor):
+            resultado *= relaciones.get(componente, self.por_defecto)
+        return resultado
+
+    def _reconstruir(self):
+        # La matriz se reemplaza entera para que los lectores nunca vean una a medias
+        self.matriz = [
+            [self._multiplicador(a, d) for d in self.nombres]
+            for a in self.nombres
+        ]
+
+
+REGISTRO = RegistroTipos(TABLA_TIPOS)
+
+
+def cargar_tipos(ruta):
+    """Amplía el registro global con una tabla JSON de efectividades."""
+    with open(ruta, encoding="utf-8") as f:
+        REGISTRO.cargar(json.load(f))
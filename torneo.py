@@ -0,0 +1,209 @@
+"""Torneo todos contra todos repartido entre procesos.
+
+Los enfrentamientos se dividen en shards de tamaño fijo. Cada shard recibe
+una semilla derivada de la semilla del torneo y de su índice, de modo que el
+resultado no depende de cuántos procesos se usen ni del orden en que terminen:
+con la misma semilla el torneo es idéntico bit a bit con 1 o con N procesos.
+
+    python torneo.py --batallas 2000 --procesos 4
+    python torneo.py --escalado 8
+"""
+import argparse
+import hashlib
+import os
+import time
+from itertools import combinations
+from multiprocessing import get_context
+
+from motor import Batalla, crear_rngs
+from pokemon import CATALOGO, crear_pokemon
+
+
+class Participante:
+    def __init__(self, especie, ataques=None):
+        self.especie = especie
+        # Índices de los ataques de la especie que puede usar; None = todos
+        self.ataques = None if ataques is None else tuple(ataques)
+
+    @property
+    def nombre(self):
+        if self.ataques is None:
+            return self.especie
+        return f"{self.especie}[{','.join(map(str, self.ataques))}]"
+
+    def crear(self):
+        pokemon = crear_pokemon(self.especie)
+        if self.ataques is not None:
+            pokemon.ataques = tuple(pokemon.ataques[i] for i in self.ataques)
+        return pokemon
+
+
+def participantes(nombres=None, ataques_por_participante=None):
+    """Una entrada por especie, o una por cada combinación de k ataques."""
+    resultado = []
+    for nombre in CATALOGO if nombres is None else nombres:
+        if ataques_por_participante is None:
+            resultado.append(Participante(nombre))
+            continue
+        total = len(CATALOGO[nombre]["ataques"])
+        for combinacion in combinations(range(total), ataques_por_participante):
+            resultado.append(Participante(nombre, combinacion))
+    return resultado
+
+
+def semilla_shard(semilla, indice):
+    """Semilla independiente para un shard, derivada con SHA-256."""
+    digest = hashlib.sha256(f"{semilla}/{indice}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def repartir(n_participantes, batallas, tamano_shard):
+    """Divide (a, b, n) en trabajos de como mucho `tamano_shard` batallas.
+
+    Depende solo de los participantes y del tamaño de shard, nunca del número
+    de procesos.
+    """
+    if tamano_shard < 1:
+        raise ValueError(f"El tamaño de shard debe ser positivo, no {tamano_shard}")
+    if batallas < 0:
+        raise ValueError(f"El número de batallas no puede ser negativo, no {batallas}")
+    shards, actual, ocupado = [], [], 0
+    for a in range(n_participantes):
+        for b in range(n_participantes):
+            restantes = batallas
+            while restantes:
+                n = min(restantes, tamano_shard - ocupado)
+                actual.append((a, b, n))
+                ocupado += n
+                restantes -= n
+                if ocupado == tamano_shard:
+                    shards.append(actual)
+                    actual, ocupado = [], 0
+    if actual:
+        shards.append(actual)
+    return shards
+
+
+def _jugar_shard(trabajo):
+    indice, semilla, lista_participantes, enfrentamientos = trabajo
+    semillas = crear_rngs(semilla_shard(semilla, indice))[0]
+    # (a, b) -> [victorias de a, victorias de b, empates]
+    conteo = {}
+    for a, b, n in enfrentamientos:
+        fila = conteo.setdefault((a, b), [0, 0, 0])
+        for _ in range(n):
+            rng_a, rng_b = crear_rngs(semillas.getrandbits(64))
+            batalla = Batalla(lista_participantes[a].crear(), lista_participantes[b].crear(),
+                              rng_a, rng_b, registrar=False)
+            ganador = batalla.jugar().ganador
+            fila[2 if ganador is None else ganador] += 1
+    return indice, conteo
+
+
+class Clasificacion:
+    def __init__(self, lista_participantes):
+        self.participantes = lista_participantes
+        self.enfrentamientos = {}
+        self.shards_recibidos = 0
+
+    def agregar(self, conteo):
+        for par, (victorias, derrotas, empates) in conteo.items():
+            fila = self.enfrentamientos.setdefault(par, [0, 0, 0])
+            fila[0] += victorias
+            fila[1] += derrotas
+            fila[2] += empates
+        self.shards_recibidos += 1
+
+    def tabla(self):
+        """Filas (nombre, victorias, derrotas, empates, tasa), de mejor a peor."""
+        totales = [[0, 0, 0] for _ in self.participantes]
+        for (a, b), (victorias, derrotas, empates) in self.enfrentamientos.items():
+            totales[a][0] += victorias
+            totales[a][1] += derrotas
+            totales[a][2] += empates
+            totales[b][0] += derrotas
+            totales[b][1] += victorias
+            totales[b][2] += empates
+        filas = []
+        for participante, (v, d, e) in zip(self.participantes, totales):
+            jugadas = v + d + e
+            filas.append((participante.nombre, v, d, e, v / jugadas if jugadas else 0.0))
+        filas.sort(key=lambda fila: (-fila[4], fila[0]))
+        return filas
+
+
+def jugar_torneo(lista_participantes=None, batallas=1000, semilla=0, procesos=None,
+                 tamano_shard=2000, al_recibir=None):
+    """Juega el torneo y devuelve la `Clasificacion`.
+
+    `al_recibir(indice_shard, clasificacion)` se llama cada vez que llega un
+    shard, para mostrar resultados parciales mientras el resto sigue en curso.
+    """
+    if lista_participantes is None:
+        lista_participantes = participantes()
+    lista_participantes = list(lista_participantes)
+    if not lista_participantes:
+        raise ValueError("El torneo necesita al menos un participante")
+    clasificacion = Clasificacion(lista_participantes)
+    trabajos = [
+        (indice, semilla, lista_participantes, enfrentamientos)
+        for indice, enfrentamientos in enumerate(
+            repartir(len(lista_participantes), batallas, tamano_shard))
+    ]
+    procesos = procesos or os.cpu_count() or 1
+
+    if procesos == 1:
+        resultados = map(_jugar_shard, trabajos)
+        _recibir(resultados, clasificacion, al_recibir)
+    else:
+        with get_context().Pool(procesos) as pool:
+            _recibir(pool.imap_unordered(_jugar_shard, trabajos), clasificacion, al_recibir)
+    return clasificacion
+
+
+def _recibir(resultados, clasificacion, al_recibir):
+    # Las sumas son enteras, así que el orden de llegada no cambia el resultado
+    for indice, conteo in resultados:
+        clasificacion.agregar(conteo)
+        if al_recibir is not None:
+            al_recibir(indice, clasificacion)
+
+
+def medir_escalado(max_procesos=None, batallas=2000, semilla=0):
+    """Tiempo del mismo torneo con 1..N procesos; comprueba que no cambia."""
+    max_procesos = max_procesos or os.cpu_count() or 1
+    referencia = None
+    tiempos = []
+    for procesos in range(1, max_procesos + 1):
+        inicio = time.perf_counter()
+        clasificacion = jugar_torneo(batallas=batallas, semilla=semilla, procesos=procesos)
+        tiempos.append((procesos, time.perf_counter() - inicio))
+        if referencia is None:
+            referencia = clasificacion.enfrentamientos
+        elif clasificacion.enfrentamientos != referencia:
+            raise AssertionError(f"Resultados distintos con {procesos} procesos")
+    return tiempos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batallas", type=int, default=1000,
+                        help="batallas por enfrentamiento")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--ataques", type=int, default=None,
+                        help="participantes con cada combinación de k ataques")
+    parser.add_argument("--escalado", type=int, metavar="N",
+                        help="mide el tiempo con 1..N procesos")
+    args = parser.parse_args()
+
+    if args.escalado:
+        base = None
+        for procesos, segundos in medir_escalado(args.escalado, args.batallas, args.semilla):
+            base = base or segundos
+            print(f"{procesos:>2} procesos: {segundos:7.2f} s  (x{base / segundos:.2f})")
+    else:
+        clasificacion = jugar_torneo(participantes(ataques_por_participante=args.ataques),
+                                     args.batallas, args.semilla, args.procesos)
+        for nombre, v, d, e, tasa in clasificacion.tabla():
+            print(f"{nombre:<22} {v:>8} {d:>8} {e:>6}  {tasa:.4f}")